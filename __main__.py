@@ -0,0 +1,5 @@
+# __main__.py
+# Permet de lancer l'application avec `python <dossier de Pythautom>`; même point d'entrée que main.py.
+from main import run
+
+run()
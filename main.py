@@ -1,18 +1,47 @@
 # main.py
 import sys
 import os
-from PyQt6.QtWidgets import QApplication
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional
 
 # Import components from the project
+# Only the lightweight modules are imported here: PyQt6 and the GUI (which pulls
+# in the LLM backends) are imported inside main(), after the pre-flight checks.
 from src import project_manager
 from src import utils
-# Import the main window class
-from src.gui_main_window import MainWindow
 # Import the configuration manager (we'll create this logic later)
 from src import config_manager # Supposons un nouveau module
 
-def main():
+def _background_uv_check(result_future: Future):
+    """Checks for the 'uv' command off the startup path and publishes the result through result_future."""
+    uv_check = None
+    try:
+        print("Checking for 'uv' command...")
+        uv_check = utils.check_uv_available()
+        if uv_check is None or uv_check.returncode != 0:
+             print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+             print("!!! WARNING: 'uv' command failed or not found.             !!!")
+             print("!!! Virtual environment and dependency management WILL FAIL. !!!")
+             print("!!! Please install uv: https://github.com/astral-sh/uv     !!!")
+             print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+        else:
+             # Log the version found if successful
+             uv_version_output = uv_check.stdout.strip() or uv_check.stderr.strip()
+             print(f"UV check successful: {uv_version_output}")
+    except Exception as uv_e:
+         print(f"Error checking for UV: {uv_e}")
+    finally:
+        result_future.set_result(uv_check)
+
+def main(uv_check_future: Optional[Future] = None):
     """Main function to initialize and run the application."""
+    # Deferred imports: the Qt stack is only loaded once the pre-flight checks are done
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    # Import the main window class
+    from src.gui_main_window import MainWindow
 
     # --- Load Application Configuration ---
     # Load any saved settings before creating the UI
@@ -37,6 +66,11 @@ def main():
     # --- Create and Show Main Window ---
     window = MainWindow() # MainWindow itself doesn't need the config directly
     window.show()
+    # Project list loading and the LLM connection attempt run once the window is painted
+    QTimer.singleShot(0, window.post_show_init)
+    # The uv check result reaches the GUI through a signal (queued if it arrives from the check thread)
+    if uv_check_future is not None:
+        uv_check_future.add_done_callback(lambda future: window.uv_check_finished.emit(future.result()))
     # ----------------------------------
 
     # --- Start Application Event Loop ---
@@ -51,7 +85,14 @@ def main():
 
     sys.exit(exit_code)
 
-if __name__ == "__main__":
+def _configure_logging():
+    """Root logger: WARNING by default, DEBUG when the PYTHAUTOM_DEBUG environment variable is set."""
+    debug = os.environ.get("PYTHAUTOM_DEBUG", "").strip().lower() not in ("", "0", "false", "no")
+    logging.basicConfig(level=logging.DEBUG if debug else logging.WARNING, format="[%(name)s] %(levelname)s: %(message)s")
+
+def run():
+    """Single entry point: pre-flight checks, then the GUI (used by main.py and __main__.py)."""
+    _configure_logging()
     # --- Pre-Flight Checks ---
     # 1. Ensure the main 'projets' directory exists (remains unchanged)
     try:
@@ -62,24 +103,14 @@ if __name__ == "__main__":
          print(f"CRITICAL ERROR: Could not ensure projects directory exists: {e}")
          sys.exit(1) # Exit if the base directory cannot be created
 
-    # 2. Check for UV dependency (remains unchanged)
-    try:
-        print("Checking for 'uv' command...")
-        uv_check = utils.run_uv_command(["--version"], capture=True)
-        if uv_check is None or uv_check.returncode != 0:
-             print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-             print("!!! WARNING: 'uv' command failed or not found.             !!!")
-             print("!!! Virtual environment and dependency management WILL FAIL. !!!")
-             print("!!! Please install uv: https://github.com/astral-sh/uv     !!!")
-             print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-        else:
-             # Log the version found if successful
-             uv_version_output = uv_check.stdout.strip() or uv_check.stderr.strip()
-             print(f"UV check successful: {uv_version_output}")
-    except Exception as uv_e:
-         print(f"Error checking for UV: {uv_e}")
+    # 2. Check for UV dependency, in a background thread so it doesn't delay the window
+    uv_check_future = Future()
+    threading.Thread(target=_background_uv_check, args=(uv_check_future,), daemon=True).start()
     # --- End Pre-Flight Checks ---
 
     # --- Run Main Application ---
-    main()
-    # -------------------------
\ No newline at end of file
+    main(uv_check_future)
+    # -------------------------
+
+if __name__ == "__main__":
+    run()
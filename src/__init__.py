@@ -0,0 +1,19 @@
+# src/__init__.py
+# Les sous-modules sont chargés à la demande (ex: `src.exporter`) afin que
+# l'import du paquet ne tire ni Qt ni les backends LLM au démarrage.
+import importlib
+
+_LAZY_SUBMODULES = {
+    "config_manager", "project_manager", "utils", "exporter",
+    "llm_interaction", "gui_main_window", "gui_actions_handler",
+}
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | _LAZY_SUBMODULES)
@@ -1,9 +1,26 @@
 # src/config_manager.py
 
 import os
+import copy
 import json
-import traceback
-from typing import Optional, Dict, Any, Union
+import atexit
+import logging
+import threading
+from typing import Optional, Dict, Any, Union, Tuple
+
+# orjson (optionnel) est nettement plus rapide que json pour lire/écrire la config
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+
+# msgpack (optionnel) pour le fichier d'état binaire; JSON sinon
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
 
 # --- Constants ---
 CONFIG_FILE_NAME = ".pythautom_config.json"
@@ -25,14 +42,36 @@ DEFAULT_CONFIG = {
     }
 }
 
+# Valeurs "runtime" (derniers modèle/IP/port utilisés) écrites dans un fichier d'état séparé,
+# pour que leurs changements fréquents ne réécrivent pas la config éditable par l'utilisateur.
+# Nom fixe: le format (msgpack ou JSON) est détecté à la lecture, installer/retirer msgpack ne perd rien
+STATE_FILE_NAME = ".pythautom_state"
+_STATE_KEYS = (("gemini", "last_model_used"), ("lmstudio", "last_ip_used"), ("lmstudio", "last_port_used"))
+
+# Délai (secondes) avant l'écriture disque: plusieurs setters successifs ne font qu'une sauvegarde
+SAVE_DEBOUNCE_SECONDS = 0.5
+
 # --- Module State ---
 # Stocke la configuration chargée en mémoire
 _current_config: Dict[str, Any] = {}
+# Accès rapide aux valeurs lues par les getters ("backend.clé" -> valeur), reconstruit à chaque chargement
+_flat_cache: Dict[str, Any] = {}
+# Vrai dès que load_app_config a été exécuté une fois (les getters ne rechargent plus ensuite)
+_loaded: bool = False
+# Sauvegarde différée (threading.Timer pour garder ce module indépendant de Qt)
+_dirty: bool = False # Config JSON modifiée
+_state_dirty: bool = False # Fichier d'état modifié
+_save_timer: Optional[threading.Timer] = None
+_save_lock = threading.RLock()
+# Le dossier de la config (et du fichier d'état) n'est créé/vérifié qu'une fois par processus
+_dir_ensured: bool = False
+# (mtime_ns, taille) du fichier lors du dernier chargement/sauvegarde: évite de re-parser un fichier inchangé
+_loaded_stat: Optional[Tuple[int, int]] = None
 
 # --- Helper Functions ---
 
-def _get_config_path() -> str:
-    """Gets the absolute path to the configuration file."""
+def _compute_config_path() -> str:
+    """Computes the absolute path to the configuration file (called once, at import)."""
     try:
         # Trouve la racine de l'application (où se trouve main.py)
         # Assume config_manager.py est dans src/
@@ -46,31 +85,143 @@ def _get_config_path() -> str:
     # Vérifie si on est bien à la racine attendue (là où 'src' ou 'main.py' devrait être)
     expected_marker = os.path.join(app_root_dir, 'src')
     if not os.path.isdir(expected_marker) and not os.path.exists(os.path.join(app_root_dir, 'main.py')):
-         print(f"Warning: Config path guessing based on '{app_root_dir}', structure might be unexpected.")
+         logger.warning("Config path guessing based on '%s', structure might be unexpected.", app_root_dir)
 
     return os.path.join(app_root_dir, CONFIG_FILE_NAME)
 
-def _merge_defaults(loaded_config: Dict[str, Any]) -> Dict[str, Any]:
-    """Merges loaded config with defaults to handle missing keys gracefully."""
-    # Copie profonde pour éviter de modifier DEFAULT_CONFIG
-    merged_config = json.loads(json.dumps(DEFAULT_CONFIG))
+# Chemin résolu une seule fois: évite les appels abspath/stat répétés à chaque lecture
+_CONFIG_PATH = _compute_config_path()
 
-    def _recursive_update(target: Dict, source: Dict):
-        for key, value in source.items():
-            if isinstance(value, dict) and key in target and isinstance(target[key], dict):
-                _recursive_update(target[key], value)
-            elif key in target: # Only update if key exists in default structure
-                 target[key] = value
+_STATE_PATH = os.path.join(os.path.dirname(_CONFIG_PATH), STATE_FILE_NAME)
+
+def _get_config_path() -> str:
+    """Gets the absolute path to the configuration file."""
+    return _CONFIG_PATH
 
-    _recursive_update(merged_config, loaded_config)
+def _merge_defaults(loaded_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Merges loaded config with defaults to handle missing keys gracefully."""
     # Check version compatibility (simple check for now)
-    if merged_config.get("version") != DEFAULT_CONFIG.get("version"):
-        print(f"Warning: Configuration version mismatch (loaded: {merged_config.get('version')}, expected: {DEFAULT_CONFIG.get('version')}). Using loaded structure.")
+    loaded_version = loaded_config.get("version", DEFAULT_CONFIG.get("version"))
+    if loaded_version != DEFAULT_CONFIG.get("version"):
+        logger.warning("Configuration version mismatch (loaded: %s, expected: %s). Using loaded structure.", loaded_version, DEFAULT_CONFIG.get('version'))
         # For more complex cases, migration logic would be needed here.
         # For now, we just keep the loaded structure if version is different.
-        merged_config = loaded_config # Revert to loaded if versions differ drastically
+        return loaded_config
+
+    # Complète la config chargée sur place: seules les clés absentes sont copiées depuis les défauts.
+    # Parcours itératif (pile explicite de paires (cible, défauts)) plutôt que récursif.
+    stack = [(loaded_config, DEFAULT_CONFIG)]
+    while stack:
+        target, defaults = stack.pop()
+        for key, default_value in defaults.items():
+            if isinstance(default_value, dict):
+                current = target.get(key)
+                if isinstance(current, dict): stack.append((current, default_value))
+                elif key not in target: target[key] = copy.deepcopy(default_value)
+            else:
+                target.setdefault(key, default_value) # Valeurs simples (immuables), pas de copie
+
+    return loaded_config
+
+def _json_loads(data: bytes) -> Any:
+    """Parses JSON bytes with orjson when available, stdlib json otherwise."""
+    if _json_fast is not None: return _json_fast.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serializes to indented JSON bytes with orjson when available, stdlib json otherwise."""
+    if _json_fast is not None: return _json_fast.dumps(obj, option=_json_fast.OPT_INDENT_2)
+    return json.dumps(obj, indent=4).encode('utf-8')
+
+def _strip_state_keys(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the config to write to the JSON file: same content without the runtime state keys.
+       Only the dicts on the path to these keys are copied.
+    """
+    llm_settings = config.get("llm_settings")
+    if not isinstance(llm_settings, dict): return config
+    llm_settings = dict(llm_settings)
+    for backend, key in _STATE_KEYS:
+        backend_settings = llm_settings.get(backend)
+        if isinstance(backend_settings, dict) and key in backend_settings:
+            backend_settings = dict(backend_settings); del backend_settings[key]
+            llm_settings[backend] = backend_settings
+    stripped = dict(config); stripped["llm_settings"] = llm_settings
+    return stripped
+
+def _state_dumps(state: Dict[str, Any]) -> bytes:
+    """Serializes the runtime state (msgpack when available, JSON otherwise)."""
+    if msgpack is not None: return msgpack.packb(state, use_bin_type=True)
+    return _json_dumps(state)
+
+def _state_loads(data: bytes) -> Any:
+    """Parses the runtime state file, whichever format it was written in (a JSON object starts with '{')."""
+    if data.lstrip()[:1] == b'{': return _json_loads(data)
+    if msgpack is None: raise ValueError("msgpack state file but msgpack is not installed")
+    return msgpack.unpackb(data, raw=False)
+
+def _load_state_into_config():
+    """Overlays the values of the state file (if any) on _current_config. Invalid files are ignored."""
+    try:
+        with open(_STATE_PATH, 'rb') as f:
+            state = _state_loads(f.read())
+    except FileNotFoundError:
+        return
+    except Exception as e: # msgpack.UnpackException, ValueError, JSONDecodeError...
+        logger.error("Failed to read state file '%s': %s. Using config values.", _STATE_PATH, e)
+        return
+    if not isinstance(state, dict): return
+    for backend, key in _STATE_KEYS:
+        flat_key = f"{backend}.{key}"
+        if flat_key in state: _get_backend_settings(backend)[key] = state[flat_key]
 
-    return merged_config
+def _write_atomic(path: str, data: bytes):
+    """Writes data to path through a temp file + os.replace (the file is never half written)."""
+    global _dir_ensured
+    if not _dir_ensured:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _dir_ensured = True
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# Config par défaut pré-encodée: le premier enregistrement (config inchangée) évite la sérialisation
+_DEFAULT_DISK_CONFIG = _strip_state_keys(DEFAULT_CONFIG)
+_DEFAULT_CONFIG_BYTES = _json_dumps(_DEFAULT_DISK_CONFIG)
+
+def _to_port(port: Any) -> Optional[int]:
+    """Converts a stored port value to int (valid digit strings are accepted), None otherwise."""
+    if isinstance(port, str) and port.isdigit(): return int(port)
+    if isinstance(port, int): return port
+    return None
+
+def _rebuild_flat_cache():
+    """Recomputes the flat getter cache from the nested _current_config."""
+    global _flat_cache
+    llm_settings = _current_config.get("llm_settings", {})
+    gemini_settings = llm_settings.get("gemini", {})
+    lmstudio_settings = llm_settings.get("lmstudio", {})
+    _flat_cache = {
+        "gemini.api_key": gemini_settings.get("api_key"),
+        "gemini.last_model_used": gemini_settings.get("last_model_used"),
+        "lmstudio.last_ip_used": lmstudio_settings.get("last_ip_used"),
+        "lmstudio.last_port_used": _to_port(lmstudio_settings.get("last_port_used")),
+    }
+
+def _get_backend_settings(backend: str) -> Dict[str, Any]:
+    """Returns the (created if missing) settings dict of an LLM backend."""
+    return _current_config.setdefault("llm_settings", {}).setdefault(backend, {})
+
+def _schedule_save(state_only: bool = False):
+    """Marks the config (or only the runtime state) as dirty and (re)starts the debounced save timer."""
+    global _dirty, _state_dirty, _save_timer
+    with _save_lock:
+        if state_only: _state_dirty = True
+        else: _dirty = True
+        if _save_timer is not None: _save_timer.cancel()
+        _save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, flush_app_config)
+        _save_timer.daemon = True
+        _save_timer.start()
 
 
 # --- Public API ---
@@ -79,119 +230,159 @@ def load_app_config():
     """Loads the application configuration from the JSON file.
        Populates the internal _current_config state.
     """
-    global _current_config
+    global _current_config, _loaded_stat, _loaded
     config_path = _get_config_path()
-    print(f"[Config] Attempting to load config from: {config_path}")
+    try:
+        st = os.stat(config_path)
+        file_stat = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        file_stat = None
+
+    if _loaded:
+        # Des modifications non encore écrites sont plus récentes que le fichier
+        if _dirty or _state_dirty: return
+        if file_stat == _loaded_stat: return # Fichier inchangé (ou toujours absent) depuis le dernier chargement
+
+    logger.debug("Attempting to load config from: %s", config_path)
 
-    if os.path.exists(config_path):
+    if file_stat is not None:
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                loaded_data = json.load(f)
+            with open(config_path, 'rb') as f:
+                loaded_data = _json_loads(f.read())
                 # Merge with defaults to ensure all keys exist
                 _current_config = _merge_defaults(loaded_data)
-                print("[Config] Configuration loaded successfully.")
-        except json.JSONDecodeError:
-            print(f"ERROR: Failed to decode JSON from '{config_path}'. Using default config.")
-            traceback.print_exc()
-            _current_config = json.loads(json.dumps(DEFAULT_CONFIG)) # Use deep copy of default
+                logger.debug("Configuration loaded successfully.")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e: # orjson.JSONDecodeError hérite de json.JSONDecodeError
+            # Fichier mal formé: le message suffit, pas de traceback
+            logger.error("Failed to decode JSON from '%s' (%s). Using default config.", config_path, e)
+            _current_config = copy.deepcopy(DEFAULT_CONFIG) # Use deep copy of default
         except Exception as e:
-            print(f"ERROR: Failed to load config file '{config_path}': {e}. Using default config.")
-            traceback.print_exc()
-            _current_config = json.loads(json.dumps(DEFAULT_CONFIG))
+            logger.exception("Failed to load config file '%s': %s. Using default config.", config_path, e)
+            _current_config = copy.deepcopy(DEFAULT_CONFIG)
     else:
-        print("[Config] Configuration file not found. Using default config.")
-        _current_config = json.loads(json.dumps(DEFAULT_CONFIG))
+        logger.debug("Configuration file not found. Using default config.")
+        _current_config = copy.deepcopy(DEFAULT_CONFIG)
+
+    # Les dernières valeurs utilisées viennent du fichier d'état (prioritaire sur d'anciennes valeurs du JSON)
+    _load_state_into_config()
 
     # Ensure essential structure exists even after loading/defaulting
     _current_config.setdefault("llm_settings", {}).setdefault("gemini", {})
     _current_config["llm_settings"]["gemini"].setdefault("api_key", None)
+    _rebuild_flat_cache()
+    # Un fichier invalide n'est pas re-parsé tant qu'il n'a pas été modifié
+    _loaded_stat = file_stat
+    _loaded = True
 
+def reload_app_config():
+    """Forces a re-read of the configuration file (e.g. after a manual edit).
+       Pending, not yet saved changes are discarded.
+    """
+    global _dirty, _state_dirty, _save_timer, _loaded
+    with _save_lock:
+        if _save_timer is not None: _save_timer.cancel(); _save_timer = None
+        _dirty = _state_dirty = False
+        _loaded = False
+        load_app_config()
+
+
+def _save(write_config: bool, write_state: bool) -> bool:
+    """Writes the JSON config and/or the runtime state file."""
+    global _dirty, _state_dirty, _save_timer, _loaded_stat
+    with _save_lock:
+        # Une sauvegarde explicite rend inutile toute sauvegarde différée en attente
+        if _save_timer is not None: _save_timer.cancel(); _save_timer = None
+        try:
+            if write_config:
+                config_path = _get_config_path()
+                logger.debug("Saving configuration to: %s", config_path)
+                disk_config = _strip_state_keys(_current_config)
+                _write_atomic(config_path, _DEFAULT_CONFIG_BYTES if disk_config == _DEFAULT_DISK_CONFIG else _json_dumps(disk_config))
+                _dirty = False
+                st = os.stat(config_path); _loaded_stat = (st.st_mtime_ns, st.st_size)
+            # Le JSON écrit ne contient plus les clés d'état: le fichier d'état est réécrit avec lui,
+            # sinon des valeurs venant encore du JSON (ou d'un fichier d'état absent) seraient perdues
+            if write_state or write_config:
+                logger.debug("Saving runtime state to: %s", _STATE_PATH)
+                _write_atomic(_STATE_PATH, _state_dumps({f"{backend}.{key}": _flat_cache.get(f"{backend}.{key}") for backend, key in _STATE_KEYS}))
+                _state_dirty = False
+            logger.debug("Configuration saved successfully.")
+            return True
+        except Exception as e:
+            logger.exception("Failed to save configuration: %s", e)
+            return False
 
 def save_app_config():
-    """Saves the current application configuration to the JSON file."""
-    global _current_config
-    config_path = _get_config_path()
-    print(f"[Config] Saving configuration to: {config_path}")
-    try:
-        # Ensure the directory exists (should normally be project root)
-        os.makedirs(os.path.dirname(config_path), exist_ok=True)
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(_current_config, f, indent=4)
-        print("[Config] Configuration saved successfully.")
-        return True
-    except Exception as e:
-        print(f"ERROR: Failed to save config file '{config_path}': {e}")
-        traceback.print_exc()
-        return False
+    """Saves the current application configuration (JSON file + runtime state file)."""
+    return _save(write_config=True, write_state=True)
+
+def flush_app_config() -> bool:
+    """Writes pending (debounced) changes immediately. Does nothing if the config is unchanged."""
+    with _save_lock:
+        if not (_dirty or _state_dirty): return True
+        return _save(write_config=_dirty, write_state=_state_dirty)
+
+# Les modifications encore en attente sont écrites à la fermeture de l'application
+atexit.register(flush_app_config)
 
 # --- Getters ---
+# Lecture directe dans _flat_cache (une seule recherche de dictionnaire)
 
 def get_api_key() -> Optional[str]:
     """Gets the saved Gemini API key."""
     # Assure que load_app_config a été appelé au moins une fois
-    if not _current_config:
-        load_app_config()
-    # Utilise .get() pour éviter les KeyErrors si la structure est corrompue
-    return _current_config.get("llm_settings", {}).get("gemini", {}).get("api_key")
+    if not _loaded: load_app_config()
+    return _flat_cache.get("gemini.api_key")
 
 def get_last_used_gemini_model() -> Optional[str]:
     """Gets the last saved Gemini model name."""
-    if not _current_config: load_app_config()
-    return _current_config.get("llm_settings", {}).get("gemini", {}).get("last_model_used")
+    if not _loaded: load_app_config()
+    return _flat_cache.get("gemini.last_model_used")
 
 def get_last_used_lmstudio_ip() -> Optional[str]:
     """Gets the last saved LM Studio IP."""
-    if not _current_config: load_app_config()
-    return _current_config.get("llm_settings", {}).get("lmstudio", {}).get("last_ip_used")
+    if not _loaded: load_app_config()
+    return _flat_cache.get("lmstudio.last_ip_used")
 
 def get_last_used_lmstudio_port() -> Optional[int]:
-    """Gets the last saved LM Studio port."""
-    if not _current_config: load_app_config()
-    port = _current_config.get("llm_settings", {}).get("lmstudio", {}).get("last_port_used")
-    # Convertit en int si c'est une chaîne valide, sinon None
-    if isinstance(port, str) and port.isdigit():
-        return int(port)
-    elif isinstance(port, int):
-        return port
-    else:
-        return None
+    """Gets the last saved LM Studio port (already converted to int, or None)."""
+    if not _loaded: load_app_config()
+    return _flat_cache.get("lmstudio.last_port_used")
 
 # --- Setters ---
+# Les setters ignorent les valeurs inchangées et programment une sauvegarde différée.
 
 def set_api_key(api_key: Optional[str]):
-    """Sets the Gemini API key and saves the configuration."""
-    global _current_config
-    # Assure que la structure existe
-    if "llm_settings" not in _current_config: _current_config["llm_settings"] = {}
-    if "gemini" not in _current_config["llm_settings"]: _current_config["llm_settings"]["gemini"] = {}
-
+    """Sets the Gemini API key and schedules a save of the configuration."""
+    gemini_settings = _get_backend_settings("gemini")
+    if "api_key" in gemini_settings and gemini_settings["api_key"] == api_key: return
     # Met à jour la clé (même si elle est None)
-    _current_config["llm_settings"]["gemini"]["api_key"] = api_key
-    print(f"[Config] API Key updated in memory.")
-    save_app_config() # Sauvegarde immédiatement
+    gemini_settings["api_key"] = api_key
+    _flat_cache["gemini.api_key"] = api_key
+    logger.debug("API Key updated in memory.")
+    _schedule_save()
 
 def set_last_used_gemini_model(model_name: Optional[str]):
-    """Sets the last used Gemini model name and saves the configuration."""
-    global _current_config
-    if "llm_settings" not in _current_config: _current_config["llm_settings"] = {}
-    if "gemini" not in _current_config["llm_settings"]: _current_config["llm_settings"]["gemini"] = {}
-    _current_config["llm_settings"]["gemini"]["last_model_used"] = model_name
-    save_app_config()
+    """Sets the last used Gemini model name and schedules a save of the configuration."""
+    gemini_settings = _get_backend_settings("gemini")
+    if "last_model_used" in gemini_settings and gemini_settings["last_model_used"] == model_name: return
+    gemini_settings["last_model_used"] = model_name
+    _flat_cache["gemini.last_model_used"] = model_name
+    _schedule_save(state_only=True)
 
 def set_last_used_lmstudio_details(ip: Optional[str], port: Optional[Union[int, str]]):
-    """Sets the last used LM Studio details and saves the configuration."""
-    global _current_config
-    if "llm_settings" not in _current_config: _current_config["llm_settings"] = {}
-    if "lmstudio" not in _current_config["llm_settings"]: _current_config["llm_settings"]["lmstudio"] = {}
+    """Sets the last used LM Studio details and schedules a save of the configuration."""
+    lmstudio_settings = _get_backend_settings("lmstudio")
 
     # Assure que le port est stocké comme un int si possible
-    port_int = None
-    if isinstance(port, str) and port.isdigit(): port_int = int(port)
-    elif isinstance(port, int): port_int = port
+    port_int = _to_port(port)
 
-    _current_config["llm_settings"]["lmstudio"]["last_ip_used"] = ip
-    _current_config["llm_settings"]["lmstudio"]["last_port_used"] = port_int
-    save_app_config()
+    if lmstudio_settings.get("last_ip_used", ...) == ip and lmstudio_settings.get("last_port_used", ...) == port_int: return
+    lmstudio_settings["last_ip_used"] = ip
+    lmstudio_settings["last_port_used"] = port_int
+    _flat_cache["lmstudio.last_ip_used"] = ip
+    _flat_cache["lmstudio.last_port_used"] = port_int
+    _schedule_save(state_only=True)
 
 # --- Initial Load ---
 # Charge la configuration lorsque le module est importé pour la première fois
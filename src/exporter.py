@@ -4,8 +4,16 @@ import platform
 import subprocess
 import shutil
 import tempfile
-import traceback
-from typing import Callable, List
+import threading
+import logging
+import zipfile
+import functools
+import time
+import re
+import shlex
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
 
 # Importe les modules du projet
 try:
@@ -16,11 +24,328 @@ except ImportError:
     import project_manager
     import utils
 
+# Durée maximale d'un build PyInstaller (secondes)
+PYINSTALLER_TIMEOUT_SECONDS = 600
+
+# Extensions déjà compressées: stockées telles quelles dans le zip (recompresser ne gagne rien)
+_STORED_EXTENSIONS = {".pyd", ".so", ".zip", ".whl", ".pyz", ".png", ".jpg", ".jpeg", ".gif", ".gz", ".bz2", ".xz", ".7z"}
+# Fréquence des messages de progression pendant la création de l'archive
+_ZIP_PROGRESS_EVERY = 250
+
+# Nombre de threads pour la copie des fichiers du projet (I/O: plus de threads que de coeurs)
+_COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Modules de la stdlib jamais utilisés par les projets générés: exclus du bundle PyInstaller
+# sauf si le projet les importe lui-même (voir _pyinstaller_excludes). Pas tkinter: les projets générés
+# l'utilisent souvent, y compris indirectement (turtle, backends matplotlib...), ce qu'un scan des imports ne voit pas
+_PYINSTALLER_EXCLUDES = ("test", "pydoc_data", "lib2to3")
+
+# Scripts de démarrage de la distribution source: (template, nom dans l'archive, mode unix)
+_STARTUP_SCRIPTS = (("run_windows_template.bat", "run_windows.bat", 0o644),
+                    ("run_linux_template.sh", "run_linux.sh", 0o755)) # Script Linux exécutable
+# Fichiers générés de la distribution source: remplacent les fichiers du projet du même nom
+_GENERATED_SOURCE_FILES = ("requirements.txt",) + tuple(arcname for _, arcname, _ in _STARTUP_SCRIPTS)
+
+# robocopy pour copier un dossier entier sous Windows, None ailleurs ou si absent
+_FAST_COPYTREE = shutil.which("robocopy") if platform.system() == "Windows" else None
+
+logger = logging.getLogger(__name__)
+
 # Fonction helper pour les logs
 def _report_progress(message: str, callback: Callable[[str], None]):
     print(f"[Exporter] {message}")
     callback(message)
 
+def _log_exception():
+    """
+    À appeler dans un bloc except: trace complète seulement en mode debug (PYTHAUTOM_DEBUG),
+    le message d'erreur étant déjà rapporté via _report_progress. Sinon la pile n'est pas formatée.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Exception details:", exc_info=True)
+
+def _probe_pyinstaller_version(python_exe: str) -> Optional[str]:
+    """Vérifie rapidement (import dans le venv) si PyInstaller est installé. Retourne sa version, ou None."""
+    try:
+        probe = subprocess.run([python_exe, "-c", "import PyInstaller; print(PyInstaller.__version__)"],
+                               capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if probe.returncode != 0: return None
+    return probe.stdout.strip() or "unknown version"
+
+class _BatchedReporter:
+    """
+    Regroupe les messages de progression: le callback (signal Qt côté GUI) est appelé une fois par lot
+    ('\n'.join des lignes), au plus tard après `interval` secondes ou dès `max_batch` messages.
+    À utiliser comme context manager pour vider le dernier lot.
+    """
+    def __init__(self, callback: Callable[[str], None], interval: float = 0.05, max_batch: int = 64):
+        self._callback = callback
+        self._interval = interval
+        self._max_batch = max_batch
+        self._batch: List[str] = []
+        self._timer: threading.Timer = None
+        self._lock = threading.Lock()
+
+    def add(self, message: str):
+        with self._lock:
+            self._batch.append(message)
+            if len(self._batch) >= self._max_batch:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def extend(self, messages):
+        for message in messages: self.add(message)
+
+    def flush(self):
+        with self._lock: self._flush_locked()
+
+    def _flush_locked(self):
+        # Appelé verrou tenu: les lots sont transmis dans l'ordre, même depuis le thread du timer
+        if self._timer is not None: self._timer.cancel(); self._timer = None
+        if not self._batch: return
+        text = "\n".join(self._batch); self._batch = []
+        print(f"[Exporter] {text}")
+        self._callback(text)
+
+    def __enter__(self): return self
+    def __exit__(self, *exc_info): self.flush()
+
+def _fast_copytree(src: str, dst: str):
+    """
+    Copie le dossier src dans dst (dst peut déjà exister), sans utils.COPYTREE_IGNORE_PATTERNS.
+    Sous Windows avec robocopy (multithread, exclusions via /XD et /XF), beaucoup plus rapide que
+    shutil.copytree sur les arborescences de petits fichiers. Ailleurs, ou si robocopy échoue, utils.copy_tree.
+    """
+    if _FAST_COPYTREE:
+        os.makedirs(dst, exist_ok=True)
+        excluded_dirs = [pattern for pattern in utils.COPYTREE_IGNORE_PATTERNS if "*" not in pattern]
+        excluded_files = [pattern for pattern in utils.COPYTREE_IGNORE_PATTERNS if "*" in pattern]
+        command = [_FAST_COPYTREE, src, dst, "/E", "/MT:16", "/NFL", "/NDL", "/NJH", "/NJS", "/NP", "/XD", *excluded_dirs, "/XF", *excluded_files]
+        try:
+            # Codes robocopy 0-7: succès (avec ou sans fichiers copiés)
+            if subprocess.run(command, capture_output=True).returncode < 8: return
+        except OSError:
+            pass
+    utils.copy_tree(src, dst)
+
+def _copy_one(rel_path: str, item_type: str, src_root: str, dst_root: str) -> str:
+    """Copie un fichier ou un dossier du projet vers dst_root. Retourne le message de progression."""
+    source_path_abs = os.path.join(src_root, rel_path)
+    destination_path_abs = os.path.join(dst_root, rel_path)
+    try:
+        if not os.path.exists(source_path_abs):
+            return f"  Warning: Source not found for copy, skipping: {source_path_abs}"
+        if item_type == 'file':
+            utils.fast_copy2(source_path_abs, destination_path_abs)
+            return f"  Copied file: '{rel_path}'"
+        _fast_copytree(source_path_abs, destination_path_abs)
+        return f"  Copied folder: '{rel_path}'"
+    except Exception as copy_err:
+        return f"  ERROR copying item '{rel_path}': {copy_err}"
+
+def _top_level_items(items) -> List[Tuple[str, str]]:
+    """
+    Filtre les éléments (rel_path, type) à copier/archiver: fichiers et dossiers, sans ceux situés
+    dans un dossier déjà pris en entier (évite les doublons).
+    """
+    copied_dirs = {rel_path for rel_path, item_type in items if item_type == 'dir'}
+    def _inside_copied_dir(rel_path: str) -> bool:
+        parent = os.path.dirname(rel_path)
+        while parent:
+            if parent in copied_dirs: return True
+            parent = os.path.dirname(parent)
+        return False
+    return [(rel_path, item_type) for rel_path, item_type in items if item_type in ('file', 'dir') and not _inside_copied_dir(rel_path)]
+
+def _copy_project_items(items: List[Tuple[str, str]], src_root: str, dst_root: str, progress_callback: Callable[[str], None]):
+    """
+    Copie en parallèle (ThreadPoolExecutor) les éléments de _plan_copies.
+    Les éléments situés dans un dossier déjà copié en entier sont ignorés (évite les copies doubles,
+    et deux threads qui écriraient le même fichier). La progression est rapportée depuis le thread appelant.
+    """
+    to_copy = _top_level_items(items)
+    if not to_copy: return
+    # Dossiers parents des fichiers créés une seule fois ici, plutôt qu'un makedirs par fichier dans les threads
+    dirs_needed = {os.path.dirname(os.path.join(dst_root, rel_path)) for rel_path, item_type in to_copy if item_type == 'file'}
+    for dir_path in sorted(dirs_needed):
+        os.makedirs(dir_path, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=_COPY_WORKERS) as executor, _BatchedReporter(progress_callback) as reporter:
+        futures = [executor.submit(_copy_one, rel_path, item_type, src_root, dst_root) for rel_path, item_type in to_copy]
+        for future in as_completed(futures):
+            reporter.add(future.result())
+
+def _plan_copies(project_path: str) -> List[Tuple[str, str]]:
+    """
+    Éléments à exporter: entrées de premier niveau du projet (rel_path, 'file' | 'dir'), hors EXCLUDE_PATTERNS_FOR_LISTING.
+    Les dossiers étant copiés/archivés en entier, inutile de descendre dans l'arborescence.
+    Un seul os.scandir: le type vient du DirEntry, sans stat supplémentaire. Contrairement à get_project_contents
+    (fait pour l'affichage, limité à 10 fichiers par dossier), aucun fichier n'est omis.
+    """
+    items = []
+    with os.scandir(project_path) as it:
+        for entry in sorted(it, key=lambda entry: entry.name):
+            if any(fnmatch.fnmatch(entry.name, pattern) for pattern in project_manager.EXCLUDE_PATTERNS_FOR_LISTING): continue
+            if entry.is_dir(follow_symlinks=False):
+                items.append((entry.name, 'dir'))
+            elif entry.is_file():
+                items.append((entry.name, 'file'))
+    return items
+
+@functools.lru_cache(maxsize=16)
+def _cached_contents(project_name: str, project_mtime_ns: int) -> Tuple[Tuple[str, str], ...]:
+    """
+    Mémorise _plan_copies par (projet, mtime du dossier projet).
+    Suffisant pour l'export: seules les entrées de premier niveau comptent,
+    et tout ajout/suppression à la racine change le mtime du dossier.
+    """
+    return tuple(_plan_copies(project_manager.get_project_path(project_name)))
+
+def _remove_temp_dir(path: str, label: str, progress_callback: Callable[[str], None]):
+    """
+    Supprime un dossier temporaire sans sonde os.path.exists préalable.
+    shutil.rmtree parcourt déjà l'arborescence avec os.scandir (DirEntry.is_dir, sans stat par fichier).
+    """
+    if not path: return
+    print(f"[Exporter] Cleaning up temp {label} directory: {path}")
+    try:
+        shutil.rmtree(path)
+    except FileNotFoundError:
+        pass
+    except OSError as rm_err:
+        print(f"[Exporter] Warning: Error removing {label} dir {path}: {rm_err}")
+        _report_progress(f"Warning: Error cleaning up temp {label} dir: {rm_err}", callback=progress_callback)
+
+def _pyinstaller_excludes(project_path: str) -> List[str]:
+    """
+    Modules de _PYINSTALLER_EXCLUDES qu'aucun fichier .py du projet n'importe directement.
+    Simple recherche d'instructions import (sans parser les fichiers), les dossiers exclus du listing sont ignorés.
+    """
+    import_pattern = re.compile(rb"^[ \t]*(?:import|from)[ \t]+(" + "|".join(_PYINSTALLER_EXCLUDES).encode() + rb")\b", re.MULTILINE)
+    imported = set()
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, pattern) for pattern in project_manager.EXCLUDE_PATTERNS_FOR_LISTING)]
+        for file_name in files:
+            if not file_name.endswith(".py"): continue
+            try:
+                with open(os.path.join(root, file_name), "rb") as f:
+                    imported.update(match.decode() for match in import_pattern.findall(f.read()))
+            except OSError:
+                continue
+    return [module for module in _PYINSTALLER_EXCLUDES if module not in imported]
+
+def _pyinstaller_env(project_name: str) -> dict:
+    """
+    Environnement de PyInstaller avec PYINSTALLER_CONFIG_DIR propre au projet, sous projets/.export_tmp:
+    le cache (bootloaders, binaires déjà traités) est conservé entre les exports du projet, sans être
+    partagé avec d'autres builds. Environnement inchangé si le dossier ne peut pas être créé.
+    """
+    env = os.environ.copy()
+    cache_dir = os.path.join(project_manager.get_absolute_projects_dir(), project_manager.EXPORT_STAGING_DIR,
+                             project_manager.PYINSTALLER_CACHE_DIR, project_name)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        env["PYINSTALLER_CONFIG_DIR"] = cache_dir
+    except OSError as e:
+        print(f"[Exporter] Warning: Could not create PyInstaller cache dir '{cache_dir}': {e}")
+    return env
+
+def _make_temp_dir(prefix: str) -> str:
+    """
+    Crée un dossier temporaire sous projets/.export_tmp (même système de fichiers que les projets,
+    au lieu d'un /tmp souvent en tmpfs ou sur un autre volume). Dossier temp du système en secours.
+    """
+    staging_root = os.path.join(project_manager.get_absolute_projects_dir(), project_manager.EXPORT_STAGING_DIR)
+    try:
+        os.makedirs(staging_root, exist_ok=True)
+        return tempfile.mkdtemp(prefix=prefix, dir=staging_root)
+    except OSError:
+        return tempfile.mkdtemp(prefix=prefix)
+
+def _make_zip(sources: List[Tuple[str, str]], output_zip_path: str, progress_callback: Callable[[str], None],
+              extra_entries: Optional[Callable[[], List[Tuple[str, bytes, int]]]] = None,
+              extra_names: Tuple[str, ...] = (), ignore_patterns: Tuple[str, ...] = ()) -> int:
+    """
+    Crée l'archive ZIP à partir de sources: liste de (chemin absolu, nom dans l'archive), fichier ou dossier
+    (parcouru récursivement avec os.scandir). Un même nom n'est archivé qu'une fois (la première source gagne).
+    extra_entries, appelé après les sources, renvoie des fichiers générés (nom, contenu, mode unix) écrits tels quels;
+    extra_names liste leurs noms: les fichiers des sources du même nom sont ignorés (le fichier généré l'emporte).
+    Les fichiers et dossiers dont le nom correspond à un motif de ignore_patterns (fnmatch) ne sont pas archivés.
+    Compression DEFLATE niveau 1, les fichiers déjà compressés sont stockés sans recompression.
+    Retourne le nombre de fichiers archivés.
+    output_zip_path est utilisé tel quel (pas d'ajout de '.zip'), son dossier est créé si besoin.
+    L'archive est écrite dans un fichier temporaire à côté de output_zip_path puis renommée (os.replace):
+    pas d'archive partielle en cas d'erreur.
+    """
+    # Chemin absolu: un simple nom de fichier (dirname vide) désigne le dossier courant
+    output_dir = os.path.dirname(os.path.abspath(output_zip_path))
+    os.makedirs(output_dir, exist_ok=True)
+    fd, tmp_zip_path = tempfile.mkstemp(suffix=".zip.tmp", dir=output_dir)
+    os.close(fd)
+    try:
+        file_count = _write_zip(sources, tmp_zip_path, progress_callback, extra_entries, extra_names, ignore_patterns)
+        os.replace(tmp_zip_path, output_zip_path)
+    except BaseException:
+        try: os.remove(tmp_zip_path)
+        except OSError: pass
+        raise
+    return file_count
+
+def _write_zip(sources: List[Tuple[str, str]], output_zip_path: str, progress_callback: Callable[[str], None],
+               extra_entries: Optional[Callable[[], List[Tuple[str, bytes, int]]]] = None,
+               extra_names: Tuple[str, ...] = (), ignore_patterns: Tuple[str, ...] = ()) -> int:
+    """Écrit l'archive de _make_zip dans output_zip_path. Retourne le nombre de fichiers archivés."""
+    file_count = 0
+    written_names = set() # Noms déjà écrits: un même nom n'est archivé qu'une fois
+    def _ignored(name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in ignore_patterns)
+    with zipfile.ZipFile(output_zip_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1, allowZip64=True) as zf:
+        def _add_file(path: str, arcname: str):
+            nonlocal file_count
+            if arcname in written_names or arcname in extra_names: return
+            written_names.add(arcname)
+            ext = os.path.splitext(arcname)[1].lower()
+            compress_type = zipfile.ZIP_STORED if ext in _STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            zf.write(path, arcname, compress_type=compress_type)
+            file_count += 1
+            if file_count % _ZIP_PROGRESS_EVERY == 0:
+                _report_progress(f"  Archived {file_count} files...", callback=progress_callback)
+
+        for source_path, source_arc in sources:
+            source_arc = source_arc.replace(os.sep, "/").strip("/")
+            if not os.path.isdir(source_path):
+                _add_file(source_path, source_arc)
+                continue
+            stack = [(source_path, source_arc)]
+            while stack:
+                dir_path, arc_dir = stack.pop()
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+                if not entries and arc_dir and arc_dir + "/" not in written_names:
+                    zf.write(dir_path, arc_dir) # Conserve les dossiers vides
+                    written_names.add(arc_dir + "/")
+                subdirs = []
+                for entry in entries:
+                    if _ignored(entry.name): continue
+                    arcname = f"{arc_dir}/{entry.name}" if arc_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.path, arcname))
+                    else:
+                        _add_file(entry.path, arcname)
+                stack.extend(reversed(subdirs)) # Ordre alphabétique conservé
+
+        for arcname, data, mode in (extra_entries() if extra_entries else []):
+            if arcname in written_names: continue # Nom absent de extra_names et déjà pris par un fichier du projet
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = (0o100000 | mode) << 16 # Fichier régulier + permissions unix
+            zf.writestr(info, data)
+            file_count += 1
+    return file_count
 
 def create_executable_bundle(project_name: str, output_zip_path: str, progress_callback: Callable[[str], None]) -> bool:
     """
@@ -51,66 +376,95 @@ def create_executable_bundle(project_name: str, output_zip_path: str, progress_c
             _report_progress("Failed to ensure virtual environment.", callback=progress_callback)
             return False
 
-        # 3. Installer PyInstaller
-        _report_progress("Installing PyInstaller in project venv...", callback=progress_callback)
-        install_ok = utils.install_project_dependencies(project_path, ["pyinstaller"], progress_callback=progress_callback)
-        if not install_ok:
-            _report_progress("Failed to install PyInstaller.", callback=progress_callback)
-            return False
-        _report_progress("PyInstaller installed successfully.", callback=progress_callback)
-
-        # 4. Obtenir Python Exe
+        # 3. Obtenir Python Exe
         _report_progress("Getting Python executable from venv...", callback=progress_callback)
         python_exe = utils.get_project_python_executable(project_path)
         if not python_exe or not os.path.exists(python_exe):
             _report_progress(f"Could not find Python executable in venv (checked: {python_exe}).", callback=progress_callback)
             return False
 
+        # 4. Installer PyInstaller (seulement s'il n'est pas déjà importable dans le venv)
+        pyinstaller_version = _probe_pyinstaller_version(python_exe)
+        if pyinstaller_version:
+            _report_progress(f"PyInstaller {pyinstaller_version} already installed, skipping install step.", callback=progress_callback)
+        else:
+            _report_progress("Installing PyInstaller in project venv...", callback=progress_callback)
+            install_ok = utils.install_project_dependencies(project_path, ["pyinstaller"], progress_callback=progress_callback)
+            if not install_ok:
+                _report_progress("Failed to install PyInstaller.", callback=progress_callback)
+                return False
+            _report_progress("PyInstaller installed successfully.", callback=progress_callback)
+
         # 5. Créer Dirs Temp
-        build_dir = tempfile.mkdtemp(prefix=f"pythautom_{project_name}_build_")
-        dist_dir = tempfile.mkdtemp(prefix=f"pythautom_{project_name}_dist_")
+        build_dir = _make_temp_dir(f"pythautom_{project_name}_build_")
+        dist_dir = _make_temp_dir(f"pythautom_{project_name}_dist_")
         _report_progress(f"Using temp build dir: {build_dir}", callback=progress_callback)
         _report_progress(f"Using temp dist dir: {dist_dir}", callback=progress_callback)
 
         # 6. Définir les options PyInstaller (SANS --add-data initialement)
+        # --noupx: pas de compression UPX (lente, binaire par binaire); le .spec va dans build_dir, pas dans le projet
+        excluded_modules = _pyinstaller_excludes(project_path)
+        if excluded_modules: _report_progress(f"Excluding unused modules from the bundle: {', '.join(excluded_modules)}", callback=progress_callback)
         pyinstaller_options = [
-            "--noconfirm",
-            "--clean",
+            "--noconfirm", # Pas de --clean: workpath est déjà un dossier neuf, et --clean viderait le cache de _pyinstaller_env
             "--windowed",
             "--onedir",
+            "--noupx",
             f"--name={project_name}",
             "--distpath", dist_dir,
             "--workpath", build_dir,
-            main_script_name
+            "--specpath", build_dir,
+            # Sortie réduite aux avertissements (des milliers de lignes INFO sinon), complète en mode debug
+            "--log-level", "DEBUG" if logger.isEnabledFor(logging.DEBUG) else "WARN",
         ]
+        for module in excluded_modules:
+            pyinstaller_options += ["--exclude-module", module]
+        pyinstaller_options.append(main_script_name)
         command = [python_exe, "-m", "PyInstaller"] + pyinstaller_options
 
         # 7. Exécuter PyInstaller
         _report_progress("Running PyInstaller... (This can take some time)", callback=progress_callback)
-        command_str_log = ' '.join(map(repr, command))
-        _report_progress(f"Executing: {command_str_log}", callback=progress_callback)
-        _report_progress(f"     in CWD: {repr(project_path)}", callback=progress_callback)
-
-        pyinstaller_process = subprocess.run(
+        if logger.isEnabledFor(logging.DEBUG): # Ligne de commande complète seulement en mode debug
+            _report_progress(f"Executing: {shlex.join(command)}", callback=progress_callback)
+            _report_progress(f"     in CWD: {repr(project_path)}", callback=progress_callback)
+
+        # Sortie lue ligne par ligne (stderr fusionné dans stdout): progression en temps réel,
+        # sans garder toute la sortie en mémoire
+        # Pas de shell=True: la commande est passée en liste. Le context manager ferme le pipe et attend le processus.
+        with subprocess.Popen(
             command,
             cwd=project_path,
-            capture_output=True,
+            env=_pyinstaller_env(project_name),
+            close_fds=True, # Pas de preexec_fn/pass_fds: lancement rapide par vfork (GIL relâché, Python 3.11+)
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
             encoding='utf-8',
             errors='replace',
-            timeout=600
-        )
-
-        # Log sortie PyInstaller (inchangé)
-        # ... (code de log identique à la version précédente) ...
-        if pyinstaller_process.stdout:
-             _report_progress("--- PyInstaller STDOUT ---", callback=progress_callback)
-             for line in pyinstaller_process.stdout.splitlines(): _report_progress(line, callback=progress_callback)
-             _report_progress("--- End PyInstaller STDOUT ---", callback=progress_callback)
-        if pyinstaller_process.stderr:
-             _report_progress("--- PyInstaller STDERR ---", callback=progress_callback)
-             for line in pyinstaller_process.stderr.splitlines(): _report_progress(line, callback=progress_callback)
-             _report_progress("--- End PyInstaller STDERR ---", callback=progress_callback)
+            bufsize=1
+        ) as pyinstaller_process:
+            # Le timeout est appliqué par un timer qui tue le processus
+            timed_out = threading.Event()
+            def _kill_on_timeout():
+                timed_out.set()
+                pyinstaller_process.kill()
+            timeout_timer = threading.Timer(PYINSTALLER_TIMEOUT_SECONDS, _kill_on_timeout)
+            timeout_timer.daemon = True
+            timeout_timer.start()
+            try:
+                _report_progress("--- PyInstaller Output ---", callback=progress_callback)
+                with _BatchedReporter(progress_callback) as reporter:
+                    reporter.extend(line.rstrip() for line in pyinstaller_process.stdout)
+                _report_progress("--- End PyInstaller Output ---", callback=progress_callback)
+                pyinstaller_process.wait()
+            except BaseException:
+                # Erreur pendant la lecture (callback, interruption...): ne pas laisser PyInstaller tourner seul
+                pyinstaller_process.kill()
+                raise
+            finally:
+                timeout_timer.cancel()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(command, PYINSTALLER_TIMEOUT_SECONDS)
 
         # 8. Vérifier le résultat
         if pyinstaller_process.returncode != 0:
@@ -129,60 +483,35 @@ def create_executable_bundle(project_name: str, output_zip_path: str, progress_c
              return False
 
         try:
-            contents_to_copy = project_manager.get_project_contents(project_name)
+            contents_to_copy = _cached_contents(project_name, os.stat(project_path).st_mtime_ns)
 
             if not contents_to_copy:
                 _report_progress("  No additional data files/folders found to copy.", callback=progress_callback)
             else:
-                for rel_path, item_type in contents_to_copy:
-                    if item_type == 'info': continue
-
-                    source_path_abs = os.path.join(project_path, rel_path)
-                    destination_path_abs = os.path.join(app_folder_path, rel_path)
-
-                    try:
-                        if os.path.exists(source_path_abs):
-                            if item_type == 'file':
-                                os.makedirs(os.path.dirname(destination_path_abs), exist_ok=True)
-                                shutil.copy2(source_path_abs, destination_path_abs)
-                                _report_progress(f"  Copied file: '{rel_path}'", callback=progress_callback)
-                            elif item_type == 'dir':
-                                shutil.copytree(source_path_abs, destination_path_abs, dirs_exist_ok=True)
-                                _report_progress(f"  Copied folder: '{rel_path}'", callback=progress_callback)
-                        else:
-                             _report_progress(f"  Warning: Source not found for manual copy, skipping: {source_path_abs}", callback=progress_callback)
-                    except Exception as copy_err:
-                         _report_progress(f"  ERROR copying item '{rel_path}': {copy_err}", callback=progress_callback)
+                _copy_project_items(contents_to_copy, project_path, app_folder_path, progress_callback)
 
         except Exception as list_err:
              _report_progress(f"Error listing project contents for manual copy: {list_err}", callback=progress_callback)
-             traceback.print_exc()
+             _log_exception()
         _report_progress("Manual data copying finished.", callback=progress_callback)
         # --- FIN Copie Manuelle ---
 
         # 9. Zipper le dossier de sortie
         _report_progress(f"Creating archive '{os.path.basename(output_zip_path)}'...", callback=progress_callback)
         try:
-            os.makedirs(os.path.dirname(output_zip_path), exist_ok=True)
-            zip_base_name = output_zip_path.removesuffix('.zip')
-            shutil.make_archive(
-                base_name=zip_base_name,
-                format='zip',
-                root_dir=dist_dir,
-                base_dir=project_name
-            )
-            _report_progress("Archive created successfully.", callback=progress_callback)
+            archived_count = _make_zip([(os.path.join(dist_dir, project_name), project_name)], output_zip_path, progress_callback)
+            _report_progress(f"Archive created successfully ({archived_count} files).", callback=progress_callback)
             success = True
         except Exception as zip_e:
             _report_progress(f"Error creating zip archive: {zip_e}", callback=progress_callback)
-            traceback.print_exc()
+            _log_exception()
             return False
 
         return success
 
     # ... (gestion TimeoutExpired, Exception, finally inchangés) ...
     except subprocess.TimeoutExpired:
-        error_msg = f"PyInstaller process timed out after 10 minutes."
+        error_msg = f"PyInstaller process timed out after {PYINSTALLER_TIMEOUT_SECONDS // 60} minutes."
         _report_progress(error_msg, callback=progress_callback)
         print(f"[Exporter] {error_msg}")
         return False
@@ -190,30 +519,19 @@ def create_executable_bundle(project_name: str, output_zip_path: str, progress_c
         error_msg = f"An unexpected error occurred during export: {e}"
         _report_progress(error_msg, callback=progress_callback)
         print(f"[Exporter] {error_msg}")
-        traceback.print_exc()
+        _log_exception()
         return False
 
     finally:
         # 10. Nettoyage
         try:
-            if build_dir and os.path.exists(build_dir):
-                print(f"[Exporter] Cleaning up temp build directory: {build_dir}")
-                try: shutil.rmtree(build_dir)
-                except OSError as rm_err:
-                    print(f"[Exporter] Warning: Error removing build dir {build_dir}: {rm_err}")
-                    _report_progress(f"Warning: Error cleaning up temp build dir: {rm_err}", callback=progress_callback)
-
-            if dist_dir and os.path.exists(dist_dir):
-                 print(f"[Exporter] Cleaning up temp dist directory: {dist_dir}")
-                 try: shutil.rmtree(dist_dir)
-                 except OSError as rm_err:
-                    print(f"[Exporter] Warning: Error removing dist dir {dist_dir}: {rm_err}")
-                    _report_progress(f"Warning: Error cleaning up temp dist dir: {rm_err}", callback=progress_callback)
+            _remove_temp_dir(build_dir, "build", progress_callback)
+            _remove_temp_dir(dist_dir, "dist", progress_callback)
         except Exception as cleanup_e:
              final_warning = f"Warning: Error during cleanup of temp dirs: {cleanup_e}"
              _report_progress(final_warning, callback=progress_callback)
              print(f"[Exporter] {final_warning}")
-             traceback.print_exc()
+             _log_exception()
 
 
 # --- NOUVELLE FONCTION D'EXPORT (Méthode 2) ---
@@ -221,9 +539,9 @@ def create_source_distribution(project_name: str, output_zip_path: str, progress
     """
     Crée une archive ZIP contenant le code source, un requirements.txt figé,
     et des scripts de démarrage. (Méthode 2)
+    Les fichiers sont écrits directement dans l'archive depuis le projet (pas de dossier de staging).
     """
     _report_progress(f"Starting source distribution export for project '{project_name}'...", callback=progress_callback)
-    staging_dir = None
     success = False
 
     try:
@@ -240,11 +558,7 @@ def create_source_distribution(project_name: str, output_zip_path: str, progress
             _report_progress(f"Error getting project paths: {e}", callback=progress_callback)
             return False
 
-        # 2. Créer un répertoire de staging temporaire
-        staging_dir = tempfile.mkdtemp(prefix=f"pythautom_{project_name}_srcdist_")
-        _report_progress(f"Using temp staging dir: {staging_dir}", callback=progress_callback)
-
-        # 3. Générer requirements.txt
+        # 2. Lancer la génération de requirements.txt
         _report_progress("Generating requirements.txt using 'uv pip freeze'...", callback=progress_callback)
         python_exe = utils.get_project_python_executable(project_path)
         if not python_exe or not os.path.exists(python_exe):
@@ -252,126 +566,72 @@ def create_source_distribution(project_name: str, output_zip_path: str, progress
              # On pourrait continuer sans requirements, mais c'est risqué
              return False
 
-        freeze_result = utils.run_uv_command(
+        # 'uv pip freeze' tourne en arrière-plan pendant l'archivage des fichiers (aucune dépendance entre les deux)
+        freeze_executor = ThreadPoolExecutor(max_workers=1)
+        freeze_future = freeze_executor.submit(
+            utils.run_uv_command,
             ["pip", "freeze"],
             cwd=project_path, # Exécuter depuis le projet pourrait être mieux
             capture=True,
             progress_callback=progress_callback # Log la sortie de uv freeze
         )
+        freeze_executor.shutdown(wait=False)
 
-        if freeze_result is None or freeze_result.returncode != 0:
-            _report_progress("Error: Failed to run 'uv pip freeze'. Cannot generate requirements.txt.", callback=progress_callback)
-            # On pourrait choisir de continuer sans requirements.txt mais l'intérêt est limité
-            return False
-
-        requirements_content = freeze_result.stdout
-        if not requirements_content.strip():
-             _report_progress("Warning: 'uv pip freeze' produced an empty requirements list. Continuing...", callback=progress_callback)
-             # Créer un fichier vide pour éviter les erreurs plus tard
-             requirements_content = "# No dependencies found in the environment.\n"
-
-
-        req_file_path = os.path.join(staging_dir, "requirements.txt")
-        try:
-            with open(req_file_path, "w", encoding="utf-8") as f:
-                f.write(requirements_content)
-            _report_progress("requirements.txt generated successfully.", callback=progress_callback)
-        except Exception as e:
-             _report_progress(f"Error writing requirements.txt: {e}", callback=progress_callback)
-             return False
-
-        # 4. Copier les fichiers du projet dans le staging dir
-        _report_progress("Copying project files to staging area...", callback=progress_callback)
+        # 3. Lister les fichiers du projet à archiver
+        _report_progress("Collecting project files...", callback=progress_callback)
         try:
-            # Copier le script principal explicitement
-            dest_main_script = os.path.join(staging_dir, project_manager.DEFAULT_MAIN_SCRIPT)
-            shutil.copy2(main_script_path, dest_main_script)
-            _report_progress(f"  Copied main script: '{project_manager.DEFAULT_MAIN_SCRIPT}'", callback=progress_callback)
-
-            # Copier les autres contenus (fichiers de données, dossiers)
-            contents_to_copy = project_manager.get_project_contents(project_name)
+            # Le script principal explicitement, puis les autres contenus (fichiers de données, dossiers)
+            sources = [(main_script_path, project_manager.DEFAULT_MAIN_SCRIPT)]
+            contents_to_copy = _cached_contents(project_name, os.stat(project_path).st_mtime_ns)
             if not contents_to_copy:
                  _report_progress("  No additional project files/folders found to copy.", callback=progress_callback)
-            else:
-                for rel_path, item_type in contents_to_copy:
-                    if item_type == 'info': continue
-
-                    source_path_abs = os.path.join(project_path, rel_path)
-                    destination_path_abs = os.path.join(staging_dir, rel_path)
-
-                    try:
-                        if os.path.exists(source_path_abs):
-                            if item_type == 'file':
-                                os.makedirs(os.path.dirname(destination_path_abs), exist_ok=True)
-                                shutil.copy2(source_path_abs, destination_path_abs)
-                                _report_progress(f"  Copied file: '{rel_path}'", callback=progress_callback)
-                            elif item_type == 'dir':
-                                shutil.copytree(source_path_abs, destination_path_abs, dirs_exist_ok=True)
-                                _report_progress(f"  Copied folder: '{rel_path}'", callback=progress_callback)
-                        else:
-                             _report_progress(f"  Warning: Source not found for copy, skipping: {source_path_abs}", callback=progress_callback)
-                    except Exception as copy_err:
-                         _report_progress(f"  ERROR copying item '{rel_path}': {copy_err}", callback=progress_callback)
-                         # Optionnel: Rendre l'erreur fatale ? return False
-
+            sources.extend((os.path.join(project_path, rel_path), rel_path) for rel_path, _ in _top_level_items(contents_to_copy))
         except Exception as list_err:
             _report_progress(f"Error preparing file list for copying: {list_err}", callback=progress_callback)
-            traceback.print_exc()
+            _log_exception()
             return False
-        _report_progress("Project files copied.", callback=progress_callback)
 
+        # 4. Fichiers générés: requirements.txt et scripts de démarrage, ajoutés après les fichiers du projet
+        def _generated_entries() -> List[Tuple[str, bytes, int]]:
+            freeze_result = freeze_future.result()
+            if freeze_result is None or freeze_result.returncode != 0:
+                # On pourrait choisir de continuer sans requirements.txt mais l'intérêt est limité
+                raise RuntimeError("Failed to run 'uv pip freeze'. Cannot generate requirements.txt.")
+
+            requirements_content = freeze_result.stdout
+            if not requirements_content.strip():
+                 _report_progress("Warning: 'uv pip freeze' produced an empty requirements list. Continuing...", callback=progress_callback)
+                 # Créer un fichier vide pour éviter les erreurs plus tard
+                 requirements_content = "# No dependencies found in the environment.\n"
+            entries = [("requirements.txt", requirements_content.encode("utf-8"), 0o644)]
+            _report_progress("requirements.txt generated successfully.", callback=progress_callback)
 
-        # 5. Copier les scripts de démarrage template dans le staging dir
-        _report_progress("Copying startup scripts...", callback=progress_callback)
-        try:
+            # Scripts de démarrage template
+            _report_progress("Adding startup scripts...", callback=progress_callback)
             # Détermine le chemin du dossier 'src' basé sur l'emplacement de ce fichier
-            src_dir = os.path.dirname(os.path.abspath(__file__))
-            template_dir = os.path.join(src_dir, "templates")
-
-            win_template = os.path.join(template_dir, "run_windows_template.bat")
-            linux_template = os.path.join(template_dir, "run_linux_template.sh")
-
-            if os.path.exists(win_template):
-                 shutil.copy2(win_template, os.path.join(staging_dir, "run_windows.bat"))
-                 _report_progress("  Copied run_windows.bat", callback=progress_callback)
-            else:
-                 _report_progress("  Warning: Windows startup script template not found.", callback=progress_callback)
-
-            if os.path.exists(linux_template):
-                 shutil.copy2(linux_template, os.path.join(staging_dir, "run_linux.sh"))
-                 # Rendre le script Linux exécutable
-                 try:
-                     os.chmod(os.path.join(staging_dir, "run_linux.sh"), 0o755)
-                 except Exception as chmod_err:
-                      _report_progress(f"  Warning: Could not set execute permission on run_linux.sh: {chmod_err}", callback=progress_callback)
-
-                 _report_progress("  Copied run_linux.sh", callback=progress_callback)
-            else:
-                 _report_progress("  Warning: Linux startup script template not found.", callback=progress_callback)
-
-        except Exception as script_copy_err:
-             _report_progress(f"Error copying startup scripts: {script_copy_err}", callback=progress_callback)
-             # Ne pas forcément échouer, mais prévenir
-             traceback.print_exc()
-
-
-        # 6. Créer l'archive ZIP à partir du contenu du staging_dir
+            template_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+            for template_name, arcname, mode in _STARTUP_SCRIPTS:
+                try:
+                    with open(os.path.join(template_dir, template_name), "rb") as f:
+                        entries.append((arcname, f.read(), mode))
+                    _report_progress(f"  Added {arcname}", callback=progress_callback)
+                except FileNotFoundError:
+                    _report_progress(f"  Warning: Startup script template '{template_name}' not found.", callback=progress_callback)
+                except OSError as script_err:
+                    # Ne pas forcément échouer, mais prévenir
+                    _report_progress(f"  Warning: Could not read startup script template '{template_name}': {script_err}", callback=progress_callback)
+            return entries
+
+        # 5. Créer l'archive ZIP directement depuis le projet
         _report_progress(f"Creating source distribution archive '{os.path.basename(output_zip_path)}'...", callback=progress_callback)
         try:
-            os.makedirs(os.path.dirname(output_zip_path), exist_ok=True)
-            zip_base_name = output_zip_path.removesuffix('.zip')
-            # Important: root_dir=staging_dir, base_dir='.' pour zipper le *contenu*
-            shutil.make_archive(
-                base_name=zip_base_name,
-                format='zip',
-                root_dir=staging_dir,
-                base_dir='.' # Met tout à la racine du zip
-            )
+            _make_zip(sources, output_zip_path, progress_callback, extra_entries=_generated_entries,
+                      extra_names=_GENERATED_SOURCE_FILES, ignore_patterns=utils.COPYTREE_IGNORE_PATTERNS)
             _report_progress("Source distribution archive created successfully.", callback=progress_callback)
             success = True
         except Exception as zip_e:
             _report_progress(f"Error creating source distribution zip archive: {zip_e}", callback=progress_callback)
-            traceback.print_exc()
+            _log_exception()
             return False
 
         return success
@@ -380,21 +640,6 @@ def create_source_distribution(project_name: str, output_zip_path: str, progress
         error_msg = f"An unexpected error occurred during source distribution export: {e}"
         _report_progress(error_msg, callback=progress_callback)
         print(f"[Exporter] {error_msg}")
-        traceback.print_exc()
+        _log_exception()
         return False
-
-    finally:
-        # 7. Nettoyage du staging_dir
-        try:
-            if staging_dir and os.path.exists(staging_dir):
-                print(f"[Exporter] Cleaning up temp staging directory: {staging_dir}")
-                try: shutil.rmtree(staging_dir)
-                except OSError as rm_err:
-                    print(f"[Exporter] Warning: Error removing staging dir {staging_dir}: {rm_err}")
-                    _report_progress(f"Warning: Error cleaning up temp staging dir: {rm_err}", callback=progress_callback)
-        except Exception as cleanup_e:
-             final_warning = f"Warning: Error during cleanup of temp staging dir: {cleanup_e}"
-             _report_progress(final_warning, callback=progress_callback)
-             print(f"[Exporter] {final_warning}")
-             traceback.print_exc()
 # --- FIN NOUVELLE FONCTION ---
\ No newline at end of file
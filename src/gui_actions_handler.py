@@ -9,6 +9,9 @@ import re
 import traceback
 import ast
 import shutil
+import time
+import logging
+import contextlib
 from typing import List, Any, Optional, Dict, Callable, Type, Tuple
 import typing
 
@@ -17,20 +20,20 @@ from PyQt6.QtWidgets import (
     QApplication, QListWidgetItem, QFileDialog, QCheckBox, QSpinBox,
     QWidget
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QThread, QObject, QTimer, QDir, QModelIndex
-from PyQt6.QtGui import QTextCursor, QFont, QIntValidator
+from PyQt6.QtCore import Qt, pyqtSignal, QThread, QThreadPool, QRunnable, QObject, QTimer, QDir, QModelIndex, QRegularExpression
+from PyQt6.QtGui import QTextCursor, QFont, QIntValidator, QRegularExpressionValidator
 
 # Import des composants nécessaires depuis les autres modules
 from . import project_manager
 from . import utils
-from . import exporter
+# exporter (PyInstaller, zip...) est importé à la première exportation, pas au démarrage
 from . import config_manager # Gère la config persistante
 
 # Imports depuis llm_interaction
 from .llm_interaction import (
     BaseLLMClient, LMStudioClient, GeminiClient,
     DEFAULT_LM_STUDIO_IP, DEFAULT_LM_STUDIO_PORT, DEFAULT_GEMINI_MODEL,
-    AVAILABLE_GEMINI_MODELS, GOOGLE_GENAI_AVAILABLE
+    AVAILABLE_GEMINI_MODELS, GOOGLE_GENAI_AVAILABLE, parse_requirements_header
 )
 
 from .project_manager import DEFAULT_MAIN_SCRIPT
@@ -53,45 +56,162 @@ TASK_EXPORT_SOURCE = "export_source"
 TASK_IDENTIFY_DEPS_FROM_REQUEST = "identify_deps_from_request"
 TASK_GENERATE_CODE_STREAM = "generate_code_stream_with_deps"
 TASK_RESOLVE_IMPORT_PACKAGE = "resolve_import_package"
+TASK_DELETE_PROJECT = "delete_project"
+# Tâches d'E/S fichiers pures: exécutées sur un pool dédié, séparé de celui des scripts, LLM et exports
+# (la sauvegarde du code y passe aussi, mais hors des tâches: voir _SaveRunnable)
+IO_TASKS = frozenset({TASK_DELETE_PROJECT})
+IO_POOL_MAX_THREADS = 4
 
 LLM_BACKEND_LMSTUDIO = "LM Studio"
 LLM_BACKEND_GEMINI = "Google Gemini"
 
+logger = logging.getLogger(__name__)
+
+# Extraction du code des réponses LLM: blocs ``` (groupe 1 = 'python' si précisé, groupe 2 = contenu)
+_CODE_FENCE_RE = re.compile(r"```(python)?\s*([\s\S]+?)\s*```")
+_RAW_CODE_START_RE = re.compile(r"(?:import|from|def|class|#|\s)")
+# Analyse de la sortie d'erreur d'un script (ligne fautive, module manquant)
+_ERROR_LINE_RE = re.compile(r'File ".*?", line (\d+)')
+_MODULE_NOT_FOUND_RE = re.compile(r"ModuleNotFoundError: No module named '([^']*)'")
+_IMPORT_ERROR_RE = re.compile(r"ImportError:.*'([^']*)'")
+# Nom de projet accepté à la saisie par le dialogue de création (validateur du champ: aucun autre caractère ne peut être tapé)
+_PROJECT_NAME_INPUT_PATTERN = r'[a-zA-Z0-9_-]{0,64}'
+
 DEFAULT_MAX_CORRECTION_ATTEMPTS = config_manager.DEFAULT_CONFIG.get("ui_settings", {}).get("default_max_correction_attempts", 2)
 STREAM_UPDATE_INTERVAL_MS = 50
+# Fenêtre de regroupement des zones de log: les messages sont ajoutés (et la zone défilée) en un seul append par fenêtre
+LOG_FLUSH_INTERVAL_MS = 60
+# Fenêtre de regroupement des sauvegardes (la première est immédiate, une rafale de clics n'en produit qu'une de plus)
+SAVE_THROTTLE_MS = 500
+# Sortie confirmée pendant une tâche: délai laissé à la tâche annulée avant fermeture forcée, puis attente des pools à aboutToQuit
+SHUTDOWN_GRACE_MS = 3000
+SHUTDOWN_WAIT_MS = 5000
+# Fragments du stream regroupés dans le worker avant émission (un signal inter-thread par lot, pas par token)
+FRAGMENT_BATCH_CHARS = 8192
+# Fenêtre alignée sur celle du chat: au plus un signal inter-thread par insertion dans le chat
+FRAGMENT_BATCH_SECONDS = STREAM_UPDATE_INTERVAL_MS / 1000
+# Sauts de ligne tels que stockés dans un QTextDocument (<br> = U+2028, fin de paragraphe = U+2029)
+_CHAT_LINE_BREAKS = ('\n', '\u2028', '\u2029')
 MAX_STRUCTURE_INFO_LENGTH = 1500
 
 
+@contextlib.contextmanager
+def _suspend_updates(*widgets):
+    """Suspend le rafraîchissement des widgets pendant une modification en bloc (un seul repaint à la fin)."""
+    for widget in widgets: widget.setUpdatesEnabled(False)
+    try:
+        yield
+    finally:
+        for widget in widgets: widget.setUpdatesEnabled(True)
+
+def _message_box_accepted(box: QMessageBox) -> bool:
+    """Vrai si la boîte (ouverte avec open()) a été fermée par son bouton Yes."""
+    button = box.clickedButton()
+    return button is not None and box.standardButton(button) == QMessageBox.StandardButton.Yes
+
+def _show_message(parent: QWidget, icon: QMessageBox.Icon, title: str, text: str):
+    """Affiche un message avec open(): l'appelant continue sans boucle d'événements imbriquée (pas de réentrance)."""
+    box = QMessageBox(icon, title, text, QMessageBox.StandardButton.Ok, parent)
+    box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose); box.open()
+
+
+class _BufferedLogSink:
+    """
+    Tampon d'une zone de log main_window.<widget_name>: les messages sont regroupés et ajoutés en un seul append
+    (une mise en page, un défilement) au plus tard LOG_FLUSH_INTERVAL_MS après le premier message en attente.
+    Le widget est résolu au premier vidage (le handler est créé avant setup_ui).
+    """
+    def __init__(self, main_window: 'MainWindow', widget_name: str):
+        self._main_window = main_window; self._widget_name = widget_name; self._widget: Optional[QWidget] = None
+        self._lines: List[str] = []
+        self._timer = QTimer(); self._timer.setSingleShot(True); self._timer.setInterval(LOG_FLUSH_INTERVAL_MS); self._timer.timeout.connect(self.flush)
+
+    def write(self, message: str):
+        self._lines.append(message)
+        if not self._timer.isActive(): self._timer.start() # Pas de redémarrage: un flot continu est tout de même vidé
+
+    def flush(self):
+        """Ajoute immédiatement les messages en attente (avant une lecture du widget ou une opération synchrone)."""
+        self._timer.stop()
+        if not self._lines: return
+        if self._widget is None: self._widget = getattr(self._main_window, self._widget_name)
+        self._widget.append("\n".join(self._lines)); self._lines.clear()
+        scroll_bar = self._widget.verticalScrollBar(); scroll_bar.setValue(scroll_bar.maximum())
+
+    def discard(self):
+        """Abandonne les messages en attente (zone de log vidée)."""
+        self._timer.stop(); self._lines.clear()
+
+
 # ======================================================================
 # --- Worker Thread ---
 # ======================================================================
-class Worker(QObject):
-    finished = pyqtSignal()
+class WorkerSignals(QObject):
+    """
+    Signaux de toutes les tâches worker: un seul objet, créé et connecté une fois par le handler (thread GUI).
+    Les émissions depuis les threads du pool y sont mises en file.
+    """
+    finished = pyqtSignal(object) # Le Worker terminé
     log_message = pyqtSignal(str, str)
     chat_fragment_received = pyqtSignal(str)
+    console_line_received = pyqtSignal(str, str) # (flux 'stdout'/'stderr', ligne) pendant l'exécution d'un script
     result = pyqtSignal(str, object)
-
-    def __init__(self, task_type: str, task_callable: Callable, *args, **kwargs):
-        super().__init__()
+    save_finished = pyqtSignal(str, int, object) # (projet, révision du document sauvegardée, True/False/exception) d'un _SaveRunnable
+
+
+class Worker:
+    # Par type de tâche: callbacks injectés ('progress', 'lines', 'stream' ou None) et message de fin selon le résultat
+    _TASK_SPECS: Dict[str, Tuple[Optional[str], Callable[[Any], str]]] = {
+        TASK_INSTALL_DEPS: ('progress', lambda r: f"Dependency Install {'OK' if r else 'failed'}."),
+        TASK_IDENTIFY_DEPS_FROM_REQUEST: (None, lambda r: "Dependency identification (from request) finished."),
+        TASK_GENERATE_CODE_STREAM: ('stream', lambda r: "Code generation stream finished."),
+        TASK_RUN_SCRIPT: ('lines', lambda r: "Script execution finished."),
+        TASK_ATTEMPT_CONNECTION: (None, lambda r: f"LLM Connection attempt finished ({'Success' if r else 'Failed'})."),
+        TASK_EXPORT_PROJECT: ('progress', lambda r: f"Executable export process finished ({'Success' if r else 'Failed'})."),
+        TASK_EXPORT_SOURCE: ('progress', lambda r: f"Source distribution export finished ({'Success' if r else 'Failed'})."),
+        TASK_RESOLVE_IMPORT_PACKAGE: (None, lambda r: "Package name resolution finished."),
+        TASK_DELETE_PROJECT: (None, lambda r: f"Project deletion finished ({'Success' if r else 'Failed'})."),
+    }
+
+    def __init__(self, signals: WorkerSignals, task_type: str, task_callable: Callable, *args, **kwargs):
+        self.signals = signals
         self.task_type = task_type
         self.task_callable = task_callable
         self.args = args
         self.kwargs = kwargs
         self._is_cancelled = False # Drapeau d'annulation
+        # Lot de fragments en attente d'émission (TASK_GENERATE_CODE_STREAM)
+        self._fragment_buffer: List[str] = []
+        self._fragment_buffer_chars = 0
+        self._last_fragment_flush = time.monotonic()
 
     def cancel(self):
         """Demande l'annulation de la tâche."""
         self._is_cancelled = True
-        print(f"[Worker {id(self)}] Cancellation flag set for task '{self.task_type}'.")
+        logger.debug("[Worker %s] Cancellation flag set for task '%s'.", id(self), self.task_type)
 
     def _emit_log(self, message: str, source: str = 'status'):
         # Vérifie le drapeau avant d'émettre, sauf pour les messages d'annulation peut-être
         if not self._is_cancelled or "cancel" in message.lower():
-             self.log_message.emit(message, source)
+             self.signals.log_message.emit(message, source)
+
+    def _queue_fragment(self, fragment: str):
+        """Ajoute un fragment au lot; émet le lot dès FRAGMENT_BATCH_CHARS caractères ou FRAGMENT_BATCH_SECONDS écoulées."""
+        self._fragment_buffer.append(fragment)
+        self._fragment_buffer_chars += len(fragment)
+        if self._fragment_buffer_chars >= FRAGMENT_BATCH_CHARS or time.monotonic() - self._last_fragment_flush >= FRAGMENT_BATCH_SECONDS:
+            self._flush_fragments()
+
+    def _flush_fragments(self):
+        if self._fragment_buffer and not self._is_cancelled:
+            self.signals.chat_fragment_received.emit("".join(self._fragment_buffer))
+        self._fragment_buffer.clear()
+        self._fragment_buffer_chars = 0
+        self._last_fragment_flush = time.monotonic()
 
     def run(self):
         # ... (début run inchangé : log, reset _is_cancelled) ...
-        print(f"[Worker {id(self)}] STARTING task: '{self.task_type}', callable: {self.task_callable.__name__}")
+        logger.debug("[Worker %s] STARTING task: '%s', callable: %s", id(self), self.task_type, getattr(self.task_callable, '__name__', self.task_callable))
         self._emit_log(f"Starting: {self.task_type}...", 'status')
         self._is_cancelled = False
         task_result: Any = None
@@ -105,38 +225,38 @@ class Worker(QObject):
             console_logger = functools.partial(self._emit_log, source='console')
             status_logger = functools.partial(self._emit_log, source='status')
 
+            task_spec = self._TASK_SPECS.get(self.task_type)
+            if task_spec is None:
+                raise NotImplementedError(f"Unknown task type '{self.task_type}'.")
+            injected_callbacks, completion_message = task_spec
+
             # --- Injecte callbacks ---
-            if self.task_type in [TASK_INSTALL_DEPS, TASK_EXPORT_PROJECT, TASK_RUN_SCRIPT, TASK_EXPORT_SOURCE]:
+            if injected_callbacks in ('progress', 'lines'):
                 def progress_callback_wrapper(message: str):
                     if not self._is_cancelled: console_logger(message)
                 actual_kwargs['progress_callback'] = progress_callback_wrapper
-
-            if self.task_type == TASK_GENERATE_CODE_STREAM:
-                # Callback pour les fragments (inchangé)
+            if injected_callbacks == 'lines':
+                # Sortie du script transmise ligne par ligne (appelé depuis les threads de lecture des tubes)
+                def line_callback_wrapper(stream: str, line: str):
+                    if not self._is_cancelled: self.signals.console_line_received.emit(stream, line)
+                actual_kwargs['line_callback'] = line_callback_wrapper
+
+            elif injected_callbacks == 'stream':
+                # Callback pour les fragments: regroupés par lots avant émission vers le thread GUI
                 def fragment_emitter_wrapper(fragment: str):
-                    if not self._is_cancelled: self.chat_fragment_received.emit(fragment)
+                    if not self._is_cancelled: self._queue_fragment(fragment)
                 actual_kwargs['fragment_callback'] = fragment_emitter_wrapper
-
-                # <<< NOUVEAU: Ajoute le callback de vérification d'annulation >>>
+                # Callback de vérification d'annulation
                 actual_kwargs['cancellation_check'] = lambda: self._is_cancelled
-                # ----------------------------------------------------------------
 
             # --- Exécute la Tâche ---
             if not self._is_cancelled:
                 task_result = self.task_callable(*self.args, **actual_kwargs)
+                self._flush_fragments() # Avant le signal result: le chat reçoit tout le texte avant la fin de tâche
 
             # --- Définit Message de Complétion (si pas annulé) ---
             if not self._is_cancelled:
-                # ... (définition de msg inchangée) ...
-                if self.task_type == TASK_INSTALL_DEPS: msg = f"Dependency Install {'OK' if task_result else 'failed'}."
-                elif self.task_type == TASK_IDENTIFY_DEPS_FROM_REQUEST: msg = "Dependency identification (from request) finished."
-                elif self.task_type == TASK_GENERATE_CODE_STREAM: msg = "Code generation stream finished."
-                elif self.task_type == TASK_RUN_SCRIPT: msg = "Script execution finished."
-                elif self.task_type == TASK_ATTEMPT_CONNECTION: msg = f"LLM Connection attempt finished ({'Success' if task_result else 'Failed'})."
-                elif self.task_type == TASK_EXPORT_PROJECT: msg = f"Executable export process finished ({'Success' if task_result else 'Failed'})."
-                elif self.task_type == TASK_EXPORT_SOURCE: msg = f"Source distribution export finished ({'Success' if task_result else 'Failed'})."
-                elif self.task_type == TASK_RESOLVE_IMPORT_PACKAGE: msg = "Package name resolution finished."
-                else: msg = f"Task '{self.task_type}' finished (unknown type)."
+                msg = completion_message(task_result)
 
 
             # --- Gère Annulation & Émet Résultat ---
@@ -144,27 +264,61 @@ class Worker(QObject):
                 pass # Géré par le handler
             else:
                 status_logger(msg)
-                self.result.emit(self.task_type, task_result)
+                self.signals.result.emit(self.task_type, task_result)
 
         # ... (gestion des exceptions et bloc finally inchangés) ...
         except InterruptedError as ie:
-             print(f"[Worker {id(self)}] Caught InterruptedError: {ie}")
+             logger.debug("[Worker %s] Caught InterruptedError: %s", id(self), ie)
         except Exception as e:
             if not self._is_cancelled:
-                # ... (gestion erreur) ...
-                 error_msg = f"Error in worker task '{self.task_type}': {e}"
-                 print(f"EXCEPTION:\n{traceback.format_exc()}")
-                 console_logger(f"--- Worker Error ---\nTask: {self.task_type}\n{traceback.format_exc()}\n--- End Worker Error ---")
+                 # Trace formatée une seule fois, et seulement si la tâche n'a pas été annulée
+                 error_trace = traceback.format_exc()
+                 logger.error("Exception in worker task '%s':\n%s", self.task_type, error_trace)
+                 console_logger(f"--- Worker Error ---\nTask: {self.task_type}\n{error_trace}\n--- End Worker Error ---")
                  status_logger(f"Error: {self.task_type} failed ({type(e).__name__}). See console log.")
-                 self.result.emit(self.task_type, e)
+                 self.signals.result.emit(self.task_type, e)
             else:
-                 print(f"[Worker {id(self)}] Exception '{e}' occurred but task '{self.task_type}' was already cancelled.")
+                 logger.debug("[Worker %s] Exception '%s' occurred but task '%s' was already cancelled.", id(self), e, self.task_type)
         finally:
-            is_cancelled_at_end = self._is_cancelled
-            print(f"[Worker {id(self)}] FINISHED task '{self.task_type}'. Emitting finished (Cancelled={is_cancelled_at_end}).")
-            self.finished.emit()
+            self._flush_fragments() # Lot restant si la tâche a levé une exception (ignoré si annulé)
+            logger.debug("[Worker %s] FINISHED task '%s'. Emitting finished (Cancelled=%s).", id(self), self.task_type, self._is_cancelled)
+            self.signals.finished.emit(self)
+
 
 
+class WorkerRunnable(QRunnable):
+    """
+    Exécute un Worker sur un thread de pool (threads réutilisés, pas de QThread par tâche).
+    Le Worker émet via le WorkerSignals partagé du handler: aucune connexion de signal par tâche.
+    """
+    def __init__(self, worker: Worker):
+        super().__init__()
+        self.worker = worker
+
+    def run(self):
+        self.worker.run()
+
+
+class _SaveRunnable(QRunnable):
+    """
+    Écrit le code d'un projet sur io_pool, hors de la machinerie des tâches: pas d'état occupé, UI inchangée.
+    Le résultat revient au thread GUI par WorkerSignals.save_finished.
+    """
+    def __init__(self, signals: WorkerSignals, project_name: str, content: str, revision: int):
+        super().__init__()
+        self.signals = signals
+        self.project_name = project_name
+        self.content = content
+        self.revision = revision
+
+    def run(self):
+        try:
+            result = project_manager.save_project_script_content(self.project_name, self.content)
+        except Exception as e:
+            logger.exception("Exception while saving code for '%s'.", self.project_name)
+            result = e
+        self.signals.save_finished.emit(self.project_name, self.revision, result)
+
 
 # ======================================================================
 # --- Classe de Gestion des Actions ---
@@ -181,7 +335,8 @@ class GuiActionsHandler:
     _last_execution_error: Optional[str] = None
     _last_error_line: Optional[int] = None
     _correction_attempts: int = 0
-    _chat_fragment_buffer: str = ""
+    _chat_fragment_buffer: List[str] = []
+    _chat_end_cursor: Optional[QTextCursor] = None # Curseur d'insertion du stream dans le chat (créé au premier lot)
     _chat_update_timer: QTimer
     _is_busy: bool = False
     _next_logical_phase_after_result: str = TASK_IDLE
@@ -191,7 +346,8 @@ class GuiActionsHandler:
     # --- Client & Threading ---
     current_project: Optional[str] = None
     llm_client: Optional[BaseLLMClient] = None
-    thread: Optional[QThread] = None
+    thread_pool: Optional[QThreadPool] = None
+    io_pool: Optional[QThreadPool] = None
     worker: Optional[Worker] = None
 
     # --- Constantes TASK ---
@@ -205,6 +361,7 @@ class GuiActionsHandler:
     TASK_IDENTIFY_DEPS_FROM_REQUEST = TASK_IDENTIFY_DEPS_FROM_REQUEST
     TASK_GENERATE_CODE_STREAM = TASK_GENERATE_CODE_STREAM
     TASK_RESOLVE_IMPORT_PACKAGE = TASK_RESOLVE_IMPORT_PACKAGE
+    TASK_DELETE_PROJECT = TASK_DELETE_PROJECT
 
     # --- Initialisation ---
     def __init__(self, main_window: 'MainWindow'):
@@ -212,34 +369,79 @@ class GuiActionsHandler:
         self._is_busy = False
         self._current_task_phase = TASK_IDLE
         self.llm_client = None
+        self._llm_ok = False # Dernier état de connexion connu (mis à jour par le résultat de TASK_ATTEMPT_CONNECTION)
         self.current_project = None
-        self.thread = None
+        self.thread_pool = None
+        self.io_pool = None
         self.worker = None
         self._last_user_chat_message = ""
         self._project_dependencies = []
         self._deps_identified_for_next_step = []
         self._pending_install_deps = []
+        self._project_row_index: Dict[str, int] = {} # Nom de projet -> ligne dans project_list_widget (rempli par load_project_list)
+        self._project_info_cache: Dict[str, Tuple[str, bool]] = {} # Nom de projet -> (chemin, venv vérifié) pour l'exécution du script
+        self._project_pending_deletion: Optional[str] = None # Projet en cours de suppression (vidé si la suppression échoue)
+        self._new_project_dialog: Optional[QDialog] = None # Construit à la première création de projet puis réutilisé
+        self._new_project_name_input: Optional[QLineEdit] = None
+        self._close_confirm_box: Optional[QMessageBox] = None # Confirmation de sortie affichée (tâche en cours)
+        self._close_confirmed = False # Sortie confirmée malgré la tâche en cours
+        self._close_after_task = False # Fenêtre fermée dès que la tâche annulée rend la main (_on_thread_finished)
         self._code_to_correct = None
         self._last_execution_error = None
         self._correction_attempts = 0
-        self._chat_fragment_buffer = ""
+        self._chat_fragment_buffer = []
         self._next_logical_phase_after_result = TASK_IDLE
         self._was_cancelled_by_user = False
 
-        # Timer pour le chat
-        self._chat_update_timer = QTimer()
+        # Timer pour le chat: single-shot, armé par le premier lot en attente (aucun réveil quand le stream ne produit rien)
+        self._chat_update_timer = QTimer(); self._chat_update_timer.setSingleShot(True)
         self._chat_update_timer.setInterval(STREAM_UPDATE_INTERVAL_MS)
         self._chat_update_timer.timeout.connect(self._process_chat_buffer)
 
+        # Zones de log tamponnées: messages et sortie du script y sont regroupés (un append/défilement par lot)
+        self._console_sink = _BufferedLogSink(main_window, 'execution_log_text')
+        self._status_sink = _BufferedLogSink(main_window, 'status_log_text')
+        # Sauvegarde du code limitée à une écriture par fenêtre de SAVE_THROTTLE_MS (front montant + front descendant)
+        self._save_pending = False
+        self._save_in_flight = False # Une écriture à la fois sur io_pool; une demande arrivée entre-temps est rejouée à sa fin
+        self._save_queued = False
+        # hash() du dernier code lu ou écrit sur disque pour le projet courant (None: inconnu), et de celui en cours d'écriture
+        self._saved_code_hash: Optional[int] = None
+        self._saving_code_hash: Optional[int] = None
+        self._save_throttle_timer = QTimer(); self._save_throttle_timer.setSingleShot(True); self._save_throttle_timer.setInterval(SAVE_THROTTLE_MS)
+        self._save_throttle_timer.timeout.connect(self._on_save_throttle_timeout)
+        # Rafraîchissement différé de l'état des widgets: plusieurs demandes dans un même passage de boucle n'en font qu'un
+        self._ui_state_timer = QTimer(); self._ui_state_timer.setSingleShot(True); self._ui_state_timer.setInterval(0)
+        self._ui_state_timer.timeout.connect(self._refresh_ui_state)
+        self._cursor_override = False # Curseur d'attente posé par set_ui_enabled (évite de sonder QApplication.overrideCursor())
+
+        # Pool de threads global: threads réutilisés d'une tâche à l'autre, plafonné pour laisser un cœur au thread GUI
+        self.thread_pool = QThreadPool.globalInstance()
+        self.thread_pool.setMaxThreadCount(max(2, QThread.idealThreadCount() - 1))
+        # Pool propre aux tâches IO_TASKS: une écriture ou suppression lente n'occupe pas les threads du pool global
+        self.io_pool = QThreadPool(); self.io_pool.setObjectName("IoPool")
+        self.io_pool.setMaxThreadCount(IO_POOL_MAX_THREADS)
+        # Signaux partagés par tous les workers: connectés ici une fois pour toute la session
+        self._worker_signals = WorkerSignals()
+        self._worker_signals.log_message.connect(self._handle_worker_log)
+        self._worker_signals.result.connect(self.handle_worker_result)
+        self._worker_signals.chat_fragment_received.connect(self._buffer_chat_fragment)
+        self._worker_signals.console_line_received.connect(self._buffer_console_line)
+        self._worker_signals.finished.connect(self._on_worker_finished)
+        self._worker_signals.save_finished.connect(self._on_save_finished)
+        # Attente des tâches à la sortie de la boucle d'événements, plus dans closeEvent
+        app = QApplication.instance()
+        if app is not None: app.aboutToQuit.connect(self._on_about_to_quit)
+
     # ----------------------------------------------------------------------
     # --- Gestion du Worker ---
     # ----------------------------------------------------------------------
 
     def start_worker(self, task_type: str, task_callable: Callable, *args, **kwargs) -> bool:
-        """Lance une tâche longue dans un thread séparé."""
+        """Lance une tâche longue sur le QThreadPool global (Worker exécuté par un WorkerRunnable)."""
         if self._is_busy:
             msg = f"Warning: Task '{task_type}' requested, but handler is busy with '{self._current_task_phase}'."
-            print(msg)
+            logger.warning(msg)
             self.log_to_status(msg)
             return False
 
@@ -248,46 +450,35 @@ class GuiActionsHandler:
         self._was_cancelled_by_user = False # Réinitialise drapeau annulation
         self.set_ui_enabled(False, task_type) # Désactive l'UI, en passant la tâche
 
-        self.thread = QThread()
-        self.thread.setObjectName(f"WorkerThread_{task_type}_{id(self.thread)}")
-        # Le worker est créé avec le drapeau _is_cancelled à False par défaut
-        self.worker = Worker(task_type, task_callable, *args, **kwargs)
-        self.worker.moveToThread(self.thread)
-
-        # Connexions Signaux/Slots
-        self.worker.log_message.connect(self._handle_worker_log)
-        self.worker.result.connect(self.handle_worker_result)
-        self.worker.chat_fragment_received.connect(self._buffer_chat_fragment)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(lambda: setattr(self, 'worker', None)) # Nettoie référence worker
-        self.worker.finished.connect(self.worker.deleteLater) # Destruction worker
-        self.thread.finished.connect(lambda: setattr(self, 'thread', None)) # Nettoie référence thread
-        self.thread.finished.connect(self.thread.deleteLater) # Destruction thread
-
-        # Utilise partial pour passer le type de tâche terminé
-        on_finished_with_task = functools.partial(self._on_thread_finished, finished_task_type=task_type)
-        self.thread.finished.connect(on_finished_with_task)
-
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
-
-        # Démarre le timer pour le chat si c'est une tâche de stream
+        # Le worker est créé avec le drapeau _is_cancelled à False par défaut; il émet via self._worker_signals (connecté une fois)
+        worker = Worker(self._worker_signals, task_type, task_callable, *args, **kwargs)
+        self.worker = worker
+
+        pool = self.io_pool if task_type in IO_TASKS else self.thread_pool
+        pool.start(WorkerRunnable(worker))
+
+        # Nouveau stream: tampon du chat vidé (le timer est armé par le premier lot reçu)
         if task_type == TASK_GENERATE_CODE_STREAM:
-            self._chat_fragment_buffer = ""
-            self._chat_update_timer.start()
+            self._chat_fragment_buffer.clear()
 
-        print(f"Worker started for task: {task_type} on thread {self.thread.objectName()}. Handler is now BUSY.")
+        logger.debug("Worker started for task: %s (pool: %d/%d threads). Handler is now BUSY.", task_type, pool.activeThreadCount(), pool.maxThreadCount())
         return True
 
+    def shutdown_worker_thread(self, timeout_ms: int = 2000):
+        """Attend la fin des tâches des pools (à la fermeture de l'application)."""
+        for pool in (self.io_pool, self.thread_pool): # E/S d'abord: une sauvegarde en cours doit aller au bout
+            if pool is not None and not pool.waitForDone(timeout_ms):
+                logger.warning("Worker pool still busy after %s ms, exiting anyway.", timeout_ms)
+
     def cancel_current_task(self):
         """Demande l'annulation de la tâche worker en cours."""
-        if not self._is_busy or self.worker is None or self.thread is None or not self.thread.isRunning():
-            print("Cancel requested but no cancellable task is running.")
+        if not self._is_busy or self.worker is None:
+            logger.debug("Cancel requested but no cancellable task is running.")
             return
 
         # On ne permet l'annulation que pour certaines tâches (le stream pour l'instant)
         if self._current_task_phase == TASK_GENERATE_CODE_STREAM:
-            print(f"Requesting cancellation for task '{self._current_task_phase}'...")
+            logger.debug("Requesting cancellation for task '%s'...", self._current_task_phase)
             self.log_to_status(f"Attempting to cancel task: {self._current_task_phase}...")
             self._was_cancelled_by_user = True # Indique que l'annulation vient de l'utilisateur
             self.worker.cancel() # Appelle la méthode cancel du worker
@@ -296,22 +487,27 @@ class GuiActionsHandler:
             self.main_window.cancel_llm_button.setEnabled(False)
             self.main_window.cancel_llm_button.setText("Cancelling...")
         else:
-            print(f"Task '{self._current_task_phase}' is not currently cancellable.")
+            logger.debug("Task '%s' is not currently cancellable.", self._current_task_phase)
             self.log_to_status(f"Task '{self._current_task_phase}' cannot be cancelled.")
 
+    def _on_worker_finished(self, worker: Worker):
+        # Nettoie la référence avant l'enchaînement éventuel (qui peut déjà avoir lancé le worker suivant)
+        if self.worker is worker: self.worker = None
+        self._on_thread_finished(worker.task_type)
+
     def _on_thread_finished(self, finished_task_type: str):
-        """Appelé à la fin de l'exécution du thread worker."""
+        """Appelé (thread GUI) à la fin de la tâche du worker, après son résultat."""
         next_phase = self._next_logical_phase_after_result
         was_cancelled = self._was_cancelled_by_user
         chain_started = False # Flag pour savoir si on a enchaîné
 
-        print(f"[_on_thread_finished] START. Task: '{finished_task_type}'. Cancelled: {was_cancelled}. Next: '{next_phase}'. Busy: {self._is_busy}")
+        logger.debug("[_on_thread_finished] START. Task: '%s'. Cancelled: %s. Next: '%s'. Busy: %s", finished_task_type, was_cancelled, next_phase, self._is_busy)
 
         # Arrête le timer du chat si nécessaire
         if finished_task_type == TASK_GENERATE_CODE_STREAM:
              self._process_chat_buffer()
              self._chat_update_timer.stop()
-             print("Chat update timer stopped.")
+             logger.debug("Chat update timer stopped.")
 
         self._next_logical_phase_after_result = TASK_IDLE # Réinitialise la phase planifiée
 
@@ -323,22 +519,22 @@ class GuiActionsHandler:
                 # Nettoyage spécifique
                 if finished_task_type == TASK_IDENTIFY_DEPS_FROM_REQUEST: self._deps_identified_for_next_step = []
                 if finished_task_type == TASK_GENERATE_CODE_STREAM and (self._last_execution_error or self._code_to_correct):
-                    print("[Cleanup] Cleaning correction markers after cancellation.")
+                    logger.debug("[Cleanup] Cleaning correction markers after cancellation.")
                     self._last_execution_error = None; self._code_to_correct = None; self._correction_attempts = 0; self._last_error_line = None; self._missing_module_name = None
                 next_phase = TASK_IDLE # Force la fin
 
             # --- Tenter l'enchaînement si pas annulé ---
             elif next_phase != TASK_IDLE:
-                print(f"[Chaining] Entering chaining logic for next_phase = '{next_phase}'")
+                logger.debug("[Chaining] Entering chaining logic for next_phase = '%s'", next_phase)
 
                 # ===========================================================
                 # --- CORRECTION pour TASK_GENERATE_CODE_STREAM ---
                 # ===========================================================
                 if next_phase == TASK_GENERATE_CODE_STREAM:
-                    print(f"[Chaining] Condition met for TASK_GENERATE_CODE_STREAM.")
+                    logger.debug("[Chaining] Condition met for TASK_GENERATE_CODE_STREAM.")
                     is_correction_context = self._last_execution_error is not None and self._code_to_correct is not None
 
-                    if self.current_project and self.llm_client and self.llm_client.is_available():
+                    if self.current_project and self.llm_client and self._llm_ok:
 
                         # Déclare les variables qui seront utilisées dans start_worker
                         prompt_for_llm: str
@@ -347,7 +543,7 @@ class GuiActionsHandler:
 
                         # Assigne les valeurs DANS les blocs conditionnels
                         if is_correction_context:
-                            print("[Chaining] Preparing for CORRECTION stream.")
+                            logger.debug("[Chaining] Preparing for CORRECTION stream.")
                             self.log_to_status(f"-> Generating correction stream (Attempt {self._correction_attempts})...")
                             line_info = f"(near line {self._last_error_line})" if self._last_error_line else ""
                             prompt_for_llm = (
@@ -361,7 +557,7 @@ class GuiActionsHandler:
                             dependencies_for_llm = self._project_dependencies # Utilise les deps existants pour correction
 
                         else: # Génération normale
-                            print("[Chaining] Preparing for REGULAR code generation stream.")
+                            logger.debug("[Chaining] Preparing for REGULAR code generation stream.")
                             self.log_to_status(f"-> Generating code stream using identified dependencies: {self._deps_identified_for_next_step}...")
                             prompt_for_llm = self._last_user_chat_message
                             source_code_for_llm = self.main_window.code_editor_text.toPlainText()
@@ -370,7 +566,7 @@ class GuiActionsHandler:
                         # Génère info structure (en dehors des ifs)
                         project_structure_info = self._generate_project_structure_info()
 
-                        print(f"[Chaining] Releasing busy flag temporarily to start TASK_GENERATE_CODE_STREAM...")
+                        logger.debug("[Chaining] Releasing busy flag temporarily to start TASK_GENERATE_CODE_STREAM...")
                         self._is_busy = False # Libère avant
                         # Appelle start_worker AVEC les variables maintenant assignées
                         started = self.start_worker(
@@ -384,21 +580,21 @@ class GuiActionsHandler:
                         )
 
                         if started:
-                            print(f"[Chaining] start_worker for TASK_GENERATE_CODE_STREAM returned True. Handler is BUSY again.")
+                            logger.debug("[Chaining] start_worker for TASK_GENERATE_CODE_STREAM returned True. Handler is BUSY again.")
                             chain_started = True
                             # Nettoie les marqueurs de correction SEULEMENT si on a démarré une correction
                             if is_correction_context:
-                                print("[Chaining] Clearing correction markers after starting correction worker...")
+                                logger.debug("[Chaining] Clearing correction markers after starting correction worker...")
                                 self._last_execution_error = None; self._code_to_correct = None; self._last_error_line = None
                             # Ne pas nettoyer _deps_identified_for_next_step ici, on les a utilisés
                         else: # Echec démarrage worker
-                            print(f"[Chaining] start_worker for TASK_GENERATE_CODE_STREAM returned False."); self.log_to_status("! Error starting code generation/correction stream.");
+                            logger.debug("[Chaining] start_worker for TASK_GENERATE_CODE_STREAM returned False."); self.log_to_status("! Error starting code generation/correction stream.");
                             # Nettoyage si échec démarrage
                             if is_correction_context: self._last_execution_error = None; self._code_to_correct = None; self._correction_attempts = 0; self._last_error_line = None; self._missing_module_name = None
                             self._deps_identified_for_next_step = [] # Nettoie aussi ici
 
                     else: # Conditions non remplies (projet/LLM)
-                        print(f"[Chaining] Skipping TASK_GENERATE_CODE_STREAM due to missing project/LLM."); self.log_to_status("! Skipping code generation (missing project/LLM).");
+                        logger.debug("[Chaining] Skipping TASK_GENERATE_CODE_STREAM due to missing project/LLM."); self.log_to_status("! Skipping code generation (missing project/LLM).");
                         # Nettoyage si skip
                         if is_correction_context: self._last_execution_error = None; self._code_to_correct = None; self._correction_attempts = 0; self._last_error_line = None; self._missing_module_name = None
                         self._deps_identified_for_next_step = []
@@ -410,10 +606,10 @@ class GuiActionsHandler:
                 # --- Blocs pour les autres 'next_phase' (inchangés structurellement) ---
                 elif next_phase == TASK_INSTALL_DEPS:
                     # ... (code existant pour install deps, qui fonctionne) ...
-                    print(f"[Chaining] Condition met for TASK_INSTALL_DEPS.")
+                    logger.debug("[Chaining] Condition met for TASK_INSTALL_DEPS.")
                     if self._pending_install_deps and self.current_project:
                         project_path = project_manager.get_project_path(self.current_project)
-                        print(f"[Chaining] Releasing busy flag temporarily to start TASK_INSTALL_DEPS...")
+                        logger.debug("[Chaining] Releasing busy flag temporarily to start TASK_INSTALL_DEPS...")
                         self._is_busy = False
                         started = self.start_worker(
                             task_type=TASK_INSTALL_DEPS,
@@ -422,10 +618,10 @@ class GuiActionsHandler:
                             dependencies=self._pending_install_deps
                         )
                         if started:
-                            print(f"[Chaining] start_worker for TASK_INSTALL_DEPS returned True. Handler is BUSY again.")
+                            logger.debug("[Chaining] start_worker for TASK_INSTALL_DEPS returned True. Handler is BUSY again.")
                             chain_started = True
                         else:
-                            print(f"[Chaining] start_worker for TASK_INSTALL_DEPS returned False.")
+                            logger.debug("[Chaining] start_worker for TASK_INSTALL_DEPS returned False.")
                             self.log_to_console("! Error starting install worker.")
                             self.log_to_status("! Error starting dependency installation worker.")
                             self._pending_install_deps = [] # Nettoie si échec démarrage
@@ -433,17 +629,40 @@ class GuiActionsHandler:
                                 self.append_to_chat("System", "Stopping correction attempts because dependency installation failed to start.")
                                 self._correction_attempts = 0; self._last_execution_error = None; self._code_to_correct = None; self._last_error_line = None; self._missing_module_name = None
                     else: # Conditions non remplies
-                        print(f"[Chaining] Skipping TASK_INSTALL_DEPS (no pending deps or project).")
+                        logger.debug("[Chaining] Skipping TASK_INSTALL_DEPS (no pending deps or project).")
                         self._pending_install_deps = []
                         if self._last_execution_error is not None: # Si on skippe pendant correction
                            self._correction_attempts = 0; self._last_execution_error = None; self._code_to_correct = None; self._last_error_line = None; self._missing_module_name = None
 
+                elif next_phase == TASK_IDENTIFY_DEPS_FROM_REQUEST:
+                    # Repli quand le code généré n'a pas d'en-tête REQUIREMENTS_HEADER: dépendances demandées au LLM
+                    logger.debug("[Chaining] Condition met for TASK_IDENTIFY_DEPS_FROM_REQUEST.")
+                    if self.current_project and self.llm_client and self._llm_ok and self._last_user_chat_message:
+                        logger.debug("[Chaining] Releasing busy flag temporarily to start TASK_IDENTIFY_DEPS_FROM_REQUEST...")
+                        self._is_busy = False
+                        started = self.start_worker(
+                            task_type=TASK_IDENTIFY_DEPS_FROM_REQUEST,
+                            task_callable=self.llm_client.identify_dependencies_from_request,
+                            user_prompt=self._last_user_chat_message,
+                            project_name=self.current_project,
+                            project_structure_info=self._generate_project_structure_info()
+                        )
+                        if started:
+                            logger.debug("[Chaining] start_worker for TASK_IDENTIFY_DEPS_FROM_REQUEST returned True. Handler is BUSY again.")
+                            chain_started = True
+                        else:
+                            logger.debug("[Chaining] start_worker for TASK_IDENTIFY_DEPS_FROM_REQUEST returned False.")
+                            self.log_to_status("! Error starting dependency identification worker.")
+                    else: # Conditions non remplies
+                        logger.debug("[Chaining] Skipping TASK_IDENTIFY_DEPS_FROM_REQUEST due to failed condition.")
+                        self.log_to_status("! Skipping dependency identification (missing project/LLM/request).")
+
                 elif next_phase == TASK_RESOLVE_IMPORT_PACKAGE:
                     # ... (code existant pour resolve import, qui fonctionne) ...
-                    print(f"[Chaining] Condition met for TASK_RESOLVE_IMPORT_PACKAGE.")
-                    if self.llm_client and self.llm_client.is_available() and self._missing_module_name and self._last_execution_error:
+                    logger.debug("[Chaining] Condition met for TASK_RESOLVE_IMPORT_PACKAGE.")
+                    if self.llm_client and self._llm_ok and self._missing_module_name and self._last_execution_error:
                         self.log_to_status(f"-> Asking LLM for package name for module '{self._missing_module_name}'...")
-                        print(f"[Chaining] Releasing busy flag temporarily to start TASK_RESOLVE_IMPORT_PACKAGE...")
+                        logger.debug("[Chaining] Releasing busy flag temporarily to start TASK_RESOLVE_IMPORT_PACKAGE...")
                         self._is_busy = False
                         started = self.start_worker(
                             task_type=TASK_RESOLVE_IMPORT_PACKAGE,
@@ -452,15 +671,15 @@ class GuiActionsHandler:
                             error_message=self._last_execution_error
                         )
                         if started:
-                            print(f"[Chaining] start_worker for TASK_RESOLVE_IMPORT_PACKAGE returned True. Handler is BUSY again.")
+                            logger.debug("[Chaining] start_worker for TASK_RESOLVE_IMPORT_PACKAGE returned True. Handler is BUSY again.")
                             chain_started = True
                         else:
-                            print(f"[Chaining] start_worker for TASK_RESOLVE_IMPORT_PACKAGE returned False.")
+                            logger.debug("[Chaining] start_worker for TASK_RESOLVE_IMPORT_PACKAGE returned False.")
                             self.log_to_status("! Error starting package resolution worker.")
                             self.append_to_chat("System", "Stopping correction attempts because package resolution failed to start.")
                             self._correction_attempts = 0; self._last_execution_error = None; self._code_to_correct = None; self._last_error_line = None; self._missing_module_name = None # Nettoie si échec démarrage
                     else: # Conditions non remplies
-                         print(f"[Chaining] Skipping TASK_RESOLVE_IMPORT_PACKAGE due to failed condition.")
+                         logger.debug("[Chaining] Skipping TASK_RESOLVE_IMPORT_PACKAGE due to failed condition.")
                          self.log_to_status("! Skipping package resolution step.")
                          self.append_to_chat("System", "Stopping correction attempts because package resolution step was skipped.")
                          self._correction_attempts = 0; self._last_execution_error = None; self._code_to_correct = None; self._last_error_line = None; self._missing_module_name = None # Nettoie si skip
@@ -468,51 +687,53 @@ class GuiActionsHandler:
 
                 elif next_phase == TASK_RUN_SCRIPT:
                     # ... (code existant pour run script, qui fonctionne) ...
-                    print(f"[Chaining] Condition met for TASK_RUN_SCRIPT.")
+                    logger.debug("[Chaining] Condition met for TASK_RUN_SCRIPT.")
                     self.log_to_status("-> Automatically running script...")
-                    print(f"[Chaining] Releasing busy flag temporarily to start TASK_RUN_SCRIPT...")
+                    logger.debug("[Chaining] Releasing busy flag temporarily to start TASK_RUN_SCRIPT...")
                     self._is_busy = False
                     self.run_current_project_script(called_from_chain=True) # run_current_project_script appelle start_worker
                     if self._current_task_phase == TASK_RUN_SCRIPT and self._is_busy:
-                        print(f"[Chaining] TASK_RUN_SCRIPT worker started successfully. Handler is BUSY again.")
+                        logger.debug("[Chaining] TASK_RUN_SCRIPT worker started successfully. Handler is BUSY again.")
                         chain_started = True
                     else:
-                        print(f"[Chaining] run_current_project_script did not start the worker. Handler busy state: {self._is_busy}")
+                        logger.debug("[Chaining] run_current_project_script did not start the worker. Handler busy state: %s", self._is_busy)
 
 
             # --- Si pas d'enchaînement réussi ou pas d'enchaînement prévu ---
             if not chain_started:
                  if next_phase == TASK_IDLE and not was_cancelled:
-                     print(f"[Chaining] next_phase was IDLE. No chaining needed.")
+                     logger.debug("[Chaining] next_phase was IDLE. No chaining needed.")
                  elif not was_cancelled:
-                     print(f"[Chaining] Chaining condition for '{next_phase}' not met or worker start failed.")
+                     logger.debug("[Chaining] Chaining condition for '%s' not met or worker start failed.", next_phase)
                  # Nettoyage si on termine sans enchaîner (et si ce n'était pas une annulation)
                  if not was_cancelled:
                      if finished_task_type == TASK_IDENTIFY_DEPS_FROM_REQUEST: self._deps_identified_for_next_step = []
                      if self._last_execution_error or self._code_to_correct or self._missing_module_name:
-                         print("[Chaining] Cleaning up stale correction/import markers on non-chain/non-cancel finish.")
+                         logger.debug("[Chaining] Cleaning up stale correction/import markers on non-chain/non-cancel finish.")
                          self._last_execution_error = None; self._code_to_correct = None; self._correction_attempts = 0; self._last_error_line = None; self._missing_module_name = None
 
         except Exception as e:
             # Gestion d'erreur interne de la logique d'enchaînement
-            print(f"!!!!!!!!!!!!!!!! ERROR in _on_thread_finished logic !!!!!!!!!!!!!!!!"); print(traceback.format_exc()); print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-            self.log_to_status(f"! Internal error during task chaining/finish: {e}"); self.log_to_console(f"! Internal error finishing {finished_task_type}: {e}\n{traceback.format_exc()}")
+            error_trace = traceback.format_exc(); logger.error("Error in _on_thread_finished logic:\n%s", error_trace) # Trace formatée une seule fois
+            self.log_to_status(f"! Internal error during task chaining/finish: {e}"); self.log_to_console(f"! Internal error finishing {finished_task_type}: {e}\n{error_trace}")
             # Reset complet état par sécurité
             self._next_logical_phase_after_result = TASK_IDLE; self._deps_identified_for_next_step = []; self._last_execution_error = None; self._code_to_correct = None; self._correction_attempts = 0; self._last_error_line = None; self._missing_module_name = None; self._pending_install_deps = []
             chain_started = False # Assure que le finally réactive l'UI
 
         finally:
             # --- Réinitialisation état et UI ---
-            print(f"[_on_thread_finished] FINALLY block. chain_started={chain_started}")
+            logger.debug("[_on_thread_finished] FINALLY block. chain_started=%s", chain_started)
             if not chain_started:
-                print(f"[_on_thread_finished] No chain started or task cancelled/failed. Resetting state to IDLE and enabling UI.")
+                logger.debug("[_on_thread_finished] No chain started or task cancelled/failed. Resetting state to IDLE and enabling UI.")
                 self._is_busy = False
                 self._current_task_phase = TASK_IDLE
                 self._was_cancelled_by_user = False # Reset flag annulation
                 self.set_ui_enabled(True) # Réactive l'UI
+                if finished_task_type == TASK_DELETE_PROJECT: self._on_project_deleted() # Rafraîchit la liste une fois le handler libre
+                if self._close_after_task: QTimer.singleShot(0, self.main_window.close) # Sortie confirmée: la tâche a rendu la main
             else:
-                 print(f"[_on_thread_finished] Chain was started for '{self._current_task_phase}'. UI remains disabled.")
-            print(f"[_on_thread_finished] END. Busy state: {self._is_busy}")
+                 logger.debug("[_on_thread_finished] Chain was started for '%s'. UI remains disabled.", self._current_task_phase)
+            logger.debug("[_on_thread_finished] END. Busy state: %s", self._is_busy)
 
 
 
@@ -520,13 +741,13 @@ class GuiActionsHandler:
         """Traite le résultat d'une tâche worker (si elle n'a pas été annulée)."""
         # Ignore le résultat si la tâche a été annulée entre temps ou si décalage
         if self._was_cancelled_by_user:
-            print(f"Ignoring result for task '{task_type}' because it was cancelled by the user.")
+            logger.debug("Ignoring result for task '%s' because it was cancelled by the user.", task_type)
             return
         if task_type != self._current_task_phase:
-            print(f"WARNING: Stale result ignored for task '{task_type}' (current: '{self._current_task_phase}').")
+            logger.warning("Stale result ignored for task '%s' (current: '%s').", task_type, self._current_task_phase)
             return
 
-        print(f"[GUI handle] Task '{task_type}'. Result type: {type(result)}")
+        logger.debug("[GUI handle] Task '%s'. Result type: %s", task_type, type(result))
         error_occurred = isinstance(result, Exception)
         next_phase = TASK_IDLE
         is_in_correction_cycle = self._last_execution_error is not None # Était-on en correction AVANT ce résultat?
@@ -537,7 +758,7 @@ class GuiActionsHandler:
             # Connexion LLM
             if task_type == TASK_ATTEMPT_CONNECTION:
                 # (Logique inchangée)
-                llm_connected = not error_occurred and result is True; status = "Unknown"; color = "orange"; backend_name = "N/A"
+                llm_connected = not error_occurred and result is True; self._llm_ok = llm_connected; status = "Unknown"; color = "orange"; backend_name = "N/A"
                 if self.llm_client: backend_name = self.llm_client.get_backend_name()
                 if llm_connected: status = f"Connected ({backend_name})"; color = "green"; self.log_to_status(f"LLM Connection Successful ({backend_name})")
                 else:
@@ -548,15 +769,16 @@ class GuiActionsHandler:
                 self.main_window.llm_status_label.setText(f"LLM: {status}"); self.main_window.llm_status_label.setStyleSheet(f"color: {color}; font-weight: bold;")
                 next_phase = TASK_IDLE # La connexion ne déclenche pas d'autre tâche
 
-            # Identification Dépendances
+            # Identification Dépendances (repli: code généré sans en-tête de dépendances)
             elif task_type == TASK_IDENTIFY_DEPS_FROM_REQUEST:
-                 # (Logique inchangée)
                  if error_occurred: self.log_to_status(f"Error identifying dependencies: {result}"); self.append_to_chat("System", f"Error identifying dependencies: {result}"); self._deps_identified_for_next_step = []; next_phase = TASK_IDLE
                  elif isinstance(result, list):
                      identified_deps = [dep for dep in result if not dep.startswith("ERROR:")]; errors = [dep for dep in result if dep.startswith("ERROR:")]
                      if errors: self.append_to_chat("System", f"Warning/Error during dependency check: {'; '.join(errors)}")
                      self._deps_identified_for_next_step = sorted(list(set(identified_deps))); dep_msg = f"Identified potential dependencies: {self._deps_identified_for_next_step or 'None'}"
-                     self.log_to_console(dep_msg); self.append_to_chat("System", dep_msg); next_phase = TASK_GENERATE_CODE_STREAM # Enchaîne vers la génération
+                     self.log_to_console(dep_msg); self.append_to_chat("System", dep_msg)
+                     needed_deps = self._deps_identified_for_next_step; self._deps_identified_for_next_step = []
+                     next_phase = self._next_phase_for_dependencies(needed_deps) # Code déjà généré: enchaîne vers l'installation
                  else: self.log_to_status(f"Unexpected result type for dependency ID: {type(result)}"); self.append_to_chat("System", f"Unexpected result type from dependency check: {type(result)}"); self._deps_identified_for_next_step = []; next_phase = TASK_IDLE
 
             # Stream Génération Code
@@ -568,15 +790,18 @@ class GuiActionsHandler:
                     self.log_to_status(f"Error during code generation/correction stream: {result}"); self.append_to_chat("System", f"Error during stream: {result}"); next_phase = TASK_IDLE; self._deps_identified_for_next_step = []
                     if is_in_correction_cycle: self._correction_attempts = 0; self._last_execution_error = None; self._code_to_correct = None; self._last_error_line = None; self._missing_module_name = None
                 elif isinstance(result, str):
-                    cleaned_code = self._cleanup_llm_code_output(result); self.main_window.code_editor_text.setPlainText(cleaned_code); self.log_to_console("Code updated in editor from stream."); self.append_to_chat("System", "(Code updated in editor)")
+                    cleaned_code = self._cleanup_llm_code_output(result)
+                    with _suspend_updates(self.main_window.code_editor_text): self.main_window.code_editor_text.setPlainText(cleaned_code)
+                    self.main_window.code_editor_text.document().setModified(True) # Code généré pas encore écrit sur disque: la sauvegarde ne doit pas l'ignorer
+                    self.log_to_console("Code updated in editor from stream."); self.append_to_chat("System", "(Code updated in editor)")
                     if is_in_correction_cycle:
                         self.log_to_status("Correction applied. -> Re-running script to verify..."); self.append_to_chat("System", "Correction stream applied. Re-running script..."); next_phase = TASK_RUN_SCRIPT # Retente après correction
                     else: # Génération normale -> Vérif deps
-                        current_proj_deps_set = set(self._project_dependencies); needed_deps_set = set(self._deps_identified_for_next_step); self._deps_identified_for_next_step = []
-                        new_deps_to_install = sorted(list(needed_deps_set - current_proj_deps_set))
-                        if new_deps_to_install:
-                            self.log_to_status(f"New dependencies require installation: {new_deps_to_install}"); self.append_to_chat("System", f"New dependencies identified and possibly needed: {new_deps_to_install}"); self._pending_install_deps = new_deps_to_install; self._project_dependencies = sorted(list(needed_deps_set.union(current_proj_deps_set))); self.update_project_metadata_deps(); next_phase = TASK_INSTALL_DEPS # Enchaîne vers install
-                        else: self.log_to_status("Dependencies identified are already met or not needed."); self.append_to_chat("System", "No new dependencies seem required for installation."); next_phase = TASK_IDLE
+                        declared_deps = parse_requirements_header(cleaned_code); self._deps_identified_for_next_step = []
+                        if declared_deps is not None:
+                            self.log_to_console(f"Dependencies declared by the generated code: {declared_deps or 'None'}"); next_phase = self._next_phase_for_dependencies(declared_deps)
+                        else: # Pas d'en-tête REQUIREMENTS_HEADER: repli sur l'identification par le LLM
+                            self.log_to_status("Generated code has no requirements header. -> Asking LLM for dependencies..."); self.append_to_chat("System", "No dependency header in the generated code, asking the LLM for the dependencies..."); next_phase = TASK_IDENTIFY_DEPS_FROM_REQUEST
                 else:
                     self.log_to_status(f"Unexpected result type after stream: {type(result)}"); self.append_to_chat("System", f"Unexpected result type from LLM stream: {type(result)}"); next_phase = TASK_IDLE; self._deps_identified_for_next_step = []
                     if is_in_correction_cycle: self._correction_attempts = 0; self._last_execution_error = None; self._code_to_correct = None; self._last_error_line = None; self._missing_module_name = None
@@ -610,22 +835,23 @@ class GuiActionsHandler:
             elif task_type == TASK_RUN_SCRIPT:
                  # (Logique inchangée pour traitement résultat run, incluant auto-correction)
                 self.log_to_console(f"--- Script execution task finished ---"); error_message_for_llm = ""; error_line_number = None
-                if isinstance(result, subprocess.CompletedProcess):
+                if isinstance(result, utils.RunResult): # Type de retour unique de utils.run_project_script
+                    # Venv tenu pour prêt dès que 'uv run' a pu démarrer, même si le script échoue; revérifié seulement si le venv ou uv a fait défaut
+                    project_info = self._project_info_cache.get(self.current_project)
+                    if project_info is not None: self._project_info_cache[self.current_project] = (project_info[0], result.venv_ready)
                     if result.returncode == 0: # Succès
                         self.log_to_status("--- Script executed successfully! ---"); self.log_to_console("--- Script executed successfully! Process complete. ---");
                         if is_in_correction_cycle: self.append_to_chat("System", "Success! The script ran successfully after correction/installation.")
                         self._correction_attempts = 0; self._last_execution_error = None; self._code_to_correct = None; self._last_error_line = None; self._missing_module_name = None; next_phase = TASK_IDLE # Fin du cycle
                     else: # Échec
-                        max_attempts = self.main_window.max_attempts_spinbox.value(); auto_correct_enabled = self.main_window.auto_correct_checkbox.isChecked(); full_error_output = ""; stderr_clean = result.stderr.strip() if result.stderr else ""; stdout_clean = result.stdout.strip() if result.stdout else "";
-                        if stderr_clean: full_error_output = stderr_clean
-                        elif stdout_clean: full_error_output = stdout_clean
-                        else: full_error_output = f"Script failed with exit code: {result.returncode}."
-                        error_message_for_llm = full_error_output; match_line = re.search(r'File ".*?", line (\d+)', full_error_output);
+                        max_attempts = self.main_window.max_attempts_spinbox.value(); auto_correct_enabled = self.main_window.auto_correct_checkbox.isChecked()
+                        full_error_output = result.stderr.strip() or result.stdout.strip() or f"Script failed with exit code: {result.returncode}."
+                        error_message_for_llm = full_error_output; match_line = _ERROR_LINE_RE.search(full_error_output);
                         if match_line: 
-                            try: error_line_number = int(match_line.group(1)); print(f"[AutoCorrect] Extracted line number: {error_line_number}"); 
+                            try: error_line_number = int(match_line.group(1)); logger.debug("[AutoCorrect] Extracted line number: %s", error_line_number); 
                             except ValueError: pass
-                        print(f"[AutoCorrect] Error captured:\n---\n{error_message_for_llm}\n---")
-                        module_match = re.search(r"ModuleNotFoundError: No module named '([^']*)'", error_message_for_llm); import_match = re.search(r"ImportError:.*'([^']*)'", error_message_for_llm); missing_module_name = None
+                        logger.debug("[AutoCorrect] Error captured:\n---\n%s\n---", error_message_for_llm)
+                        module_match = _MODULE_NOT_FOUND_RE.search(error_message_for_llm); import_match = _IMPORT_ERROR_RE.search(error_message_for_llm); missing_module_name = None
                         if module_match: missing_module_name = module_match.group(1)
                         elif import_match: missing_module_name = import_match.group(1).split('.')[-1]
                         if auto_correct_enabled and missing_module_name and self._correction_attempts < max_attempts:
@@ -644,42 +870,63 @@ class GuiActionsHandler:
             # Export Projet
             elif task_type == TASK_EXPORT_PROJECT:
                  # (Logique inchangée)
-                 if error_occurred: QMessageBox.critical(self.main_window, "Export Error", f"Failed executable export.\nError: {result}")
-                 elif result is True: QMessageBox.information(self.main_window, "Export Successful", "Executable bundle exported successfully!")
-                 else: QMessageBox.warning(self.main_window, "Export Failed", "Executable export process finished but reported failure.")
+                 # Boîtes ouvertes avec open() (_show_message): pas de boucle imbriquée avant le traitement de 'finished'
+                 if error_occurred: _show_message(self.main_window, QMessageBox.Icon.Critical, "Export Error", f"Failed executable export.\nError: {result}")
+                 elif result is True: _show_message(self.main_window, QMessageBox.Icon.Information, "Export Successful", "Executable bundle exported successfully!")
+                 else: _show_message(self.main_window, QMessageBox.Icon.Warning, "Export Failed", "Executable export process finished but reported failure.")
                  next_phase = TASK_IDLE
             # Export Source
             elif task_type == TASK_EXPORT_SOURCE:
                  # (Logique inchangée)
-                 if error_occurred: QMessageBox.critical(self.main_window, "Export Error", f"Failed source distribution export.\nError: {result}")
-                 elif result is True: QMessageBox.information(self.main_window, "Export Successful", "Source distribution exported successfully!")
-                 else: QMessageBox.warning(self.main_window, "Export Failed", "Source export process finished but reported failure.")
+                 if error_occurred: _show_message(self.main_window, QMessageBox.Icon.Critical, "Export Error", f"Failed source distribution export.\nError: {result}")
+                 elif result is True: _show_message(self.main_window, QMessageBox.Icon.Information, "Export Successful", "Source distribution exported successfully!")
+                 else: _show_message(self.main_window, QMessageBox.Icon.Warning, "Export Failed", "Source export process finished but reported failure.")
                  next_phase = TASK_IDLE
 
+            # Suppression Projet
+            elif task_type == TASK_DELETE_PROJECT:
+                project_name = self._project_pending_deletion
+                if not error_occurred and result is True:
+                    self.log_to_console(f"Project '{project_name}' deleted."); self.log_to_status(f"--- Project '{project_name}' deleted. ---")
+                else:
+                    error_msg = f"Exception during deletion of '{project_name}': {result}" if error_occurred else f"Deletion failed for '{project_name}'. Project manager reported failure."
+                    self._project_pending_deletion = None # Projet conservé: la vue courante reste valide (vidé avant tout affichage)
+                    logger.error(error_msg); self.log_to_console(error_msg); self.log_to_status(f"--- ERROR deleting '{project_name}'. ---"); _show_message(self.main_window, QMessageBox.Icon.Critical, "Deletion Error", error_msg)
+                next_phase = TASK_IDLE
+
             # Tâche Inconnue
             else:
                 self.log_to_status(f"--- Unhandled task result for task: {task_type} ---"); self.log_to_console(f"--- Unhandled task result: {task_type}, Result: {result} ---"); next_phase = TASK_IDLE
 
         except Exception as handler_ex:
             # Gestion erreur interne (inchangée)
-            print(f"!!!!!!!!!!!!!!!! EXCEPTION in handle_worker_result !!!!!!!!!!!!!!!!"); print(traceback.format_exc()); print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!"); self.log_to_status(f"! Internal error handling result: {handler_ex}"); self.log_to_console(f"! Internal error handling result for {task_type}: {handler_ex}\n{traceback.format_exc()}"); self.append_to_chat("System", f"Critical Internal Error while handling task result: {handler_ex}")
+            error_trace = traceback.format_exc(); logger.error("Exception in handle_worker_result:\n%s", error_trace) # Trace formatée une seule fois
+            self.log_to_status(f"! Internal error handling result: {handler_ex}"); self.log_to_console(f"! Internal error handling result for {task_type}: {handler_ex}\n{error_trace}"); self.append_to_chat("System", f"Critical Internal Error while handling task result: {handler_ex}")
             self._deps_identified_for_next_step = []; self._last_execution_error = None; self._code_to_correct = None; self._correction_attempts = 0; self._last_error_line = None; self._missing_module_name = None; self._pending_install_deps = []
             next_phase = TASK_IDLE
 
         finally:
             # Stocke la prochaine phase pour _on_thread_finished
             self._next_logical_phase_after_result = next_phase
-            print(f"Handler finished processing result for '{task_type}'. Next logical phase stored as: '{next_phase}'")
+            logger.debug("Handler finished processing result for '%s'. Next logical phase stored as: '%s'", task_type, next_phase)
 
 
     # ----------------------------------------------------------------------
     # --- Gestion de l'État de l'UI ---
     # ----------------------------------------------------------------------
 
+    def schedule_ui_state_update(self):
+        """Demande un rafraîchissement de l'état des widgets (set_ui_enabled) au prochain passage de la boucle d'événements."""
+        self._ui_state_timer.start()
+
+    def _refresh_ui_state(self):
+        # État lu au déclenchement: une tâche lancée entre-temps laisse l'UI désactivée
+        self.set_ui_enabled(not self._is_busy, self._current_task_phase if self._is_busy else None)
+
     def set_ui_enabled(self, enabled: bool, current_task: Optional[str] = None):
         """Active ou désactive les widgets de l'UI en fonction de l'état."""
         mw = self.main_window
-        llm_ok = self.llm_client is not None and self.llm_client.is_available()
+        llm_ok = self.llm_client is not None and self._llm_ok
         is_project_loaded = self.current_project is not None
 
         # --- Contrôles généraux ---
@@ -754,10 +1001,10 @@ class GuiActionsHandler:
 
         # --- Curseur & Statut ---
         if not enabled:
-            if QApplication.overrideCursor() is None: QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+            if not self._cursor_override: QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor); self._cursor_override = True
             self.log_to_status(f"Busy: {current_task or self._current_task_phase}...")
         else:
-            if QApplication.overrideCursor() is not None: QApplication.restoreOverrideCursor()
+            if self._cursor_override: QApplication.restoreOverrideCursor(); self._cursor_override = False
             if self._current_task_phase == TASK_IDLE:
                 backend_name = self.llm_client.get_backend_name() if llm_ok else "N/A"; conn_status = 'Connected' if llm_ok else 'Not Connected'
                 if self.llm_client and not llm_ok and not isinstance(self.llm_client, Exception): conn_status = 'Connection Error'
@@ -770,45 +1017,58 @@ class GuiActionsHandler:
     # --- Journalisation & Mises à jour UI (inchangé) ---
     # ----------------------------------------------------------------------
     def _handle_worker_log(self, message: str, source: str):
-        if source == 'console': self.log_to_console(message)
+        if source == 'console': self.log_to_console(message) # Même tampon que la sortie du script: l'ordre est conservé
         elif source == 'status': self.log_to_status(message)
-        else: print(f"Unknown log source: {source} - Msg: {message}"); self.log_to_console(f"[Unknown Log: {source}] {message}")
+        else: logger.warning("Unknown log source: %s - Msg: %s", source, message); self.log_to_console(f"[Unknown Log: {source}] {message}")
+
+    def _buffer_console_line(self, stream: str, line: str):
+        self._console_sink.write(line)
+
+    def flush_logs(self):
+        self._status_sink.flush(); self._console_sink.flush()
 
     def log_to_console(self, message: str):
-        mw = self.main_window; mw.execution_log_text.append(str(message)); mw.execution_log_text.verticalScrollBar().setValue(mw.execution_log_text.verticalScrollBar().maximum()); print(f"CONSOLE_LOG: {message}")
+        self._console_sink.write(str(message)); logger.debug("CONSOLE_LOG: %s", message)
 
     def log_to_status(self, message: str):
-        mw = self.main_window; mw.status_log_text.append(str(message)); mw.status_log_text.verticalScrollBar().setValue(mw.status_log_text.verticalScrollBar().maximum()); print(f"STATUS_LOG: {message}")
+        self._status_sink.write(str(message)); logger.debug("STATUS_LOG: %s", message)
 
     # ----------------------------------------------------------------------
     # --- Slots pour config LLM & Dev Mode (inchangé) ---
     # ----------------------------------------------------------------------
+    def on_uv_check_finished(self, uv_check: Optional[subprocess.CompletedProcess]):
+        """Affiche le résultat de la vérification 'uv' lancée en arrière-plan au démarrage."""
+        if uv_check is not None and uv_check.returncode == 0:
+            self.log_to_status(f"uv found: {uv_check.stdout.strip() or uv_check.stderr.strip()}"); return
+        self.log_to_status("! WARNING: 'uv' command failed or not found. Venv and dependency management will fail.")
+        QMessageBox.warning(self.main_window, "uv Not Found", "The 'uv' command failed or was not found.\nVirtual environment and dependency management will fail.\n\nPlease install uv: https://github.com/astral-sh/uv")
+
     def on_llm_backend_changed(self, new_backend: str):
-        print(f"LLM Backend selection changed to: {new_backend}"); self.main_window.update_llm_ui_for_backend()
-        if self.llm_client and self.llm_client.get_backend_name() != new_backend: self.log_to_status(f"Backend changed to {new_backend}. Resetting connection status."); self.llm_client = None; self.main_window.llm_status_label.setText("LLM: Backend Changed"); self.main_window.llm_status_label.setStyleSheet("color: orange;"); self.set_ui_enabled(self._current_task_phase == TASK_IDLE)
-        print("Attempting connection due to backend change..."); self.attempt_llm_connection()
+        logger.debug("LLM Backend selection changed to: %s", new_backend); self.main_window.update_llm_ui_for_backend()
+        if self.llm_client and self.llm_client.get_backend_name() != new_backend: self.log_to_status(f"Backend changed to {new_backend}. Resetting connection status."); self.llm_client = None; self._llm_ok = False; self.main_window.llm_status_label.setText("LLM: Backend Changed"); self.main_window.llm_status_label.setStyleSheet("color: orange;"); self.schedule_ui_state_update()
+        logger.debug("Attempting connection due to backend change..."); self.attempt_llm_connection()
 
     def on_llm_config_changed(self):
         sender_widget = self.main_window.sender(); config_value_changed = False
-        if not sender_widget: print("Warning: on_llm_config_changed called without a specific sender widget."); return
-        widget_name = sender_widget.objectName() if sender_widget.objectName() else type(sender_widget).__name__; print(f"LLM configuration parameter potentially changed (signal from: {widget_name}).")
+        if not sender_widget: logger.warning("on_llm_config_changed called without a specific sender widget."); return
+        widget_name = sender_widget.objectName() if sender_widget.objectName() else type(sender_widget).__name__; logger.debug("LLM configuration parameter potentially changed (signal from: %s).", widget_name)
         if sender_widget == self.main_window.gemini_api_key_input: current_key = self.main_window.gemini_api_key_input.text(); config_manager.set_api_key(current_key); self.log_to_status("API Key updated in config (if changed)."); config_value_changed = True
         elif sender_widget == self.main_window.gemini_model_selector: current_model = self.main_window.gemini_model_selector.currentText(); config_manager.set_last_used_gemini_model(current_model); self.log_to_status(f"Gemini model selection updated to {current_model} in config (if changed)."); config_value_changed = True
         elif sender_widget == self.main_window.llm_ip_input or sender_widget == self.main_window.llm_port_input: current_ip = self.main_window.llm_ip_input.text().strip(); current_port_str = self.main_window.llm_port_input.text().strip(); config_manager.set_last_used_lmstudio_details(current_ip, current_port_str); self.log_to_status(f"LM Studio details updated to {current_ip}:{current_port_str} in config (if changed)."); config_value_changed = True
-        if config_value_changed: print("Attempting connection due to config parameter change..."); self.attempt_llm_connection()
+        if config_value_changed: logger.debug("Attempting connection due to config parameter change..."); self.attempt_llm_connection()
 
     def toggle_dev_mode(self, checked: bool):
-        print(f"Dev mode toggled: {'ON' if checked else 'OFF'}"); self.main_window.set_dev_elements_visibility(checked)
+        logger.debug("Dev mode toggled: %s", 'ON' if checked else 'OFF'); self.main_window.set_dev_elements_visibility(checked)
 
     # ----------------------------------------------------------------------
     # --- Interaction LLM (inchangé sauf ajout log annulation) ---
     # ----------------------------------------------------------------------
     def attempt_llm_connection(self):
         # (Logique inchangée)
-        if self.thread is not None and self.thread.isRunning():
-            if self._current_task_phase != TASK_ATTEMPT_CONNECTION: print(f"Skipping connection attempt: Task '{self._current_task_phase}' is already running."); return
-            else: print("Skipping connection attempt: A connection attempt is already in progress."); return
-        selected_backend = self.main_window.llm_backend_selector.currentText(); host_ip = self.main_window.llm_ip_input.text().strip(); port_str = self.main_window.llm_port_input.text().strip(); api_key = self.main_window.gemini_api_key_input.text(); model_name = self.main_window.gemini_model_selector.currentText(); connect_args: Dict[str, Any] = {}; client_instance: Optional[BaseLLMClient] = None; connect_callable: Optional[Callable] = None; status_msg = "LLM: Preparing..."; self.llm_client = None
+        if self.worker is not None:
+            if self._current_task_phase != TASK_ATTEMPT_CONNECTION: logger.debug("Skipping connection attempt: Task '%s' is already running.", self._current_task_phase); return
+            else: logger.debug("Skipping connection attempt: A connection attempt is already in progress."); return
+        selected_backend = self.main_window.llm_backend_selector.currentText(); host_ip = self.main_window.llm_ip_input.text().strip(); port_str = self.main_window.llm_port_input.text().strip(); api_key = self.main_window.gemini_api_key_input.text(); model_name = self.main_window.gemini_model_selector.currentText(); connect_args: Dict[str, Any] = {}; client_instance: Optional[BaseLLMClient] = None; connect_callable: Optional[Callable] = None; status_msg = "LLM: Preparing..."; self.llm_client = None; self._llm_ok = False
         try:
             if selected_backend == LLM_BACKEND_LMSTUDIO: host_ip_eff = host_ip or DEFAULT_LM_STUDIO_IP; port_str_eff = port_str or str(DEFAULT_LM_STUDIO_PORT); port_val = int(port_str_eff); connect_args = {"host": host_ip_eff, "port": port_val}; client_instance = LMStudioClient(); connect_callable = client_instance.connect; status_msg = f"LLM: Connecting to LM Studio {host_ip_eff}:{port_val}..."
             elif selected_backend == LLM_BACKEND_GEMINI:
@@ -817,12 +1077,12 @@ class GuiActionsHandler:
                 if not model_name: raise ValueError("Gemini Model Name missing.")
                 connect_args = {"api_key": api_key, "model_name": model_name}; client_instance = GeminiClient(); connect_callable = client_instance.connect; status_msg = f"LLM: Connecting to Gemini ({model_name})..."
             else: raise ValueError(f"Unknown LLM backend: {selected_backend}")
-            self.main_window.llm_status_label.setText(status_msg); self.main_window.llm_status_label.setStyleSheet("color: orange;"); QApplication.processEvents(); self.llm_client = client_instance
-        except (ValueError, ConnectionError, TypeError) as e: print(f"LLM Configuration error: {e}"); self.log_to_console(f"LLM Config Error: {e}"); self.llm_client = None; self.main_window.llm_status_label.setText(f"LLM: Config Error"); self.main_window.llm_status_label.setStyleSheet("color: red;"); self.set_ui_enabled(True); return
+            self.main_window.llm_status_label.setText(status_msg); self.main_window.llm_status_label.setStyleSheet("color: orange;"); self.llm_client = client_instance # Repeint au retour dans la boucle d'événements (connexion faite par le worker)
+        except (ValueError, ConnectionError, TypeError) as e: logger.warning("LLM Configuration error: %s", e); self.log_to_console(f"LLM Config Error: {e}"); self.llm_client = None; self.main_window.llm_status_label.setText(f"LLM: Config Error"); self.main_window.llm_status_label.setStyleSheet("color: red;"); self.set_ui_enabled(True); return
         if connect_callable and self.llm_client:
-            print(f"Starting LLM connection worker for {selected_backend}..."); started = self.start_worker(task_type=TASK_ATTEMPT_CONNECTION, task_callable=connect_callable, **connect_args)
-            if not started: print("Failed to start the connection worker (already busy?)."); self.llm_client = None; self.main_window.llm_status_label.setText(f"LLM: Failed (Busy?)"); self.main_window.llm_status_label.setStyleSheet("color: red;"); self._current_task_phase = TASK_IDLE; self.set_ui_enabled(True) # Reset si start échoue
-        else: print("Internal error: connect_callable or client_instance missing."); self.llm_client = None; self.main_window.llm_status_label.setText(f"LLM: Internal Error"); self.main_window.llm_status_label.setStyleSheet("color: red;"); self.set_ui_enabled(True)
+            logger.debug("Starting LLM connection worker for %s...", selected_backend); started = self.start_worker(task_type=TASK_ATTEMPT_CONNECTION, task_callable=connect_callable, **connect_args)
+            if not started: logger.warning("Failed to start the connection worker (already busy?)."); self.llm_client = None; self.main_window.llm_status_label.setText(f"LLM: Failed (Busy?)"); self.main_window.llm_status_label.setStyleSheet("color: red;"); self._current_task_phase = TASK_IDLE; self.set_ui_enabled(True) # Reset si start échoue
+        else: logger.error("Internal error: connect_callable or client_instance missing."); self.llm_client = None; self.main_window.llm_status_label.setText(f"LLM: Internal Error"); self.main_window.llm_status_label.setStyleSheet("color: red;"); self.set_ui_enabled(True)
 
     # ----------------------------------------------------------------------
     # --- Interaction Chat (inchangé) ---
@@ -832,22 +1092,39 @@ class GuiActionsHandler:
         if self._is_busy: QMessageBox.warning(self.main_window, "Busy", f"Cannot send request while task '{self._current_task_phase}' is running."); return
         user_request = self.main_window.chat_input_text.text().strip();
         if not self.current_project: QMessageBox.warning(self.main_window, "No Project Selected", "Select or create a project first."); return
-        if not self.llm_client or not self.llm_client.is_available(): QMessageBox.warning(self.main_window, "LLM Not Ready", "LLM not connected or available. Check configuration and connection status."); return
+        if not self.llm_client or not self._llm_ok: QMessageBox.warning(self.main_window, "LLM Not Ready", "LLM not connected or available. Check configuration and connection status."); return
         if not user_request: QMessageBox.warning(self.main_window, "Input Needed", "Describe your goal or the modification you want."); return
-        self._last_user_chat_message = user_request; self.main_window.chat_input_text.clear(); self.main_window.chat_display_text.clear(); self.append_to_chat("User", user_request); self.append_to_chat("System", "(Analyzing request for dependencies...)"); QApplication.processEvents()
-        project_structure_info = self._generate_project_structure_info(); self.log_to_status(f"--- Sending request to LLM for dependency identification... ---")
-        started = self.start_worker(task_type=TASK_IDENTIFY_DEPS_FROM_REQUEST, task_callable=self.llm_client.identify_dependencies_from_request, user_prompt=user_request, project_name=self.current_project, project_structure_info=project_structure_info)
-        if not started: self.append_to_chat("System", "Error: Could not start dependency identification task (Busy?)."); self.main_window.chat_input_text.setText(user_request)
+        self._last_user_chat_message = user_request; self.main_window.chat_input_text.clear(); self.main_window.chat_display_text.clear(); self.append_to_chat("User", user_request); self.append_to_chat("System", "(Generating code and its dependency list...)"); self.main_window.chat_display_text.repaint() # Repeint ce seul widget, sans boucle d'événements imbriquée
+        # Une seule requête LLM: le code généré déclare ses dépendances (ligne '# requirements:'), lues au résultat du stream
+        project_structure_info = self._generate_project_structure_info(); self._deps_identified_for_next_step = []; self.log_to_status(f"--- Sending request to LLM for code generation... ---")
+        started = self.start_worker(task_type=TASK_GENERATE_CODE_STREAM, task_callable=self.llm_client.generate_code_stream_with_deps, user_request=user_request, project_name=self.current_project, current_code=self.main_window.code_editor_text.toPlainText(), dependencies_to_use=self._project_dependencies, project_structure_info=project_structure_info, declare_requirements=True)
+        if not started: self.append_to_chat("System", "Error: Could not start code generation task (Busy?)."); self.main_window.chat_input_text.setText(user_request)
+
+    def _chat_cursor_at_end(self) -> QTextCursor:
+        """Curseur propre au document du chat (créé une fois), placé en fin de texte: ni copie ni setTextCursor du widget."""
+        if self._chat_end_cursor is None: self._chat_end_cursor = QTextCursor(self.main_window.chat_display_text.document())
+        self._chat_end_cursor.movePosition(QTextCursor.MoveOperation.End)
+        return self._chat_end_cursor
 
     def append_to_chat(self, sender: str, message: str):
-        # (Logique inchangée)
-        chat_widget = self.main_window.chat_display_text; cursor = chat_widget.textCursor(); cursor.movePosition(QTextCursor.MoveOperation.End); chat_widget.setTextCursor(cursor);
-        if not chat_widget.toPlainText().endswith('\n\n') and chat_widget.toPlainText().strip(): chat_widget.insertHtml("<br>")
-        chat_widget.insertHtml(f"<b>{sender}:</b> "); chat_widget.insertPlainText(message.strip()); chat_widget.insertHtml("<br><br>"); chat_widget.ensureCursorVisible()
-
-    def _buffer_chat_fragment(self, fragment: str): self._chat_fragment_buffer += fragment
+        chat_widget = self.main_window.chat_display_text; document = chat_widget.document(); cursor = self._chat_cursor_at_end()
+        # Ligne vide déjà présente en fin de chat ? Lu sur les deux derniers caractères (sans copie du texte par toPlainText())
+        last = document.characterCount() - 2 # Dernier caractère avant le séparateur final du document
+        ends_with_blank_line = last >= 1 and document.characterAt(last) in _CHAT_LINE_BREAKS and document.characterAt(last - 1) in _CHAT_LINE_BREAKS
+        if not document.isEmpty() and not ends_with_blank_line: cursor.insertHtml("<br>")
+        cursor.insertHtml(f"<b>{sender}:</b> "); cursor.insertText(message.strip()); cursor.insertHtml("<br><br>")
+        scroll_bar = chat_widget.verticalScrollBar(); scroll_bar.setValue(scroll_bar.maximum())
+
+    def _buffer_chat_fragment(self, fragment: str):
+        self._chat_fragment_buffer.append(fragment)
+        if not self._chat_update_timer.isActive(): self._chat_update_timer.start() # Un seul insertText par fenêtre de STREAM_UPDATE_INTERVAL_MS
     def _process_chat_buffer(self):
-        if self._chat_fragment_buffer: chat_widget = self.main_window.chat_display_text; cursor = chat_widget.textCursor(); cursor.movePosition(QTextCursor.MoveOperation.End); chat_widget.setTextCursor(cursor); chat_widget.insertPlainText(self._chat_fragment_buffer); self._chat_fragment_buffer = ""; chat_widget.ensureCursorVisible()
+        # Insertion via un curseur propre au document (pas de copie textCursor()/setTextCursor: ni signal de sélection
+        # ni recalcul du curseur visible à chaque lot), puis défilement direct en bas
+        if not self._chat_fragment_buffer: return
+        chat_widget = self.main_window.chat_display_text
+        self._chat_cursor_at_end().insertText("".join(self._chat_fragment_buffer)); self._chat_fragment_buffer.clear()
+        scroll_bar = chat_widget.verticalScrollBar(); scroll_bar.setValue(scroll_bar.maximum())
 
     def _cleanup_llm_code_output(self, code_text: str) -> str:
         if not code_text:
@@ -855,40 +1132,25 @@ class GuiActionsHandler:
 
         code_text = code_text.strip()
 
-        # <<< CORRECTION: Initialise les variables à None >>>
-        python_match = None
-        plain_match = None
-        # --------------------------------------------------
-
-        try:
-            # Premier essai: bloc ```python ... ```
-            python_match = re.search(r"```python\s*([\s\S]+?)\s*```", code_text, re.DOTALL)
-            if python_match:
-                print("Code extracted from ```python block.")
-                return python_match.group(1).strip()
-
-            # Deuxième essai: bloc ``` ... ```
-            plain_match = re.search(r"```\s*([\s\S]+?)\s*```", code_text, re.DOTALL)
-            if plain_match:
-                print("Code extracted from plain ``` block.")
-                return plain_match.group(1).strip()
-
-            # Troisième essai: ressemble au début de code ?
-            # Utilise re.match pour chercher UNIQUEMENT au début de la chaîne
-            if re.match(r"^(import|from|def|class|#|\s)", code_text):
-                print("Warning: No fences found, assuming raw code.")
-                return code_text # Retourne le texte tel quel (après strip)
-
-            # Fallback: si rien ne correspond, retourne le texte strippé
-            print("Warning: Could not extract code using common patterns, returning original stripped text.")
-            return code_text
-
-        except Exception as e:
-            # Gère les erreurs potentielles des regex ou .group()
-            print(f"ERROR during code cleanup: {e}")
-            traceback.print_exc()
-            # Retourne le texte original en cas d'erreur de nettoyage
-            return code_text.strip() # Retourne au moins le texte strippé
+        # Un seul parcours des blocs ``` ... ```: le premier bloc ```python gagne, sinon le premier bloc simple
+        first_plain_match = None
+        for match in _CODE_FENCE_RE.finditer(code_text):
+            if match.group(1):
+                logger.debug("Code extracted from ```python block.")
+                return match.group(2).strip()
+            if first_plain_match is None: first_plain_match = match
+        if first_plain_match:
+            logger.debug("Code extracted from plain ``` block.")
+            return first_plain_match.group(2).strip()
+
+        # Pas de bloc: ressemble au début de code ? (match: UNIQUEMENT au début de la chaîne)
+        if _RAW_CODE_START_RE.match(code_text):
+            logger.debug("No fences found, assuming raw code.")
+            return code_text # Retourne le texte tel quel (après strip)
+
+        # Fallback: si rien ne correspond, retourne le texte strippé
+        logger.debug("Could not extract code using common patterns, returning original stripped text.")
+        return code_text
 
     # ----------------------------------------------------------------------
     # --- Actions Gestion Projet (inchangé sauf activation boutons) ---
@@ -898,32 +1160,33 @@ class GuiActionsHandler:
         """Charge et affiche la liste des projets."""
         # N'empêche le chargement que si une tâche AUTRE que la connexion est en cours.
         if self._current_task_phase not in [TASK_IDLE, TASK_ATTEMPT_CONNECTION]:
-            print(f"Busy with task '{self._current_task_phase}', skipping project list load")
+            logger.debug("Busy with task '%s', skipping project list load", self._current_task_phase)
             return
 
         mw = self.main_window
         mw.project_list_widget.blockSignals(True)
         mw.project_list_widget.clear() # <<<=== DÉPLACÉ ICI
+        self._project_row_index = {}
 
         try:
             projects = project_manager.list_projects()
-            print(f"[Handler] Projects found by project_manager: {projects}")
+            logger.debug("[Handler] Projects found by project_manager: %s", projects)
             if projects:
-                 print(f"[Handler] Adding items to QListWidget: {projects}")
+                 logger.debug("[Handler] Adding items to QListWidget: %s", projects)
                  mw.project_list_widget.addItems(projects)
                  mw.project_list_widget.setEnabled(True)
-                 if self.current_project and self.current_project in projects:
-                     items = mw.project_list_widget.findItems(self.current_project, Qt.MatchFlag.MatchExactly)
-                     if items:
-                         mw.project_list_widget.setCurrentItem(items[0])
+                 self._project_row_index = {name: row for row, name in enumerate(projects)} # Sélection par ligne, sans parcourir la liste
+                 current_row = self._project_row_index.get(self.current_project) if self.current_project else None
+                 if current_row is not None:
+                     mw.project_list_widget.setCurrentRow(current_row)
             else:
-                 print("[Handler] No projects found or list empty.")
+                 logger.debug("[Handler] No projects found or list empty.")
                  item = QListWidgetItem("No projects found")
                  item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsSelectable)
                  mw.project_list_widget.addItem(item)
                  mw.project_list_widget.setEnabled(True)
         except Exception as e:
-            print(f"[Handler] Error loading project list: {e}")
+            logger.error("[Handler] Error loading project list: %s", e)
             self.log_to_console(f"Error loading project list:\n{traceback.format_exc()}")
             # Ne pas ajouter l'item d'erreur si la liste est déjà vide
             if mw.project_list_widget.count() == 0:
@@ -941,49 +1204,112 @@ class GuiActionsHandler:
         if is_valid_selection: project_name = current_item.text()
         # Activation boutons (déplacé vers set_ui_enabled)
         if self._current_task_phase not in [TASK_IDLE, TASK_ATTEMPT_CONNECTION]:
-            if is_valid_selection and self.current_project != project_name: print(f"Busy with task '{self._current_task_phase}', cannot switch project to {project_name}."); mw.project_list_widget.blockSignals(True); mw.project_list_widget.setCurrentItem(previous_item); mw.project_list_widget.blockSignals(False); QMessageBox.warning(mw, "Busy", f"Cannot switch project while task '{self._current_task_phase}' is running.")
+            if is_valid_selection and self.current_project != project_name: logger.debug("Busy with task '%s', cannot switch project to %s.", self._current_task_phase, project_name); mw.project_list_widget.blockSignals(True); mw.project_list_widget.setCurrentItem(previous_item); mw.project_list_widget.blockSignals(False); QMessageBox.warning(mw, "Busy", f"Cannot switch project while task '{self._current_task_phase}' is running.")
             return
         if not is_valid_selection:
             if self.current_project: self.clear_project_view()
         elif self.current_project != project_name:
-            self.current_project = project_name; mw.setWindowTitle(f"Pythautom - {project_name}"); print(f"Loading project: {project_name}"); self.clear_project_view_content(); self.log_to_status(f"--- Project '{project_name}' loaded ---"); self.reload_project_data(load_dependencies=True); self._last_user_chat_message = ""; self._pending_install_deps = []; self._deps_identified_for_next_step = []; self._code_to_correct = None; self._last_execution_error = None; self._correction_attempts = 0
-        self.set_ui_enabled(self._current_task_phase in [TASK_IDLE, TASK_ATTEMPT_CONNECTION]) # Met à jour état UI
+            self._project_info_cache.pop(project_name, None) # Projet (re)chargé: chemin et venv revérifiés au prochain lancement
+            self.current_project = project_name; mw.setWindowTitle(f"Pythautom - {project_name}[*]"); logger.debug("Loading project: %s", project_name); self.clear_project_view_content(); self.log_to_status(f"--- Project '{project_name}' loaded ---"); self.reload_project_data(load_dependencies=True); self._last_user_chat_message = ""; self._pending_install_deps = []; self._deps_identified_for_next_step = []; self._code_to_correct = None; self._last_execution_error = None; self._correction_attempts = 0
+        self.schedule_ui_state_update() # Met à jour état UI
 
     def reload_project_data(self, update_editor=True, load_dependencies=False):
-        # (Logique inchangée)
-        if not self.current_project: return; print(f"[GUI Handler] Reloading data for '{self.current_project}'. Editor={update_editor}, Deps={load_dependencies}")
+        if not self.current_project:
+            return
+        logger.debug("[GUI Handler] Reloading data for '%s'. Editor=%s, Deps=%s", self.current_project, update_editor, load_dependencies)
         if update_editor:
-            try: code = project_manager.get_project_script_content(self.current_project); self.main_window.code_editor_text.setPlainText(code if code is not None else f"# Failed to read {DEFAULT_MAIN_SCRIPT}")
-            except Exception as e: err_msg = f"# Error loading script: {e}"; self.main_window.code_editor_text.setPlainText(err_msg); self.log_to_console(f"Error loading script: {e}")
+            editor = self.main_window.code_editor_text
+            try:
+                code = project_manager.get_project_script_content(self.current_project)
+                if code is None:
+                    code = f"# Failed to read {DEFAULT_MAIN_SCRIPT}"
+                if code != editor.toPlainText(): # Contenu identique: ni mise en page, ni repaint, historique d'annulation conservé
+                    with _suspend_updates(editor):
+                        editor.setPlainText(code)
+                editor.document().setModified(False) # Éditeur aligné sur le disque
+                self._saved_code_hash = hash(code)
+            except Exception as e:
+                self._saved_code_hash = None
+                with _suspend_updates(editor):
+                    editor.setPlainText(f"# Error loading script: {e}")
+                self.log_to_console(f"Error loading script: {e}")
         if load_dependencies:
-            try: metadata = project_manager.load_project_metadata(self.current_project); self._project_dependencies = metadata.get("dependencies", []) ; self.log_to_console(f"Loaded dependencies from metadata: {self._project_dependencies}")
-            except Exception as e: self._project_dependencies = []; self.log_to_console(f"Error loading dependencies from metadata for {self.current_project}: {e}")
+            try:
+                metadata = project_manager.load_project_metadata(self.current_project)
+                self._project_dependencies = metadata.get("dependencies", [])
+                self.log_to_console(f"Loaded dependencies from metadata: {self._project_dependencies}")
+            except Exception as e:
+                self._project_dependencies = []
+                self.log_to_console(f"Error loading dependencies from metadata for {self.current_project}: {e}")
 
     def clear_project_view_content(self):
-        # (Logique inchangée)
-        mw = self.main_window; print("Clearing project view content..."); mw.code_editor_text.clear(); mw.status_log_text.clear(); mw.execution_log_text.clear(); mw.chat_display_text.clear(); mw.chat_input_text.clear()
+        mw = self.main_window
+        logger.debug("Clearing project view content...")
+        self._saved_code_hash = None
+        self._status_sink.discard()
+        self._console_sink.discard()
+        with _suspend_updates(mw.code_editor_text, mw.status_log_text, mw.execution_log_text, mw.chat_display_text):
+            mw.code_editor_text.clear()
+            mw.status_log_text.clear()
+            mw.execution_log_text.clear()
+            mw.chat_display_text.clear()
+            mw.chat_input_text.clear()
 
     def clear_project_view(self):
-        # (Logique inchangée)
-        mw = self.main_window; print("Clearing project view completely..."); self.current_project = None; mw.setWindowTitle("Pythautom - AI Python Project Builder"); self.clear_project_view_content(); self._current_task_phase = TASK_IDLE; self._last_user_chat_message = ""; self._project_dependencies = []; self._pending_install_deps = []; self._deps_identified_for_next_step = []; self._code_to_correct = None; self._last_execution_error = None; self._correction_attempts = 0; self.set_ui_enabled(True)
+        mw = self.main_window
+        logger.debug("Clearing project view completely...")
+        with _suspend_updates(mw): # Titre et zones de texte: un seul repaint de la fenêtre
+            self.current_project = None
+            mw.setWindowTitle("Pythautom - AI Python Project Builder")
+            self.clear_project_view_content()
+            self._current_task_phase = TASK_IDLE
+            self._last_user_chat_message = ""
+            self._project_dependencies = []
+            self._pending_install_deps = []
+            self._deps_identified_for_next_step = []
+            self._code_to_correct = None
+            self._last_execution_error = None
+            self._correction_attempts = 0
+        self.schedule_ui_state_update()
 
     def create_new_project_dialog(self):
-        # (Logique inchangée)
-        if self._is_busy: QMessageBox.warning(self.main_window, "Busy", "Cannot create project while a task is running."); return
-        dialog = QDialog(self.main_window); dialog.setWindowTitle("Create New Project"); layout = QVBoxLayout(dialog); label = QLabel("Enter project name (alphanumeric, _, -):"); name_input = QLineEdit(); layout.addWidget(label); layout.addWidget(name_input); buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel); buttons.accepted.connect(dialog.accept); buttons.rejected.connect(dialog.reject); layout.addWidget(buttons)
-        if dialog.exec():
-            raw_name = name_input.text().strip(); safe_project_name = re.sub(r'[^a-zA-Z0-9_-]+', '_', raw_name).strip('_')
-            if not safe_project_name: QMessageBox.warning(self.main_window, "Invalid Name", f"Project name cannot be empty after sanitization.\nOriginal name: '{raw_name}'"); return
-            if safe_project_name != raw_name: QMessageBox.information(self.main_window, "Name Sanitized", f"Project name was sanitized to:\n'{safe_project_name}'")
-            if safe_project_name in ['.', '..']: QMessageBox.warning(self.main_window, "Invalid Name", f"Project name cannot be '.' or '..'."); return
-            print(f"Attempting to create project: '{safe_project_name}'")
-            try:
-                if project_manager.create_project(safe_project_name):
-                    self.log_to_console(f"Project '{safe_project_name}' created."); self.load_project_list(); items = self.main_window.project_list_widget.findItems(safe_project_name, Qt.MatchFlag.MatchExactly)
-                    if items: self.main_window.project_list_widget.setCurrentItem(items[0])
-                    else: print(f"Warning: Could not find newly created project '{safe_project_name}' in list after refresh."); self.clear_project_view()
-                else: QMessageBox.critical(self.main_window, "Error", f"Failed to create project '{safe_project_name}'. It might already exist or creation failed (check logs).")
-            except Exception as e: QMessageBox.critical(self.main_window, "Creation Error", f"Error creating project '{safe_project_name}':\n{e}"); self.log_to_console(f"EXCEPTION during project creation:\n{traceback.format_exc()}")
+        mw = self.main_window
+        if self._is_busy:
+            QMessageBox.warning(mw, "Busy", "Cannot create project while a task is running.")
+            return
+        dialog, name_input = self._get_new_project_dialog()
+        name_input.clear()
+        name_input.setFocus()
+        if not dialog.exec():
+            return
+        safe_project_name = name_input.text() # Déjà restreint à _PROJECT_NAME_INPUT_PATTERN par le validateur
+        if not safe_project_name:
+            QMessageBox.warning(mw, "Invalid Name", "Project name cannot be empty.")
+            return
+        logger.debug("Attempting to create project: '%s'", safe_project_name)
+        try:
+            if not project_manager.create_project(safe_project_name):
+                QMessageBox.critical(mw, "Error", f"Failed to create project '{safe_project_name}'. It might already exist or creation failed (check logs).")
+                return
+            self._project_info_cache.pop(safe_project_name, None) # Nom éventuellement réutilisé après une suppression
+            self.log_to_console(f"Project '{safe_project_name}' created.")
+            self.load_project_list()
+            row = self._project_row_index.get(safe_project_name)
+            if row is not None:
+                mw.project_list_widget.setCurrentRow(row)
+            else:
+                logger.warning("Could not find newly created project '%s' in list after refresh.", safe_project_name)
+                self.clear_project_view()
+        except Exception as e:
+            QMessageBox.critical(mw, "Creation Error", f"Error creating project '{safe_project_name}':\n{e}")
+            self.log_to_console(f"EXCEPTION during project creation:\n{traceback.format_exc()}")
+
+    def _get_new_project_dialog(self) -> Tuple[QDialog, QLineEdit]:
+        """Dialogue de saisie du nom de projet, construit au premier appel puis conservé (caché) entre deux utilisations."""
+        if self._new_project_dialog is None:
+            dialog = QDialog(self.main_window); dialog.setWindowTitle("Create New Project"); layout = QVBoxLayout(dialog); label = QLabel("Enter project name (alphanumeric, _, -):"); name_input = QLineEdit(); name_input.setValidator(QRegularExpressionValidator(QRegularExpression(_PROJECT_NAME_INPUT_PATTERN), name_input)); layout.addWidget(label); layout.addWidget(name_input); buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel); buttons.accepted.connect(dialog.accept); buttons.rejected.connect(dialog.reject); layout.addWidget(buttons)
+            self._new_project_dialog = dialog; self._new_project_name_input = name_input
+        return self._new_project_dialog, self._new_project_name_input
 
     def confirm_delete_project(self):
         # (Logique inchangée)
@@ -996,64 +1322,133 @@ class GuiActionsHandler:
         project_path_str = "N/A";
         try: project_path_str = project_manager.get_project_path(project_name)
         except ValueError as ve: QMessageBox.critical(mw, "Error", f"Cannot resolve path for project '{project_name}': {ve}"); return
-        except Exception as e: print(f"Error resolving path for deletion: {e}"); project_path_str = f"Error resolving path: {e}"
-        reply = QMessageBox.warning(mw, "Confirm Deletion", f"Permanently delete project '{project_name}'?\nLocation: {project_path_str}\n\nTHIS CANNOT BE UNDONE.", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Cancel)
-        if reply == QMessageBox.StandardButton.Yes:
-                    print(f"Confirmed deletion for '{project_name}'.")
-                    self.log_to_status(f"--- Deleting project '{project_name}'... ---")
-                    self.set_ui_enabled(False, "Deleting project")
-                    QApplication.processEvents()
-                    deleted = False
-                    error_msg = ""
-                    try:
-                        deleted = project_manager.delete_project(project_name)
-                        if not deleted:
-                            error_msg = f"Deletion failed for '{project_name}'. Project manager reported failure."
-                            print(error_msg)
-                    except Exception as e:
-                        error_msg = f"Exception during deletion of '{project_name}': {e}"
-                        print(f"EXCEPTION during delete project:\n{traceback.format_exc()}")
-                    finally:
-                        self._current_task_phase = TASK_IDLE
-                        if deleted:
-                            self.log_to_console(f"Project '{project_name}' deleted.")
-                            self.log_to_status(f"--- Project '{project_name}' deleted. ---")
-                        if self.current_project == project_name:
-                            self.clear_project_view()
-                            self.load_project_list()
-                        else:
-                            if not error_msg:
-                                error_msg = f"Deletion failed for '{project_name}' (unknown reason)."
-                            QMessageBox.critical(mw, "Deletion Error", error_msg)
-                            self.log_to_console(error_msg)
-                            self.log_to_status(f"--- ERROR deleting '{project_name}'. ---")
-                            self.load_project_list()
-                        self.set_ui_enabled(True)
-        else:
-            self.log_to_status("Project deletion cancelled.")
+        except Exception as e: logger.error("Error resolving path for deletion: %s", e); project_path_str = f"Error resolving path: {e}"
+        # Confirmation non bloquante (open() + finished): pas de boucle d'événements imbriquée pendant que le worker émet
+        confirm_box = QMessageBox(QMessageBox.Icon.Warning, "Confirm Deletion", f"Permanently delete project '{project_name}'?\nLocation: {project_path_str}\n\nTHIS CANNOT BE UNDONE.", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.Cancel, mw)
+        confirm_box.setDefaultButton(QMessageBox.StandardButton.Cancel); confirm_box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        confirm_box.finished.connect(lambda _result: self._on_delete_confirmed(project_name, _message_box_accepted(confirm_box)))
+        confirm_box.open()
+
+    def _on_delete_confirmed(self, project_name: str, confirmed: bool):
+        if not confirmed: self.log_to_status("Project deletion cancelled."); return
+        if self._is_busy: QMessageBox.warning(self.main_window, "Busy", "Cannot delete project while a task is running."); return # Tâche lancée pendant la confirmation
+        logger.debug("Confirmed deletion for '%s'.", project_name)
+        self.log_to_status(f"--- Deleting project '{project_name}'... ---")
+        # rmtree sur le thread worker: la boucle d'événements continue de tourner pendant la suppression
+        self._project_pending_deletion = project_name
+        started = self.start_worker(task_type=TASK_DELETE_PROJECT, task_callable=project_manager.delete_project, project_name=project_name)
+        if not started: self._project_pending_deletion = None; self.log_to_status(f"! Could not start deletion of '{project_name}' (Busy?).")
+
+    def _on_project_deleted(self):
+        """Fin de TASK_DELETE_PROJECT (handler de nouveau libre): vide la vue si le projet supprimé était chargé, retire sa ligne."""
+        deleted_project = self._project_pending_deletion; self._project_pending_deletion = None
+        if deleted_project: self._project_info_cache.pop(deleted_project, None)
+        if deleted_project and self.current_project == deleted_project: self.clear_project_view()
+        if not deleted_project or not self._remove_project_row(deleted_project): self.load_project_list() # Repli: rescan complet
+
+    def _remove_project_row(self, project_name: str) -> bool:
+        """Retire la ligne du projet de la liste sans la recharger (False si la liste doit être rechargée)."""
+        mw = self.main_window; row = self._project_row_index.get(project_name)
+        if row is None or mw.project_list_widget.count() <= 1: return False # Dernier projet: la liste rechargée affiche "No projects found"
+        item = mw.project_list_widget.item(row)
+        if item is None or item.text() != project_name: return False # Index désynchronisé
+        mw.project_list_widget.blockSignals(True)
+        try:
+            was_current = mw.project_list_widget.currentRow() == row
+            mw.project_list_widget.takeItem(row)
+            if was_current: mw.project_list_widget.setCurrentRow(-1) # Pas de bascule implicite sur le projet voisin
+        finally:
+            mw.project_list_widget.blockSignals(False)
+        del self._project_row_index[project_name]
+        for name, other_row in self._project_row_index.items():
+            if other_row > row: self._project_row_index[name] = other_row - 1
+        return True
+
+    def _next_phase_for_dependencies(self, needed_deps: List[str]) -> str:
+        """Prépare l'installation des dépendances absentes du projet; renvoie TASK_INSTALL_DEPS ou TASK_IDLE."""
+        current_proj_deps_set = set(self._project_dependencies); needed_deps_set = set(needed_deps)
+        new_deps_to_install = sorted(list(needed_deps_set - current_proj_deps_set))
+        if not new_deps_to_install:
+            self.log_to_status("Dependencies identified are already met or not needed."); self.append_to_chat("System", "No new dependencies seem required for installation."); return TASK_IDLE
+        self.log_to_status(f"New dependencies require installation: {new_deps_to_install}"); self.append_to_chat("System", f"New dependencies identified and possibly needed: {new_deps_to_install}"); self._pending_install_deps = new_deps_to_install; self._project_dependencies = sorted(list(needed_deps_set.union(current_proj_deps_set))); self.update_project_metadata_deps()
+        return TASK_INSTALL_DEPS # Enchaîne vers install
+
+    def on_code_modification_changed(self, modified: bool):
+        """Indicateur [*] du titre: code de l'éditeur différent de celui sur disque."""
+        self.main_window.setWindowModified(modified)
+
+    def request_save_current_code(self):
+        """Slot du bouton Save: sauvegarde tout de suite, puis regroupe les demandes suivantes de la fenêtre en une seule."""
+        if self._save_throttle_timer.isActive(): self._save_pending = True; return
+        self.save_current_code(); self._save_throttle_timer.start()
+
+    def _on_save_throttle_timeout(self):
+        if not self._save_pending: return
+        self._save_pending = False; self.save_current_code(); self._save_throttle_timer.start()
 
     def save_current_code(self):
-        # (Logique inchangée)
-        mw = self.main_window;
-        if self._is_busy: QMessageBox.warning(mw, "Busy", "Cannot save code while a task is running."); return
-        if not self.current_project: QMessageBox.warning(mw, "No Project Loaded", "Select a project to save code."); return
-        code = mw.code_editor_text.toPlainText(); print(f"[GUI Handler] Attempting to save code for '{self.current_project}'. Length: {len(code)}")
-        try:
-            if project_manager.save_project_script_content(self.current_project, code): self.log_to_console(f"Code saved for project '{self.current_project}'."); self.log_to_status("Code saved.")
-            else: QMessageBox.critical(mw, "Save Error", f"Failed to save code for '{self.current_project}'. Check logs.")
-        except Exception as e: print(f"EXCEPTION during save: {e}"); self.log_to_console(traceback.format_exc()); QMessageBox.critical(mw, "Save Error", f"Error saving code:\n{e}")
+        mw = self.main_window
+        if self._save_in_flight:
+            self._save_queued = True; return # Rejouée par _on_save_finished avec le texte d'alors
+        if self._is_busy:
+            QMessageBox.warning(mw, "Busy", "Cannot save code while a task is running.")
+            return
+        if not self.current_project:
+            QMessageBox.warning(mw, "No Project Loaded", "Select a project to save code.")
+            return
+        document = mw.code_editor_text.document()
+        # Instantané du texte pris dans le thread GUI: le QTextDocument ne peut pas être lu depuis le pool
+        code = mw.code_editor_text.toPlainText()
+        # Comparé au dernier contenu connu du disque: isModified() seul ignore les setPlainText programmatiques
+        code_hash = hash(code)
+        if code_hash == self._saved_code_hash:
+            document.setModified(False) # Modifications annulées à la main: le texte est de nouveau celui du disque
+            self.log_to_status("No changes to save.")
+            return
+        logger.debug("[GUI Handler] Attempting to save code for '%s'. Length: %s", self.current_project, len(code))
+        # Écriture (fsync + renommage atomique) sur io_pool, sans passer par start_worker: l'éditeur reste utilisable
+        self._save_in_flight = True; self._saving_code_hash = code_hash
+        self.io_pool.start(_SaveRunnable(self._worker_signals, self.current_project, code, document.revision()))
+
+    def _on_save_finished(self, project_name: str, revision: int, result: Any):
+        """Fin d'une sauvegarde (thread GUI): message dans les logs, boîte d'erreur seulement en cas d'échec."""
+        self._save_in_flight = False
+        if result is True:
+            document = self.main_window.code_editor_text.document()
+            # Texte modifié pendant l'écriture (ou autre projet chargé): le disque n'a pas la version affichée
+            if project_name == self.current_project:
+                self._saved_code_hash = self._saving_code_hash
+                if document.revision() == revision: document.setModified(False)
+            self.log_to_console(f"Code saved for project '{project_name}'."); self.log_to_status("Code saved.")
+        else:
+            error_msg = f"Error saving code:\n{result}" if isinstance(result, Exception) else f"Failed to save code for '{project_name}'. Check logs."
+            logger.error(error_msg); self.log_to_status(f"! Save failed for '{project_name}'."); _show_message(self.main_window, QMessageBox.Icon.Critical, "Save Error", error_msg)
+        if self._save_queued:
+            self._save_queued = False; self.save_current_code()
 
     def run_current_project_script(self, called_from_chain: bool = False):
-        # (Logique inchangée)
-        mw = self.main_window;
-        if not called_from_chain and self._is_busy: QMessageBox.warning(mw, "Busy", f"Cannot run script while task '{self._current_task_phase}' is running."); return
-        if not self.current_project: QMessageBox.warning(mw, "No Project", "Select project"); return
-        script_name = DEFAULT_MAIN_SCRIPT;
-        try: project_path = project_manager.get_project_path(self.current_project)
-        except Exception as e: QMessageBox.critical(mw, "Error", f"Cannot run script: {e}"); return
-        self.log_to_console(f"\n--- Running script: {self.current_project}/{script_name} ---"); self.log_to_status(f"Running {script_name}...")
-        started = self.start_worker(task_type=TASK_RUN_SCRIPT, task_callable=utils.run_project_script, project_path=project_manager.get_project_path(self.current_project), script_name=script_name)
-        if not started: self.log_to_console("--- Could not start script execution. Reverting. ---")
+        mw = self.main_window
+        if not called_from_chain and self._is_busy:
+            QMessageBox.warning(mw, "Busy", f"Cannot run script while task '{self._current_task_phase}' is running.")
+            return
+        if not self.current_project:
+            QMessageBox.warning(mw, "No Project", "Select project")
+            return
+        script_name = DEFAULT_MAIN_SCRIPT
+        project_info = self._project_info_cache.get(self.current_project)
+        if project_info is None:
+            try:
+                project_info = (project_manager.get_project_path(self.current_project), False)
+            except Exception as e:
+                QMessageBox.critical(mw, "Error", f"Cannot run script: {e}")
+                return
+            self._project_info_cache[self.current_project] = project_info
+        project_path, venv_ready = project_info
+        self.log_to_console(f"\n--- Running script: {self.current_project}/{script_name} ---")
+        self.log_to_status(f"Running {script_name}...")
+        started = self.start_worker(task_type=TASK_RUN_SCRIPT, task_callable=utils.run_project_script, project_path=project_path, script_name=script_name, venv_ready=venv_ready)
+        if not started:
+            self.log_to_console("--- Could not start script execution. Reverting. ---")
 
     # def start_correction_worker(self): # Remplacé par l'enchaînement direct vers STREAM
     #     pass
@@ -1065,18 +1460,27 @@ class GuiActionsHandler:
         mw = self.main_window;
         if self._is_busy: QMessageBox.warning(mw, "Busy", "Cannot export now."); return
         if not self.current_project: QMessageBox.warning(mw, "No Project", "Select project"); return
-        current_os = platform.system(); reply = QMessageBox.question(mw, "Confirm Export", f"Export '{self.current_project}' as executable for {current_os}?\n(Uses PyInstaller, can take time)", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.Yes)
-        if reply == QMessageBox.StandardButton.No: self.log_to_status("Executable export cancelled."); return
-        default_filename = f"{self.current_project}_{current_os.lower()}.zip"; output_zip_path, _ = QFileDialog.getSaveFileName(mw, "Save Executable Bundle As", default_filename, "Zip Files (*.zip)")
+        project_name = self.current_project
+        confirm_box = QMessageBox(QMessageBox.Icon.Question, "Confirm Export", f"Export '{project_name}' as executable for {platform.system()}?\n(Uses PyInstaller, can take time)", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, mw)
+        confirm_box.setDefaultButton(QMessageBox.StandardButton.Yes); confirm_box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        confirm_box.finished.connect(lambda _result: self._on_export_confirmed(project_name, _message_box_accepted(confirm_box)))
+        confirm_box.open()
+
+    def _on_export_confirmed(self, project_name: str, confirmed: bool):
+        mw = self.main_window
+        if not confirmed: self.log_to_status("Executable export cancelled."); return
+        if self._is_busy or self.current_project != project_name: self.log_to_status("Executable export cancelled (state changed during confirmation)."); return
+        current_os = platform.system(); default_filename = f"{self.current_project}_{current_os.lower()}.zip"; output_zip_path, _ = QFileDialog.getSaveFileName(mw, "Save Executable Bundle As", default_filename, "Zip Files (*.zip)")
         if output_zip_path:
             if not output_zip_path.lower().endswith(".zip"): output_zip_path += ".zip"
-            print(f"Starting export '{self.current_project}' to '{output_zip_path}'"); self.log_to_status(f"--- Starting executable export... ---"); self.log_to_console(f"--- Exporting '{self.current_project}' to '{output_zip_path}' ---"); self.start_export_worker(output_zip_path)
+            logger.debug("Starting export '%s' to '%s'", self.current_project, output_zip_path); self.log_to_status(f"--- Starting executable export... ---"); self.log_to_console(f"--- Exporting '{self.current_project}' to '{output_zip_path}' ---"); self.start_export_worker(output_zip_path)
         else: self.log_to_status("Executable export cancelled.")
 
     def start_export_worker(self, output_zip_path: str):
         if not self.current_project: return
+        from . import exporter # Import différé
         started = self.start_worker(TASK_EXPORT_PROJECT, exporter.create_executable_bundle, project_name=self.current_project, output_zip_path=output_zip_path)
-        if not started: self.log_to_status("! Error starting executable export (Busy?)."); QMessageBox.critical(self.main_window, "Export Error", "Could not start export."); self._current_task_phase = TASK_IDLE; self.set_ui_enabled(True)
+        if not started: self.log_to_status("! Error starting executable export (Busy?)."); _show_message(self.main_window, QMessageBox.Icon.Critical, "Export Error", "Could not start export."); self._current_task_phase = TASK_IDLE; self.set_ui_enabled(True)
 
     def prompt_export_source_distribution(self):
         mw = self.main_window;
@@ -1085,13 +1489,14 @@ class GuiActionsHandler:
         default_filename = f"{self.current_project}_source.zip"; output_zip_path, _ = QFileDialog.getSaveFileName(mw, "Save Source Distribution As", default_filename, "Zip Files (*.zip)")
         if output_zip_path:
             if not output_zip_path.lower().endswith(".zip"): output_zip_path += ".zip"
-            print(f"Starting source export '{self.current_project}' to '{output_zip_path}'"); self.log_to_status(f"--- Starting source export... ---"); self.log_to_console(f"--- Exporting source '{self.current_project}' to '{output_zip_path}' ---"); self.start_source_export_worker(output_zip_path)
+            logger.debug("Starting source export '%s' to '%s'", self.current_project, output_zip_path); self.log_to_status(f"--- Starting source export... ---"); self.log_to_console(f"--- Exporting source '{self.current_project}' to '{output_zip_path}' ---"); self.start_source_export_worker(output_zip_path)
         else: self.log_to_status("Source export cancelled.")
 
     def start_source_export_worker(self, output_zip_path: str):
         if not self.current_project: return
+        from . import exporter # Import différé
         started = self.start_worker(TASK_EXPORT_SOURCE, exporter.create_source_distribution, project_name=self.current_project, output_zip_path=output_zip_path)
-        if not started: self.log_to_status("! Error starting source export (Busy?)."); QMessageBox.critical(self.main_window, "Export Error", "Could not start source export."); self._current_task_phase = TASK_IDLE; self.set_ui_enabled(True)
+        if not started: self.log_to_status("! Error starting source export (Busy?)."); _show_message(self.main_window, QMessageBox.Icon.Critical, "Export Error", "Could not start source export."); self._current_task_phase = TASK_IDLE; self.set_ui_enabled(True)
 
     # ----------------------------------------------------------------------
     # --- Installation Manuelle & Sauvegarde Logs (inchangé) ---
@@ -1111,7 +1516,7 @@ class GuiActionsHandler:
             started = self.start_worker(task_type=TASK_INSTALL_DEPS, task_callable=utils.install_project_dependencies, project_path=project_path, dependencies=dependencies_to_install)
             if started: mw.install_deps_input.clear()
             else: self.log_to_status("! Failed to start dependency installation worker.")
-        except Exception as e: error_msg = f"Error preparing manual dependency install: {e}"; print(error_msg); self.log_to_console(f"--- ERROR preparing install: {error_msg} ---"); traceback.print_exc(); QMessageBox.critical(mw, "Install Error", error_msg)
+        except Exception as e: error_msg = f"Error preparing manual dependency install: {e}"; logger.error(error_msg, exc_info=True); self.log_to_console(f"--- ERROR preparing install: {error_msg} ---"); QMessageBox.critical(mw, "Install Error", error_msg)
 
     def save_logs_to_file(self):
         mw = self.main_window;
@@ -1119,11 +1524,11 @@ class GuiActionsHandler:
         ts = utils.get_timestamp().replace(":", "-").replace(".", "-"); default_filename = f"pythautom_logs_{ts}.log"; log_file_path, _ = QFileDialog.getSaveFileName(mw, "Save Logs As", default_filename, "Log Files (*.log);;Text Files (*.txt);;All Files (*)")
         if log_file_path:
             try:
-                status_log_content = mw.status_log_text.toPlainText(); execution_log_content = mw.execution_log_text.toPlainText();
+                self.flush_logs(); status_log_content = mw.status_log_text.toPlainText(); execution_log_content = mw.execution_log_text.toPlainText();
                 full_log_content = f"=== STATUS ===\n{status_log_content}\n\n=== EXECUTION/OTHER ===\n{execution_log_content}\n=== END ==="
                 with open(log_file_path, 'w', encoding='utf-8') as f: f.write(full_log_content)
                 self.log_to_status(f"Logs saved successfully to '{os.path.basename(log_file_path)}'."); QMessageBox.information(mw, "Logs Saved", f"Logs successfully saved to:\n{log_file_path}")
-            except Exception as e: error_msg = f"Error saving logs to '{log_file_path}': {e}"; print(error_msg); traceback.print_exc(); QMessageBox.critical(mw, "Save Error", error_msg); self.log_to_status(f"! Error saving logs: {e}")
+            except Exception as e: error_msg = f"Error saving logs to '{log_file_path}': {e}"; logger.error(error_msg, exc_info=True); QMessageBox.critical(mw, "Save Error", error_msg); self.log_to_status(f"! Error saving logs: {e}")
         else: self.log_to_status("Log saving cancelled by user.")
 
     # ----------------------------------------------------------------------
@@ -1131,8 +1536,8 @@ class GuiActionsHandler:
     # ----------------------------------------------------------------------
     def update_project_metadata_deps(self):
         if not self.current_project: return
-        try: metadata = project_manager.load_project_metadata(self.current_project); metadata["dependencies"] = sorted(list(set(self._project_dependencies))); project_manager.save_project_metadata(self.current_project, metadata); print(f"Updated metadata dependencies for {self.current_project}: {metadata['dependencies']}"); self.log_to_console(f"Project metadata updated with dependencies: {metadata['dependencies']}")
-        except Exception as e: msg = f"Warning: Failed to update project metadata dependencies for '{self.current_project}': {e}"; print(msg); self.log_to_console(msg)
+        try: metadata = project_manager.load_project_metadata(self.current_project); metadata["dependencies"] = sorted(list(set(self._project_dependencies))); project_manager.save_project_metadata(self.current_project, metadata); logger.debug("Updated metadata dependencies for %s: %s", self.current_project, metadata['dependencies']); self.log_to_console(f"Project metadata updated with dependencies: {metadata['dependencies']}")
+        except Exception as e: msg = f"Warning: Failed to update project metadata dependencies for '{self.current_project}': {e}"; logger.warning(msg); self.log_to_console(msg)
 
     def add_file_to_project(self):
         if self._is_busy: QMessageBox.warning(self.main_window, "Busy", "Cannot add file now."); return
@@ -1147,23 +1552,36 @@ class GuiActionsHandler:
         if folder_path: self._copy_item_to_project(folder_path, is_directory=True)
 
     def _copy_item_to_project(self, source_path: str, is_directory: bool):
-        # (Logique inchangée)
         if not self.current_project: return
         try:
-            project_path = project_manager.get_project_path(self.current_project); item_name = os.path.basename(source_path); destination_path = os.path.join(project_path, item_name);
-            if os.path.exists(destination_path):
-                reply = QMessageBox.question(self.main_window, "Confirm Overwrite", f"'{item_name}' exists. Overwrite?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
-                if reply == QMessageBox.StandardButton.No: self.log_to_status(f"Skipped adding '{item_name}'."); return
-                else: 
-                    try: (shutil.rmtree if os.path.isdir(destination_path) else os.remove)(destination_path); self.log_to_console(f"Overwriting existing: {item_name}") 
-                    except Exception as rm_err: QMessageBox.critical(self.main_window, "Error", f"Could not remove existing '{item_name}':\n{rm_err}"); return
-            import fnmatch; should_exclude = any(fnmatch.fnmatch(item_name, pattern) for pattern in project_manager.EXCLUDE_PATTERNS_FOR_LISTING);
-            if should_exclude: QMessageBox.warning(self.main_window, "Cannot Add", f"'{item_name}' matches an exclusion pattern."); self.log_to_status(f"Skipped excluded item: {item_name}"); return
-            self.log_to_status(f"Copying '{item_name}' to project '{self.current_project}'..."); QApplication.processEvents()
-            if is_directory: shutil.copytree(source_path, destination_path, dirs_exist_ok=True)
-            else: shutil.copy2(source_path, destination_path)
+            project_path = project_manager.get_project_path(self.current_project); item_name = os.path.basename(source_path); destination_path = os.path.join(project_path, item_name)
+        except ValueError as e: QMessageBox.critical(self.main_window, "Error", f"Cannot get project path: {e}"); return
+        import fnmatch; should_exclude = any(fnmatch.fnmatch(item_name, pattern) for pattern in project_manager.EXCLUDE_PATTERNS_FOR_LISTING)
+        if should_exclude: QMessageBox.warning(self.main_window, "Cannot Add", f"'{item_name}' matches an exclusion pattern."); self.log_to_status(f"Skipped excluded item: {item_name}"); return
+        if not os.path.exists(destination_path): self._copy_item(source_path, destination_path, is_directory); return
+        # Confirmation ouverte avec open(): la copie reprend dans _on_overwrite_confirmed
+        project_name = self.current_project
+        confirm_box = QMessageBox(QMessageBox.Icon.Question, "Confirm Overwrite", f"'{item_name}' exists. Overwrite?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, self.main_window)
+        confirm_box.setDefaultButton(QMessageBox.StandardButton.No); confirm_box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        confirm_box.finished.connect(lambda _result: self._on_overwrite_confirmed(project_name, source_path, destination_path, is_directory, _message_box_accepted(confirm_box)))
+        confirm_box.open()
+
+    def _on_overwrite_confirmed(self, project_name: str, source_path: str, destination_path: str, is_directory: bool, confirmed: bool):
+        item_name = os.path.basename(destination_path)
+        if not confirmed: self.log_to_status(f"Skipped adding '{item_name}'."); return
+        if self._is_busy or self.current_project != project_name: self.log_to_status(f"Skipped adding '{item_name}' (state changed during confirmation)."); return
+        try: (shutil.rmtree if os.path.isdir(destination_path) else os.remove)(destination_path); self.log_to_console(f"Overwriting existing: {item_name}")
+        except FileNotFoundError: pass # Supprimé entre-temps
+        except Exception as rm_err: QMessageBox.critical(self.main_window, "Error", f"Could not remove existing '{item_name}':\n{rm_err}"); return
+        self._copy_item(source_path, destination_path, is_directory)
+
+    def _copy_item(self, source_path: str, destination_path: str, is_directory: bool):
+        item_name = os.path.basename(destination_path)
+        try:
+            self.log_to_status(f"Copying '{item_name}' to project '{self.current_project}'..."); self._status_sink.flush(); self.main_window.status_log_text.repaint() # Message visible avant la copie (synchrone)
+            if is_directory: shutil.copytree(source_path, destination_path, dirs_exist_ok=True, copy_function=utils.fast_copy2) # Dossier choisi par l'utilisateur: copié en entier
+            else: utils.fast_copy2(source_path, destination_path)
             self.log_to_status(f"Successfully added '{item_name}' to the project."); self.log_to_console(f"Added item to project: {destination_path}")
-        except ValueError as e: QMessageBox.critical(self.main_window, "Error", f"Cannot get project path: {e}")
         except Exception as e: QMessageBox.critical(self.main_window, "Copy Error", f"Failed copy '{os.path.basename(source_path)}':\n{e}"); self.log_to_status(f"Error adding '{os.path.basename(source_path)}'."); self.log_to_console(f"EXCEPTION during copy:\n{traceback.format_exc()}")
 
     def _generate_project_structure_info(self) -> Optional[str]:
@@ -1175,21 +1593,42 @@ class GuiActionsHandler:
             structure_lines = [];
             for rel_path, item_type in contents: indent_level = rel_path.count('/'); indent = "  " * indent_level; prefix = "[D] " if item_type == 'dir' else ("[F] " if item_type == 'file' else "    "); base_name = os.path.basename(rel_path) if item_type != 'info' else "..."; structure_lines.append(f"{indent}{prefix}{base_name}")
             full_info = "\n".join(structure_lines);
-            if len(full_info) > MAX_STRUCTURE_INFO_LENGTH: print("Warning: Project structure info truncated for LLM context."); return full_info[:MAX_STRUCTURE_INFO_LENGTH] + "\n[... Structure truncated ...]"
+            if len(full_info) > MAX_STRUCTURE_INFO_LENGTH: logger.debug("Project structure info truncated for LLM context."); return full_info[:MAX_STRUCTURE_INFO_LENGTH] + "\n[... Structure truncated ...]"
             else: return full_info
-        except Exception as e: self.log_to_console(f"Error generating project structure info: {e}"); traceback.print_exc(); return f"(Error retrieving project structure: {e})"
+        except Exception as e: self.log_to_console(f"Error generating project structure info: {e}"); logger.warning("Error generating project structure info", exc_info=True); return f"(Error retrieving project structure: {e})"
 
     # ----------------------------------------------------------------------
     # --- Gestion Fermeture (inchangé) ---
     # ----------------------------------------------------------------------
     def handle_close_event(self, event):
-        # (Logique inchangée)
-        confirm_needed = self._is_busy; reply = QMessageBox.StandardButton.Yes
-        if confirm_needed: reply = QMessageBox.question(self.main_window, 'Confirm Exit', f"Task ({self._current_task_phase}) is running.\nExit now?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
-        if reply == QMessageBox.StandardButton.Yes:
-            print("Closing application...")
-            if self.thread and self.thread.isRunning() and self.worker: print("Attempting to cancel background task..."); self._was_cancelled_by_user = True; self.worker.cancel() # <<< Indique annulation à la fermeture
-            event.accept()
-        else: print("Application close cancelled."); event.ignore()
+        # Tâche en cours: fermeture refusée pour l'instant, confirmation non bloquante puis close() depuis _on_close_confirmed
+        if self._is_busy and not self._close_confirmed:
+            event.ignore()
+            if self._close_confirm_box is None:
+                box = QMessageBox(QMessageBox.Icon.Question, 'Confirm Exit', f"Task ({self._current_task_phase}) is running.\nExit now?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, self.main_window)
+                box.setDefaultButton(QMessageBox.StandardButton.No); box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+                box.finished.connect(lambda _result: self._on_close_confirmed(_message_box_accepted(box)))
+                self._close_confirm_box = box; box.open()
+            return
+        logger.debug("Closing application...")
+        if self.worker is not None: logger.debug("Attempting to cancel background task..."); self._was_cancelled_by_user = True; self.worker.cancel() # <<< Indique annulation à la fermeture
+        event.accept() # L'attente des pools se fait à aboutToQuit (_on_about_to_quit)
+
+    def _on_close_confirmed(self, confirmed: bool):
+        self._close_confirm_box = None
+        if not confirmed: logger.debug("Application close cancelled."); return
+        self._request_shutdown()
+
+    def _request_shutdown(self):
+        """Sortie confirmée: annule la tâche en cours et ferme la fenêtre quand elle a rendu la main (au plus tard après SHUTDOWN_GRACE_MS)."""
+        self._close_confirmed = True
+        if self.worker is None: QTimer.singleShot(0, self.main_window.close); return
+        logger.debug("Exit requested: cancelling task '%s' before closing.", self._current_task_phase)
+        self._close_after_task = True; self._was_cancelled_by_user = True; self.worker.cancel()
+        self.log_to_status(f"Exiting: waiting for task '{self._current_task_phase}' to stop...")
+        QTimer.singleShot(SHUTDOWN_GRACE_MS, self.main_window.close) # Tâche non annulable (script, export): fermeture quand même
+
+    def _on_about_to_quit(self):
+        self.shutdown_worker_thread(SHUTDOWN_WAIT_MS)
 
 # --- Fin de la classe GuiActionsHandler ---
\ No newline at end of file
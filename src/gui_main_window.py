@@ -3,6 +3,8 @@
 import sys
 import platform
 import os
+import re
+import logging
 from typing import Optional, List, Any
 
 from PyQt6.QtWidgets import (
@@ -12,10 +14,10 @@ from PyQt6.QtWidgets import (
     QFileDialog, QComboBox, QGroupBox, QCheckBox, QSpinBox, QSizePolicy,
     QSpacerItem, QGridLayout # Utilisation retirée pour les boutons projet, mais gardé pour LLM status
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import (
     QFont, QIntValidator, QSyntaxHighlighter, QColor,
-    QTextCharFormat, QIcon
+    QTextCharFormat, QTextBlockUserData, QIcon
 )
 
 # Import des composants nécessaires depuis les autres modules
@@ -35,37 +37,99 @@ from .gui_actions_handler import (
 )
 from .project_manager import DEFAULT_MAIN_SCRIPT
 
+logger = logging.getLogger(__name__)
+
 
 # --- Syntax Highlighting (Inchangé) ---
+_HIGHLIGHT_KEYWORDS = ["def", "class", "import", "from", "return", "if", "else", "elif", "for", "while", "try", "except", "finally", "with", "as", "in", "True", "False", "None", "self", "lambda", "yield", "pass", "continue", "break", "is", "not", "and", "or", "del", "global", "nonlocal", "assert"]
+# Types de tokens (nom du groupe, motif, couleur, gras), par priorité décroissante: à une même position, le premier
+# groupe qui correspond l'emporte, et le texte qu'il couvre n'est plus analysé (pas de mots-clés dans les chaînes/commentaires)
+_HIGHLIGHT_RULES = [
+    ("comment", r'#.*', "gray", False),
+    ("string", r'"[^"\\]*(?:\\.[^"\\]*)*"|\'[^\'\\]*(?:\\.[^\'\\]*)*\'', "lightgreen", False),
+    ("decorator", r'@[A-Za-z_][A-Za-z0-9_.]*', "magenta", False),
+    ("func", r'\b[A-Za-z_][A-Za-z0-9_]*(?=\()', "yellow", False),
+    ("keyword", r'\b(?:' + '|'.join(map(re.escape, _HIGHLIGHT_KEYWORDS)) + r')\b', "lightblue", True),
+    ("number", r'\b(?:0x[0-9A-Fa-f]+|[0-9]+)\b', "orange", False),
+]
+# Scanner unique (un groupe nommé par type de token), compilé une fois à l'import: un seul parcours de la ligne,
+# le format est choisi par match.lastgroup
+_HIGHLIGHT_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern, _, _ in _HIGHLIGHT_RULES))
+# Préfiltre: types de tokens impossibles sans un de leurs caractères déclencheurs (func/keyword n'en ont pas)
+_HIGHLIGHT_TRIGGERS = {"comment": frozenset("#"), "string": frozenset("\"'"), "decorator": frozenset("@"), "number": frozenset("0123456789")}
+# Scanners réduits aux seuls types possibles sur la ligne, compilés à la première combinaison rencontrée
+_HIGHLIGHT_SCANNERS = {frozenset(_HIGHLIGHT_TRIGGERS): _HIGHLIGHT_RE}
+
+
+def _highlight_scanner(text: str):
+    """Scanner adapté au texte: les alternatives dont aucun caractère déclencheur n'apparaît sont retirées de l'alternance."""
+    chars = set(text)
+    possible = frozenset(kind for kind, triggers in _HIGHLIGHT_TRIGGERS.items() if not chars.isdisjoint(triggers))
+    scanner = _HIGHLIGHT_SCANNERS.get(possible)
+    if scanner is None:
+        scanner = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern, _, _ in _HIGHLIGHT_RULES if name not in _HIGHLIGHT_TRIGGERS or name in possible))
+        _HIGHLIGHT_SCANNERS[possible] = scanner
+    return scanner
+
+
+class _HighlightSpans(QTextBlockUserData):
+    """Coloration calculée pour un bloc: empreinte du texte et tokens (début, longueur, type), rejoués tant que le texte ne change pas."""
+    def __init__(self, text_hash: int, spans: List[tuple]):
+        super().__init__()
+        self.text_hash = text_hash
+        self.spans = spans
+
+
 class PythonHighlighter(QSyntaxHighlighter):
+    # Au-delà de cette taille de document, plus de coloration (le coût de QSyntaxHighlighter explose sur les gros textes)
+    MAX_HIGHLIGHT_CHARS = 500_000
+    # Lignes plus longues (données minifiées, littéraux générés) laissées sans coloration: pas de parcours regex à chaque frappe
+    MAX_HIGHLIGHT_LINE_CHARS = 2000
+    # Formats par type de token (groupe de _HIGHLIGHT_RE), créés avec le premier highlighter puis partagés
+    _formats: Optional[dict] = None
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.highlightingRules = []
-        # Règles de coloration
-        keywordFormat = QTextCharFormat(); keywordFormat.setForeground(QColor("lightblue")); keywordFormat.setFontWeight(QFont.Weight.Bold)
-        keywords = ["def", "class", "import", "from", "return", "if", "else", "elif", "for", "while", "try", "except", "finally", "with", "as", "in", "True", "False", "None", "self", "lambda", "yield", "pass", "continue", "break", "is", "not", "and", "or", "del", "global", "nonlocal", "assert"]
-        self.highlightingRules.extend([(r'\b' + k + r'\b', keywordFormat) for k in keywords])
-        stringFormat = QTextCharFormat(); stringFormat.setForeground(QColor("lightgreen"))
-        self.highlightingRules.append((r'"[^"\\]*(\\.[^"\\]*)*"', stringFormat)); self.highlightingRules.append((r"'[^'\\]*(\\.[^'\\]*)*'", stringFormat))
-        commentFormat = QTextCharFormat(); commentFormat.setForeground(QColor("gray")); self.highlightingRules.append((r'#.*', commentFormat))
-        numberFormat = QTextCharFormat(); numberFormat.setForeground(QColor("orange")); self.highlightingRules.append((r'\b[0-9]+\b', numberFormat)); self.highlightingRules.append((r'\b0x[0-9A-Fa-f]+\b', numberFormat))
-        functionFormat = QTextCharFormat(); functionFormat.setForeground(QColor("yellow")); self.highlightingRules.append((r'\b[A-Za-z_][A-Za-z0-9_]*(?=\()', functionFormat))
-        decoratorFormat = QTextCharFormat(); decoratorFormat.setForeground(QColor("magenta")); self.highlightingRules.append((r'@[A-Za-z_][A-Za-z0-9_.]*', decoratorFormat))
+        if PythonHighlighter._formats is None:
+            formats = {}
+            for name, _, color, bold in _HIGHLIGHT_RULES:
+                text_format = QTextCharFormat(); text_format.setForeground(QColor(color))
+                if bold: text_format.setFontWeight(QFont.Weight.Bold)
+                formats[name] = text_format
+            PythonHighlighter._formats = formats
+        # Document au-delà de MAX_HIGHLIGHT_CHARS: mis à jour à chaque modification, tout le document est
+        # recoloré (ou décoloré) quand le seuil est franchi dans un sens ou dans l'autre
+        document = self.document()
+        self._over_limit = document is not None and document.characterCount() > self.MAX_HIGHLIGHT_CHARS
+        if document is not None: document.contentsChange.connect(self._on_contents_change)
+
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        over_limit = self.document().characterCount() > self.MAX_HIGHLIGHT_CHARS
+        if over_limit == self._over_limit: return
+        self._over_limit = over_limit
+        # Différé: rehighlight() ne doit pas être appelé pendant le traitement de la modification en cours
+        QTimer.singleShot(0, self.rehighlight)
 
     def highlightBlock(self, text):
-        if len(text) > 2000: return # Optimisation
-        for pattern, format_rule in self.highlightingRules:
-            try:
-                import re
-                for match in re.finditer(pattern, text):
-                    start, end = match.span()
-                    self.setFormat(start, end - start, format_rule)
-            except Exception: pass # Ignore regex errors
+        if self._over_limit or len(text) > self.MAX_HIGHLIGHT_LINE_CHARS: return # Optimisation
+        formats = self._formats
+        text_hash = hash(text)
+        cached = self.currentBlockUserData()
+        if isinstance(cached, _HighlightSpans) and cached.text_hash == text_hash:
+            spans = cached.spans # Bloc inchangé (rehighlight, mise en page): pas de nouveau parcours regex
+        else:
+            spans = [(match.start(), match.end() - match.start(), match.lastgroup) for match in _highlight_scanner(text).finditer(text)]
+            self.setCurrentBlockUserData(_HighlightSpans(text_hash, spans))
+        for start, length, kind in spans:
+            self.setFormat(start, length, formats[kind])
         self.setCurrentBlockState(0)
 
 
 # --- Fenêtre Principale ---
 class MainWindow(QMainWindow):
+    # Résultat de la vérification 'uv' faite en arrière-plan au démarrage (CompletedProcess ou None)
+    uv_check_finished = pyqtSignal(object)
+
     # --- Déclarations UI ---
     llm_backend_selector: QComboBox
     lmstudio_group: QGroupBox; llm_ip_input: QLineEdit; llm_port_input: QLineEdit
@@ -111,10 +175,18 @@ class MainWindow(QMainWindow):
         self.set_dev_elements_visibility(False)
         self.dev_mode_button.setChecked(False)
 
-        # Charge la liste des projets et tente la connexion après un court délai
-        QTimer.singleShot(0, self.handler.load_project_list)
         self.update_llm_ui_for_backend()
-        QTimer.singleShot(100, self.handler.attempt_llm_connection)
+        self.uv_check_finished.connect(self.handler.on_uv_check_finished)
+        # Liste des projets et connexion LLM: voir post_show_init (appelé après le premier affichage)
+        self._post_show_init_done = False
+
+    def post_show_init(self):
+        """Initialisation différée, lancée après le premier affichage (QTimer.singleShot(0) dans main)."""
+        if self._post_show_init_done: return
+        self._post_show_init_done = True
+        self.handler.load_project_list()
+        # La tentative de connexion LLM (réseau) attend que la liste des projets soit affichée
+        QTimer.singleShot(0, self.handler.attempt_llm_connection)
 
 
     def setup_ui(self):
@@ -258,8 +330,9 @@ class MainWindow(QMainWindow):
         code_label = QLabel(f"Project Code ({DEFAULT_MAIN_SCRIPT}):")
         self.code_editor_text = QTextEdit(); self.code_editor_text.setFont(QFont("Courier New", 10))
         self.code_highlighter = PythonHighlighter(self.code_editor_text.document())
+        self.code_editor_text.document().modificationChanged.connect(self.handler.on_code_modification_changed)
         self.save_code_button = QPushButton("Save Code"); self.save_code_button.setEnabled(False)
-        self.save_code_button.clicked.connect(self.handler.save_current_code)
+        self.save_code_button.clicked.connect(self.handler.request_save_current_code)
         code_layout.addWidget(code_label); code_layout.addWidget(self.code_editor_text, 1)
         run_controls_layout = QHBoxLayout(); self.auto_correct_checkbox = QCheckBox("Enable Auto-Correction"); self.auto_correct_checkbox.setChecked(True)
         run_controls_layout.addWidget(self.auto_correct_checkbox); self.max_attempts_spinbox = QSpinBox(); self.max_attempts_spinbox.setRange(1, 10); self.max_attempts_spinbox.setValue(DEFAULT_MAX_CORRECTION_ATTEMPTS)
@@ -328,7 +401,7 @@ class MainWindow(QMainWindow):
 
     def load_initial_settings(self):
         """Charge les paramètres depuis config_manager et met à jour l'UI."""
-        print("Loading initial UI settings from config...")
+        logger.debug("Loading initial UI settings from config...")
 
         # --- Blocage des signaux ---
         self.gemini_api_key_input.blockSignals(True)
@@ -339,25 +412,25 @@ class MainWindow(QMainWindow):
 
         try:
             saved_api_key = config_manager.get_api_key()
-            if saved_api_key: self.gemini_api_key_input.setText(saved_api_key); print("Loaded saved Gemini API Key.")
-            else: print("No saved Gemini API Key found.")
+            if saved_api_key: self.gemini_api_key_input.setText(saved_api_key); logger.debug("Loaded saved Gemini API Key.")
+            else: logger.debug("No saved Gemini API Key found.")
 
             last_gemini_model = config_manager.get_last_used_gemini_model()
             model_index = -1
             if last_gemini_model:
                 model_index = self.gemini_model_selector.findText(last_gemini_model, Qt.MatchFlag.MatchExactly)
-            if model_index != -1: self.gemini_model_selector.setCurrentIndex(model_index); print(f"Set Gemini model to last used: {last_gemini_model}")
+            if model_index != -1: self.gemini_model_selector.setCurrentIndex(model_index); logger.debug("Set Gemini model to last used: %s", last_gemini_model)
             else:
                 default_index = self.gemini_model_selector.findText(DEFAULT_GEMINI_MODEL, Qt.MatchFlag.MatchExactly)
-                if default_index != -1: self.gemini_model_selector.setCurrentIndex(default_index); print(f"Set Gemini model to default: {DEFAULT_GEMINI_MODEL}")
-                else: print("Warning: Default or last used Gemini model not found in available list.")
+                if default_index != -1: self.gemini_model_selector.setCurrentIndex(default_index); logger.debug("Set Gemini model to default: %s", DEFAULT_GEMINI_MODEL)
+                else: logger.warning("Default or last used Gemini model not found in available list.")
 
             last_lmstudio_ip = config_manager.get_last_used_lmstudio_ip()
             last_lmstudio_port = config_manager.get_last_used_lmstudio_port()
             self.llm_ip_input.setText(last_lmstudio_ip or DEFAULT_LM_STUDIO_IP)
             self.llm_port_input.setText(str(last_lmstudio_port or DEFAULT_LM_STUDIO_PORT))
-            print(f"Set LM Studio IP to: {self.llm_ip_input.text()}")
-            print(f"Set LM Studio Port to: {self.llm_port_input.text()}")
+            logger.debug("Set LM Studio IP to: %s", self.llm_ip_input.text())
+            logger.debug("Set LM Studio Port to: %s", self.llm_port_input.text())
 
         finally:
             # --- Déblocage des signaux ---
@@ -366,7 +439,7 @@ class MainWindow(QMainWindow):
             self.llm_ip_input.blockSignals(False)
             self.llm_port_input.blockSignals(False)
             # ----------------------------
-        print("Initial UI settings loaded.")
+        logger.debug("Initial UI settings loaded.")
 
     def update_llm_ui_for_backend(self):
         """Met à jour la visibilité des groupes LLM."""
@@ -374,7 +447,7 @@ class MainWindow(QMainWindow):
         is_lmstudio = selected_backend == LLM_BACKEND_LMSTUDIO
         is_gemini = selected_backend == LLM_BACKEND_GEMINI
 
-        print(f"Updating LLM UI visibility for backend: {selected_backend}")
+        logger.debug("Updating LLM UI visibility for backend: %s", selected_backend)
 
         self.llm_ip_input.blockSignals(True); self.llm_port_input.blockSignals(True)
         self.gemini_api_key_input.blockSignals(True); self.gemini_model_selector.blockSignals(True)
@@ -386,12 +459,12 @@ class MainWindow(QMainWindow):
             self.llm_ip_input.blockSignals(False); self.llm_port_input.blockSignals(False)
             self.gemini_api_key_input.blockSignals(False); self.gemini_model_selector.blockSignals(False)
 
-        print(f"LLM UI visibility updated.")
+        logger.debug("LLM UI visibility updated.")
 
 
     def set_dev_elements_visibility(self, visible: bool):
         """Affiche ou masque les éléments UI liés au mode développeur."""
-        print(f"Setting Dev Elements Visibility: {visible}")
+        logger.debug("Setting Dev Elements Visibility: %s", visible)
 
         # Panneau de GAUCHE
         if hasattr(self, 'deps_group'): self.deps_group.setVisible(visible)
@@ -53,6 +53,29 @@ AVAILABLE_GEMINI_MODELS = [
 ]
 DEFAULT_GEMINI_MODEL = config_manager.get_last_used_gemini_model() or AVAILABLE_GEMINI_MODELS[0]
 
+# Repli d'extraction de la liste de dépendances ([...] dans une réponse non structurée), compilé une fois
+_DEPENDENCY_LIST_RE = re.compile(r"(\[.*?\])", re.DOTALL)
+
+# Génération combinée: le modèle déclare lui-même ses dépendances en tête du code (une requête LLM au lieu de deux)
+REQUIREMENTS_HEADER = "# requirements:"
+_REQUIREMENTS_HEADER_RE = re.compile(r"^[ \t]*#[ \t]*requirements:[ \t]*(.*)$", re.IGNORECASE | re.MULTILINE)
+
+def _dependencies_prompt_line(deps_list_str: str, declare_requirements: bool) -> str:
+    """Ligne 'dépendances' du prompt de génération (imposées, ou à déclarer par le modèle via REQUIREMENTS_HEADER)."""
+    if not declare_requirements:
+        return f"\nRequired Dependencies: {deps_list_str or 'Standard libraries only'}."
+    installed = f" Already installed: {deps_list_str}." if deps_list_str else ""
+    return (f"\nDependencies: use any PyPI packages the code needs.{installed} The FIRST line of the code block MUST be "
+            f"'{REQUIREMENTS_HEADER} package1, package2' listing every non-standard-library package imported "
+            f"(pip install names), or '{REQUIREMENTS_HEADER} none' if only the standard library is used.")
+
+def parse_requirements_header(code: str) -> Optional[List[str]]:
+    """Paquets déclarés par la ligne REQUIREMENTS_HEADER du code généré, ou None si elle est absente."""
+    match = _REQUIREMENTS_HEADER_RE.search(code)
+    if not match: return None
+    packages = [name.strip() for name in match.group(1).split(",")]
+    return [name for name in packages if name and name.lower() != "none"]
+
 # --- Schéma Pydantic (inchangé) ---
 class DependencyList(BaseModel):
     dependencies: List[str] = Field(default_factory=list, description="...")
@@ -73,7 +96,7 @@ class BaseLLMClient(abc.ABC):
     def generate_or_correct_code(self, user_prompt: str, project_name: str, current_code: str, dependencies_to_use: List[str], project_structure_info: Optional[str] = None, execution_error: Optional[str] = None) -> str: pass
 
     @abc.abstractmethod
-    def generate_code_stream_with_deps(self, user_request: str, project_name: str, current_code: str, dependencies_to_use: List[str], fragment_callback: Callable[[str], None], project_structure_info: Optional[str] = None ) -> str: pass
+    def generate_code_stream_with_deps(self, user_request: str, project_name: str, current_code: str, dependencies_to_use: List[str], fragment_callback: Callable[[str], None], project_structure_info: Optional[str] = None, cancellation_check: Optional[Callable[[], bool]] = None, declare_requirements: bool = False) -> str: pass
 
     @abc.abstractmethod
     def get_backend_name(self) -> str: pass
@@ -201,7 +224,7 @@ class LMStudioClient(BaseLLMClient):
                 # Fallback Regex/AST si Pydantic échoue
                 print(f"{log_prefix} WARN: Could not obtain parsed DependencyList object.")
                 print(f"       Raw response received (first 250 chars): {final_raw_content[:250]}...")
-                match = re.search(r"(\[.*?\])", final_raw_content, re.DOTALL)
+                match = _DEPENDENCY_LIST_RE.search(final_raw_content)
                 if match:
                     try:
                         parsed_list_fb = ast.literal_eval(match.group(1))
@@ -286,7 +309,8 @@ class LMStudioClient(BaseLLMClient):
         dependencies_to_use: List[str],
         fragment_callback: Callable[[str], None],
         project_structure_info: Optional[str] = None,
-        cancellation_check: Optional[Callable[[], bool]] = None # <<< AJOUT DU PARAMÈTRE
+        cancellation_check: Optional[Callable[[], bool]] = None, # <<< AJOUT DU PARAMÈTRE
+        declare_requirements: bool = False # Le modèle choisit et déclare les dépendances (REQUIREMENTS_HEADER)
     ) -> str:
         if not self.is_available():
             err_msg = "# --- ERROR: LM Studio model not loaded. --- #"
@@ -306,7 +330,7 @@ class LMStudioClient(BaseLLMClient):
         ]
         if not is_initial:
             prompt_lines.append(f"\nCurrent Code to Refine:\n```python\n{current_code}\n```")
-        prompt_lines.append(f"\nRequired Dependencies: {deps_list_str or 'Standard libraries only'}.")
+        prompt_lines.append(_dependencies_prompt_line(deps_list_str, declare_requirements))
         if project_structure_info:
             prompt_lines.append(f"\nProject Files Context (for relative paths):\n```\n{project_structure_info}\n```")
         prompt_lines.append(f"\nInstructions: Output ONLY the complete, runnable Python code wrapped in a single ```python ... ``` block. No extra explanations.")
@@ -314,7 +338,7 @@ class LMStudioClient(BaseLLMClient):
         # --- Fin du Prompt ---
 
         print(f"{log_prefix} Requesting code stream for: '{user_request[:50]}...' using deps: {deps_list_str}")
-        full_response_content = ""
+        response_parts: List[str] = [] # Fragments accumulés, assemblés une seule fois en fin de stream
         try:
             chat = lms.Chat(system_prompt)
             # LM Studio peut nécessiter un ajustement des kwargs ici si des options spécifiques sont nécessaires
@@ -330,9 +354,9 @@ class LMStudioClient(BaseLLMClient):
                  # ---------------------------------------------------------
 
                  # Vérifie si le fragment est valide avant de continuer
-                 if fragment and hasattr(fragment, 'content') and isinstance(fragment.content, str):
-                    content_piece = fragment.content
-                    full_response_content += content_piece
+                 content_piece = getattr(fragment, 'content', None) # Un seul accès attribut par fragment
+                 if isinstance(content_piece, str):
+                    response_parts.append(content_piece)
                     try:
                         fragment_callback(content_piece) # Envoie à l'UI
                     except Exception as cb_err:
@@ -344,14 +368,14 @@ class LMStudioClient(BaseLLMClient):
 
             print(f"{log_prefix} Finished streaming loop ({fragment_count} fragments processed). Returning accumulated response.")
             if cancellation_check and cancellation_check():
-                 full_response_content += "\n# --- STREAM MANUALLY CANCELLED ---"
-            return full_response_content
+                 response_parts.append("\n# --- STREAM MANUALLY CANCELLED ---")
+            return "".join(response_parts)
 
         except Exception as e:
             # Vérifie si l'annulation était déjà demandée
             if cancellation_check and cancellation_check():
                  print(f"{log_prefix} Exception occurred ({type(e).__name__}), but cancellation was already requested. Ignoring error reporting.")
-                 return full_response_content + "\n# --- STREAM CANCELLED DURING EXCEPTION ---"
+                 return "".join(response_parts) + "\n# --- STREAM CANCELLED DURING EXCEPTION ---"
 
             # Gère les vraies erreurs
             error_msg = f"# --- LLM STREAM ERROR ({log_prefix}) --- #\n# {type(e).__name__}: {e}\n# Check console logs."
@@ -528,7 +552,7 @@ class GeminiClient(BaseLLMClient):
                         dependencies = [dep.strip() for dep in parsed_list if dep.strip()]
                     else: raise ValueError("Not list[str]")
                 except (ValueError, SyntaxError, TypeError) as parse_err:
-                     match = re.search(r"(\[.*?\])", raw_response_text, re.DOTALL)
+                     match = _DEPENDENCY_LIST_RE.search(raw_response_text)
                      if match:
                          try:
                              parsed_list_fb = ast.literal_eval(match.group(1))
@@ -611,7 +635,8 @@ class GeminiClient(BaseLLMClient):
         dependencies_to_use: List[str],
         fragment_callback: Callable[[str], None],
         project_structure_info: Optional[str] = None,
-        cancellation_check: Optional[Callable[[], bool]] = None # <<< NOUVEAU PARAMÈTRE
+        cancellation_check: Optional[Callable[[], bool]] = None, # <<< NOUVEAU PARAMÈTRE
+        declare_requirements: bool = False # Le modèle choisit et déclare les dépendances (REQUIREMENTS_HEADER)
     ) -> str:
         if not self.model_client:
             err_msg = "# --- ERROR: Gemini client not loaded. --- #"
@@ -631,7 +656,7 @@ class GeminiClient(BaseLLMClient):
         ]
         if not is_initial:
             prompt_lines.append(f"\nCurrent Code to Refine:\n```python\n{current_code}\n```")
-        prompt_lines.append(f"\nRequired Dependencies: {deps_list_str or 'Standard libraries only'}.")
+        prompt_lines.append(_dependencies_prompt_line(deps_list_str, declare_requirements))
         if project_structure_info:
             prompt_lines.append(f"\nProject Files Context (for relative paths):\n```\n{project_structure_info}\n```")
         prompt_lines.append(f"\nInstructions: Output ONLY the complete, runnable Python code wrapped in a single ```python ... ``` block. No extra explanations.")
@@ -642,7 +667,7 @@ class GeminiClient(BaseLLMClient):
         less_strict_safety_settings = { HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE, HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE, HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE, HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE, }
 
         print(f"{log_prefix} Requesting stream for: '{user_request[:50]}...' deps: {deps_list_str}")
-        full_response_content = ""; fragment_count = 0
+        response_parts: List[str] = []; fragment_count = 0 # Fragments assemblés une seule fois en fin de stream
 
         try:
             prediction_stream = self.model_client.generate_content(
@@ -666,14 +691,14 @@ class GeminiClient(BaseLLMClient):
                  if block_reason:
                      error_msg_block = f"# --- GEMINI STREAM ERROR: Blocked{block_reason} --- #"
                      print(f"{log_prefix} Stream blocked: {block_reason}")
-                     full_response_content += error_msg_block
+                     response_parts.append(error_msg_block)
                      try: fragment_callback(f"\nSTREAM ERROR: Blocked - {block_reason}\n")
                      except Exception as cb_err_block: print(f"Error sending block reason via callback: {cb_err_block}")
                      break # Sort aussi si bloqué
 
                  chunk_text = self._extract_text_from_gemini_response(chunk)
                  if chunk_text:
-                     full_response_content += chunk_text
+                     response_parts.append(chunk_text)
                      try: fragment_callback(chunk_text) # Envoie le fragment à l'UI
                      except Exception as cb_err: print(f"Error in fragment_callback: {cb_err}")
                      fragment_count += 1
@@ -685,16 +710,16 @@ class GeminiClient(BaseLLMClient):
             # Le message final dépend si on est sorti par break ou normalement
             if cancellation_check and cancellation_check():
                  # Si on sort par break à cause de l'annulation, on peut ajouter un marqueur
-                 full_response_content += "\n# --- STREAM MANUALLY CANCELLED ---"
+                 response_parts.append("\n# --- STREAM MANUALLY CANCELLED ---")
 
-            return full_response_content
+            return "".join(response_parts)
 
         except Exception as e:
             # Vérifie si l'exception est due à une annulation déjà en cours
             # (Moins fiable, mais peut éviter des logs d'erreur inutiles)
             if cancellation_check and cancellation_check():
                  print(f"{log_prefix} Exception occurred ({type(e).__name__}), but cancellation was already requested. Ignoring error reporting.")
-                 return full_response_content + "\n# --- STREAM CANCELLED DURING EXCEPTION ---"
+                 return "".join(response_parts) + "\n# --- STREAM CANCELLED DURING EXCEPTION ---"
 
             # Gère les vraies erreurs
             error_msg_exc = f"# --- LLM STREAM ERROR ({log_prefix}) --- #\n# {type(e).__name__}: {e}\n# Check console logs."
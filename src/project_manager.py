@@ -3,15 +3,20 @@
 import os
 import json
 import shutil
+import tempfile
 import traceback
 import re # Added for sanitization
 import datetime # Added for timestamp in metadata
-from typing import List, Tuple # <<< AJOUTÉ
+from typing import List, Tuple, Iterable # <<< AJOUTÉ
 from . import utils # Use relative import within the package
 
 PROJECTS_DIR = "projets" # Keep consistent spelling
 PROJECT_CONFIG_FILE = "project_meta.json"
 DEFAULT_MAIN_SCRIPT = "main.py"
+# Dossier (dans PROJECTS_DIR) des répertoires temporaires d'export: même volume que les projets
+EXPORT_STAGING_DIR = ".export_tmp"
+# Cache PyInstaller persistant par projet (dans EXPORT_STAGING_DIR), réutilisé d'un export à l'autre
+PYINSTALLER_CACHE_DIR = "pyinstaller_cache"
 # --- NOUVELLE CONSTANTE ---
 # Patterns à exclure lors de la liste du contenu du projet pour l'IA ou l'exportation
 EXCLUDE_PATTERNS_FOR_LISTING = [
@@ -26,12 +31,23 @@ EXCLUDE_PATTERNS_FOR_LISTING = [
     "build",
     "dist",
     "*.spec",
-    ".venv_dist" # Exclure aussi le venv créé par le script de démarrage distribué
+    ".venv_dist", # Exclure aussi le venv créé par le script de démarrage distribué
+    EXPORT_STAGING_DIR # Pas un projet: répertoires temporaires de l'exporteur
 ]
 # ------------------------
 
+# Project name sanitizers, compiled once (get_project_path runs for every project operation)
+_PATH_NAME_SANITIZER_RE = re.compile(r'[^\w.\-]+')
+_DIR_NAME_SANITIZER_RE = re.compile(r'[^\w-]+') # No periods allowed in dir name usually
+
+# Resolved projects directory, memoized once it exists on disk (until then the fallback checks below must run)
+_abs_projects_dir_cache = None
+
 def get_absolute_projects_dir():
     """Gets the absolute path to the main projects directory."""
+    global _abs_projects_dir_cache
+    if _abs_projects_dir_cache is not None:
+        return _abs_projects_dir_cache
     try:
         # Assumes project_manager.py is in src/
         app_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -47,14 +63,17 @@ def get_absolute_projects_dir():
          print(f"Warning: Absolute path '{abs_projects_dir}' not found, falling back to relative '{PROJECTS_DIR}'")
          return os.path.abspath(PROJECTS_DIR)
 
-    return os.path.abspath(abs_projects_dir)
+    abs_projects_dir = os.path.abspath(abs_projects_dir)
+    if os.path.isdir(abs_projects_dir):
+        _abs_projects_dir_cache = abs_projects_dir
+    return abs_projects_dir
 
 def get_project_path(project_name):
     """Gets the FULL ABSOLUTE path to a specific project directory."""
     # Use os.path.basename to prevent user providing path elements
     base_name = os.path.basename(project_name)
     # Sanitize allowing alphanumeric, underscore, hyphen, period
-    safe_project_name = re.sub(r'[^\w.\-]+', '_', base_name)
+    safe_project_name = _PATH_NAME_SANITIZER_RE.sub('_', base_name)
     safe_project_name = safe_project_name.strip('_') # Remove leading/trailing underscores
 
     if safe_project_name != project_name:
@@ -145,7 +164,7 @@ def list_projects():
 def create_project(project_name):
     """Creates a new project directory and basic structure."""
     base_name = os.path.basename(project_name)
-    safe_project_name = re.sub(r'[^\w-]+', '_', base_name) # No periods allowed in dir name usually
+    safe_project_name = _DIR_NAME_SANITIZER_RE.sub('_', base_name)
     safe_project_name = safe_project_name.strip('_')
     if not safe_project_name or safe_project_name in ['.', '..']:
          print(f"Error: Invalid project name after sanitization: '{project_name}' -> '{safe_project_name}'")
@@ -253,12 +272,32 @@ def get_project_script_content(project_name, script_name=DEFAULT_MAIN_SCRIPT):
 
 def save_project_script_content(project_name, content, script_name=DEFAULT_MAIN_SCRIPT):
     """Writes content to a script file within the project."""
+    return save_project_script_stream(project_name, (content,), script_name)
+
+def save_project_script_stream(project_name, chunks: Iterable[str], script_name=DEFAULT_MAIN_SCRIPT):
+    """
+    Writes a script file within the project from an iterable of text chunks, written as they
+    are produced (the full content is never assembled in memory).
+    The chunks go to a temporary file next to the script, which is synced and then renamed over
+    it: an interrupted save never leaves a truncated script behind.
+    """
+    tmp_path = None
     try:
         project_path = get_project_path(project_name)
         script_path = os.path.join(project_path, script_name)
         os.makedirs(project_path, exist_ok=True)
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{script_name}.", suffix=".tmp", dir=project_path)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            shutil.copymode(script_path, tmp_path) # mkstemp creates the file as 0600
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, script_path)
+        tmp_path = None
         # print(f"Script '{script_name}' saved for project '{project_name}'.") # Reduce noise
         # Update metadata last modified time on code save
         metadata = load_project_metadata(project_name)
@@ -271,6 +310,10 @@ def save_project_script_content(project_name, content, script_name=DEFAULT_MAIN_
         print(f"Error writing script '{script_name}' for '{project_name}': {e}")
         traceback.print_exc()
         return False
+    finally:
+        if tmp_path is not None:
+            try: os.remove(tmp_path)
+            except OSError: pass
 
 def delete_project(project_name: str) -> bool:
     """Deletes the entire project directory permanently."""
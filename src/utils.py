@@ -5,10 +5,14 @@ import subprocess
 import sys
 import os
 import platform
+import shutil
+import stat
 import traceback
 import datetime # For timestamp
+import threading
+from collections import deque
 # import re # Not needed here, used in project_manager
-from typing import List, Optional, Callable, Union
+from typing import List, Optional, Callable, Union, NamedTuple
 
 from . import project_manager # Use relative import within the package
 
@@ -24,9 +28,37 @@ def get_timestamp():
 
 # --- UV Command Execution ---
 
+# Process-wide caches: resolving 'uv' on PATH and running 'uv --version' only needs to happen once.
+_uv_path_cache: Optional[str] = None
+_uv_check_cache: Optional[subprocess.CompletedProcess] = None
+
 def get_uv_executable_path():
-    """Finds the path to the UV executable. Assumes 'uv' is in PATH."""
-    return "uv"
+    """Finds the path to the UV executable (cached). Falls back to 'uv' if it is not found in PATH."""
+    global _uv_path_cache
+    if _uv_path_cache is None:
+        _uv_path_cache = shutil.which("uv") or ""
+    return _uv_path_cache or "uv"
+
+def check_uv_available() -> Optional[subprocess.CompletedProcess]:
+    """
+    Runs 'uv --version' once per process and returns the cached result afterwards.
+
+    Returns:
+        The CompletedProcess of the version check, or None if uv could not be executed.
+    """
+    global _uv_check_cache
+    if _uv_check_cache is None:
+        result = run_uv_command(["--version"], capture=True)
+        if result is None or result.returncode != 0:
+            return result # Failures are not cached, the next call retries
+        _uv_check_cache = result
+    return _uv_check_cache
+
+def invalidate_uv_cache():
+    """Forgets the cached uv path and version check (e.g. after installing uv)."""
+    global _uv_path_cache, _uv_check_cache
+    _uv_path_cache = None
+    _uv_check_cache = None
 
 def run_uv_command(args: List[str], cwd: Optional[str] = None, capture: bool = True, progress_callback: Optional[Callable[[str], None]] = None) -> Optional[subprocess.CompletedProcess]:
     """
@@ -64,7 +96,8 @@ def run_uv_command(args: List[str], cwd: Optional[str] = None, capture: bool = T
             text=True,
             check=False,
             encoding='utf-8',
-            errors='replace'
+            errors='replace',
+            close_fds=True # Pas de preexec_fn/pass_fds: lancement rapide par vfork (GIL relâché, Python 3.11+)
         )
 
         if capture and progress_callback:
@@ -97,6 +130,96 @@ def run_uv_command(args: List[str], cwd: Optional[str] = None, capture: bool = T
         return subprocess.CompletedProcess(args=command, returncode=-1, stdout="", stderr=str(e))
 
 
+# Lines kept per stream when output is streamed (enough for the final traceback used by auto-correction).
+STREAM_TAIL_LINES = 2000
+
+def stream_uv_command(args: List[str], cwd: str, line_callback: Callable[[str, str], None], progress_callback: Optional[Callable[[str], None]] = None) -> Optional[subprocess.CompletedProcess]:
+    """
+    Runs a UV command and forwards its output line by line while it runs.
+
+    Args:
+        args: List of arguments FOR uv.
+        cwd: Working directory for the command.
+        line_callback: Called as line_callback(stream, line) with stream "stdout" or "stderr", from the reading threads.
+        progress_callback: Optional function to send status messages to.
+
+    Returns:
+        subprocess.CompletedProcess whose stdout/stderr only hold the last STREAM_TAIL_LINES lines,
+        or None on critical error (uv not found).
+    """
+    uv_exe = get_uv_executable_path()
+    command = [uv_exe] + args
+    abs_cwd = os.path.abspath(cwd)
+    log_progress = progress_callback or _dummy_progress_callback
+    command_str_repr = ' '.join(map(repr, command))
+    log_progress(f"Running UV: {command_str_repr}")
+    log_progress(f"  in CWD: {repr(abs_cwd)}")
+
+    stdout_tail = deque(maxlen=STREAM_TAIL_LINES)
+    stderr_tail = deque(maxlen=STREAM_TAIL_LINES)
+
+    def _pump(pipe, stream_name: str, tail: deque):
+        with pipe:
+            for line in pipe:
+                line = line.rstrip('\r\n')
+                tail.append(line)
+                line_callback(stream_name, line)
+
+    try:
+        with subprocess.Popen(command, cwd=abs_cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=1, text=True,
+                              encoding='utf-8', errors='replace', close_fds=True) as proc:
+            # stderr is drained by its own thread so neither pipe can fill up and block the child
+            stderr_thread = threading.Thread(target=_pump, args=(proc.stderr, "stderr", stderr_tail), daemon=True)
+            stderr_thread.start()
+            _pump(proc.stdout, "stdout", stdout_tail)
+            stderr_thread.join()
+            returncode = proc.wait()
+    except FileNotFoundError:
+        error_msg = f"ERROR: '{uv_exe}' command not found. Is UV installed and in PATH?"
+        print(error_msg)
+        log_progress(error_msg)
+        return None # Critical failure
+
+    if returncode != 0:
+        log_progress(f"UV Command failed with exit code {returncode}")
+    return subprocess.CompletedProcess(args=command, returncode=returncode, stdout="\n".join(stdout_tail), stderr="\n".join(stderr_tail))
+
+
+# --- File Copy Helpers ---
+
+# Never worth copying into a project or an export: bytecode caches, VCS metadata, environments.
+COPYTREE_IGNORE_PATTERNS = ("__pycache__", "*.pyc", ".git", ".venv", "node_modules")
+copytree_ignore = shutil.ignore_patterns(*COPYTREE_IGNORE_PATTERNS)
+
+def _load_copyfile2():
+    """Returns kernel32.CopyFile2 (Windows 8+) set up for ctypes, or None."""
+    if sys.platform != "win32": return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+        copyfile2 = ctypes.windll.kernel32.CopyFile2
+        copyfile2.argtypes = (wintypes.LPCWSTR, wintypes.LPCWSTR, ctypes.c_void_p)
+        copyfile2.restype = ctypes.c_long # HRESULT
+        return copyfile2
+    except (ImportError, AttributeError, OSError):
+        return None
+
+_COPYFILE2 = _load_copyfile2()
+
+def fast_copy2(src: str, dst: str) -> str:
+    """
+    Drop-in for shutil.copy2. On Windows, native copy through CopyFile2, then copystat.
+    Elsewhere shutil.copy2 already copies in the kernel (os.sendfile on Linux, fcopyfile on macOS).
+    """
+    if _COPYFILE2 is not None and _COPYFILE2(src, dst, None) == 0:
+        shutil.copystat(src, dst)
+        return dst
+    return shutil.copy2(src, dst)
+
+def copy_tree(src: str, dst: str) -> str:
+    """shutil.copytree into a possibly existing dst, with fast_copy2 and COPYTREE_IGNORE_PATTERNS skipped."""
+    return shutil.copytree(src, dst, dirs_exist_ok=True, copy_function=fast_copy2, ignore=copytree_ignore)
+
 # --- Project Environment Helpers ---
 
 def get_project_venv_path(project_base_path: str) -> str:
@@ -209,7 +332,14 @@ def install_project_dependencies(project_path: str, dependencies: Union[str, Lis
         log_progress(f"ERROR: Failed to install dependencies: {deps_list}")
         return False
 
-def run_project_script(project_path: str, script_name: str = "main.py", progress_callback: Optional[Callable[[str], None]] = None) -> Optional[subprocess.CompletedProcess]:
+class RunResult(NamedTuple):
+    """Outcome of run_project_script (stdout/stderr are always strings, possibly only the tail when streamed)."""
+    returncode: int
+    stdout: str = ""
+    stderr: str = ""
+    venv_ready: bool = False # The venv was checked (or known ready) and 'uv run' started, whatever the script's exit code
+
+def run_project_script(project_path: str, script_name: str = "main.py", progress_callback: Optional[Callable[[str], None]] = None, line_callback: Optional[Callable[[str, str], None]] = None, venv_ready: bool = False) -> RunResult:
     """
     Runs a Python script within the project's UV environment using 'uv run'.
 
@@ -217,41 +347,56 @@ def run_project_script(project_path: str, script_name: str = "main.py", progress
         project_path: Absolute path to the project directory.
         script_name: Name of the script file relative to project_path.
         progress_callback: Optional function to send execution output/status to.
+        line_callback: Optional function receiving the script output as it is produced
+                       (line_callback(stream, line)); output is then not buffered in full.
+        venv_ready: True when the caller already knows the venv exists (skips ensure_project_venv).
 
     Returns:
-        subprocess.CompletedProcess object containing execution results, or None if
-        uv command itself failed critically (e.g., not found).
+        RunResult with the script's exit code and output. Failures to start the script
+        (missing venv or script, uv not found) are reported as a non-zero returncode
+        with venv_ready False.
     """
     abs_project_path = os.path.abspath(project_path)
     log_progress = progress_callback or _dummy_progress_callback
 
     log_progress(f"Preparing to run script: {abs_project_path}/{script_name}")
 
-    log_progress("Checking virtual environment...")
-    if not ensure_project_venv(abs_project_path, progress_callback=log_progress):
-        log_progress(f"ERROR: Failed to ensure venv exists. Cannot run script.")
-        return subprocess.CompletedProcess(args=[], returncode=-1, stdout="", stderr="Failed to ensure virtual environment.")
-
+    # A single stat of the script also proves the project directory exists; done before
+    # the venv check so a missing script doesn't trigger a venv creation first.
     script_path_abs = os.path.join(abs_project_path, script_name)
-    if not os.path.exists(script_path_abs):
+    try:
+        if not stat.S_ISREG(os.stat(script_path_abs).st_mode):
+            raise FileNotFoundError(script_path_abs)
+    except OSError:
         error_msg = f"Error: Script file not found at {script_path_abs}"
         log_progress(error_msg)
-        return subprocess.CompletedProcess(args=[], returncode=1, stdout="", stderr=error_msg)
+        return RunResult(returncode=1, stderr=error_msg, venv_ready=venv_ready) # Venv not checked: known state unchanged
+
+    if venv_ready:
+        log_progress("Virtual environment already checked for this project.")
+    else:
+        log_progress("Checking virtual environment...")
+        if not ensure_project_venv(abs_project_path, progress_callback=log_progress):
+            log_progress(f"ERROR: Failed to ensure venv exists. Cannot run script.")
+            return RunResult(returncode=-1, stderr="Failed to ensure virtual environment.")
 
     log_progress(f"Executing script '{script_name}' using 'uv run -- python {script_name}'...")
     try:
         run_args = ["run", "--", "python", script_name]
-        # Use capture=True so progress_callback can log stdout/stderr from result
-        result = run_uv_command(run_args, cwd=abs_project_path, capture=True, progress_callback=log_progress)
+        if line_callback:
+            # Output streamed line by line; the result only keeps the tail of each stream
+            result = stream_uv_command(run_args, cwd=abs_project_path, line_callback=line_callback, progress_callback=log_progress)
+        else:
+            # Use capture=True so progress_callback can log stdout/stderr from result
+            result = run_uv_command(run_args, cwd=abs_project_path, capture=True, progress_callback=log_progress)
 
         if result:
              log_progress(f"--- Script execution finished (Exit Code: {result.returncode}) ---")
         else:
              log_progress(f"--- Script execution failed (Could not run UV command) ---")
-             constructed_args_for_error = [get_uv_executable_path()] + run_args
-             return subprocess.CompletedProcess(args=constructed_args_for_error, returncode=-127, stdout="", stderr="Failed to execute uv command.")
+             return RunResult(returncode=-127, stderr="Failed to execute uv command.")
 
-        return result
+        return RunResult(result.returncode, result.stdout or "", result.stderr or "", venv_ready=True)
 
     except Exception as e:
         error_msg = f"Error setting up or interpreting 'uv run' for script {script_path_abs}: {e}"
@@ -259,5 +404,4 @@ def run_project_script(project_path: str, script_name: str = "main.py", progress
         traceback.print_exc()
         log_progress(error_msg)
         log_progress(traceback.format_exc())
-        constructed_args_for_error = [get_uv_executable_path()] + run_args
-        return subprocess.CompletedProcess(args=constructed_args_for_error, returncode=-1, stdout="", stderr=f"Exception during script execution setup: {e}")
\ No newline at end of file
+        return RunResult(returncode=-1, stderr=f"Exception during script execution setup: {e}")
\ No newline at end of file